@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Djist benchmarks: Command line
+
+Usage:
+    python -m benchmarks --scale medium --output results.json
+    python -m benchmarks --baseline baseline.json --threshold 0.15
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import argparse
+import json
+import sys
+from . import suite
+from . import workloads
+
+
+def parse_argument():
+    parser = argparse.ArgumentParser(
+        prog="benchmarks", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--scale",
+        default="small",
+        choices=list(workloads.SCALES.keys()),
+        help="Size of the synthetic workloads.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of timed runs per workload, the fastest run is kept.",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="*",
+        default=None,
+        help="Only run workloads whose name contains one of these strings.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Location to save the results as JSON.",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Results JSON to compare against.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed slowdown or memory growth (fraction) before a regression "
+        "is reported.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_argument()
+    current = suite.run(args.scale, args.repeat, args.only)
+    for line in suite.format_results(current):
+        print(line)
+    if args.output:
+        with open(args.output, "w") as out_file:
+            json.dump(current, out_file, indent=4)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = suite.compare(current, baseline, args.threshold)
+        for name, metric, old_value, new_value, ratio in regressions:
+            print(
+                f"REGRESSION {name} {metric}: {old_value:.6g} -> {new_value:.6g} "
+                f"({(ratio - 1) * 100:+.1f}%)"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
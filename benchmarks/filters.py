@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Djist benchmarks: Per-filter microbenchmarks
+
+Runs every entry of token_filter.filter_select over representative inputs
+and argument combinations taken from token_filter.filter_defaults. With
+--chains, times filter chains on the long string as compiled (consecutive
+pure filters fused) against the same filters called one by one.
+
+Usage:
+    python -m benchmarks.filters --output filters.json
+    python -m benchmarks.filters --only linebreaks linenumbers dictsort
+    python -m benchmarks.filters --chains --size 100000
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import argparse
+import inspect
+import json
+import logging
+import time
+import tracemalloc
+from djist.assembler.job import config as conf
+from djist.assembler.template import processor as mprocessor
+from djist.assembler.template import token_filter as tf
+
+
+# Arguments worth timing in addition to the defaults, per filter
+EXTRA_ARGUMENTS = {
+    "add": [["2"]],
+    "center": [["80", "*"]],
+    "cut": [[" "]],
+    "date": [["D d M Y"], ["%a, %d %b %Y", "python"]],
+    "dictsort": [["name"], ["price", "reverse"]],
+    "dictsortreversed": [["name"]],
+    "floatformat": [["2"], ["-3"]],
+    "get_digit": [["2"]],
+    "join": [[", "]],
+    "linenumbers": [["100", "2", ")"]],
+    "ljust": [["80", "."]],
+    "rjust": [["80", "."]],
+    "where": [["id", 500]],
+    "whereall": [["category", "category-3"]],
+}
+
+# Filter chains timed with --chains, as (filter name, literal arguments)
+CHAINS = [
+    [("cut", ["\r"]), ("linebreaksbr", []), ("escape", [])],
+    [("escape", []), ("linebreaksbr", [])],
+    [("cut", ["\r"]), ("force_escape", []), ("linebreaks", [])],
+    [("lower", []), ("cut", [" "]), ("escape", [])],
+]
+
+
+def inputs(size: int = 1000) -> dict:
+    """Representative values passed to each filter"""
+    return {
+        "short_str": "The quick brown fox",
+        "long_str": "Lorem ipsum dolor sit amet,\nconsectetur 'adipiscing' <elit>.\n"
+        * size,
+        "numeric_str": "1234567.891",
+        "date_str": "2021-01-07 09:50:07",
+        "big_list": [
+            {
+                "id": index,
+                "name": f"name {size - index}",
+                "category": f"category-{index % 7}",
+                "price": index * 1.25,
+            }
+            for index in range(size)
+        ],
+        "dict": {f"key{index}": index for index in range(100)},
+    }
+
+
+def argument_combinations(filter_name: str) -> list:
+    """No arguments, the explicit default values, and any extra arguments"""
+    combinations = [[]]
+    if filter_name in tf.filter_defaults:
+        default_values = list(tf.arg_default_values(filter_name))
+        if default_values:
+            combinations.append(default_values)
+    combinations.extend(EXTRA_ARGUMENTS.get(filter_name, []))
+    return combinations
+
+
+def accepts_processor(filter_function) -> bool:
+    return len(inspect.signature(filter_function).parameters) >= 3
+
+
+def measure(call, min_time: float = 0.02) -> tuple:
+    """Operations per second and peak allocated bytes for one call"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 4
+    tracemalloc.start()
+    try:
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return number / elapsed if elapsed else 0.0, peak
+
+
+def run(only: list = None, size: int = 1000, min_time: float = 0.02) -> list:
+    """Benchmark every filter for every input and argument combination
+
+    Returns:
+        list: dicts with filter, input, arguments, ops_per_s, peak_bytes
+            and error (exception name, or empty if the call succeeded)
+    """
+    results = []
+    values = inputs(size)
+    proc = mprocessor.Processor(0)
+    logging.disable(logging.CRITICAL)
+    try:
+        for filter_name, filter_function in tf.filter_select.items():
+            if only and filter_name not in only:
+                continue
+            with_proc = accepts_processor(filter_function)
+            for arguments in argument_combinations(filter_name):
+                for input_name, value in values.items():
+
+                    def call(value=value, arguments=arguments):
+                        if with_proc:
+                            return filter_function(value, list(arguments), proc)
+                        return filter_function(value, list(arguments))
+
+                    result = {
+                        "filter": filter_name,
+                        "input": input_name,
+                        "arguments": arguments,
+                        "ops_per_s": 0.0,
+                        "peak_bytes": 0,
+                        "error": "",
+                    }
+                    try:
+                        call()
+                    except Exception as err:  # pylint: disable=broad-except
+                        result["error"] = type(err).__name__
+                        results.append(result)
+                        continue
+                    result["ops_per_s"], result["peak_bytes"] = measure(
+                        call, min_time
+                    )
+                    results.append(result)
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def run_chains(size: int = 1000, min_time: float = 0.02) -> list:
+    """Time each chain of CHAINS compiled and called filter by filter, with
+    the filter memo off so every call does the work
+
+    Returns:
+        list: dicts with chain, compiled_ops_per_s, separate_ops_per_s
+    """
+    results = []
+    value = inputs(size)["long_str"].replace("\n", "\r\n")
+    proc = mprocessor.Processor(0)
+    memo_size = conf.FILTER_MEMO_SIZE
+    conf.FILTER_MEMO_SIZE = 0
+    try:
+        for chain in CHAINS:
+            compiled = tf.compile_chain(
+                tuple(
+                    (name, tuple((argument, "literal") for argument in arguments))
+                    for name, arguments in chain
+                )
+            )
+
+            def compiled_call():
+                filtered = value
+                for function, arguments, _ in compiled:
+                    filtered = function(filtered, arguments, proc)
+                return filtered
+
+            def separate_call():
+                filtered = value
+                for name, arguments in chain:
+                    filtered = tf.filter_select[name](filtered, list(arguments), proc)
+                return filtered
+
+            results.append(
+                {
+                    "chain": "|".join(name for name, _ in chain),
+                    "compiled_ops_per_s": measure(compiled_call, min_time)[0],
+                    "separate_ops_per_s": measure(separate_call, min_time)[0],
+                }
+            )
+    finally:
+        conf.FILTER_MEMO_SIZE = memo_size
+    return results
+
+
+def format_chain_results(results: list) -> list:
+    lines = [f"{'chain':<36}{'compiled ops/s':>16}{'separate ops/s':>16}{'speedup':>9}"]
+    for result in results:
+        separate = result["separate_ops_per_s"]
+        speedup = result["compiled_ops_per_s"] / separate if separate else 0.0
+        lines.append(
+            f"{result['chain']:<36}{result['compiled_ops_per_s']:>16.1f}"
+            f"{separate:>16.1f}{speedup:>9.2f}"
+        )
+    return lines
+
+
+def format_results(results: list, limit: int = 0) -> list:
+    """Result table, slowest first"""
+    ordered = sorted(
+        (result for result in results if not result["error"]),
+        key=lambda result: result["ops_per_s"],
+    )
+    if limit:
+        ordered = ordered[:limit]
+    lines = [f"{'filter':<20}{'input':<13}{'arguments':<26}{'ops/s':>14}{'peak (B)':>12}"]
+    for result in ordered:
+        arguments = json.dumps(result["arguments"])[:24]
+        lines.append(
+            f"{result['filter']:<20}{result['input']:<13}{arguments:<26}"
+            f"{result['ops_per_s']:>14.1f}{result['peak_bytes']:>12}"
+        )
+    failed = sorted(
+        {(result["filter"], result["error"]) for result in results if result["error"]}
+    )
+    if failed:
+        lines.append("")
+        lines.append("Calls raising an exception (filter, error):")
+        lines.extend(f"  {name}: {error}" for name, error in failed)
+    return lines
+
+
+def parse_argument():
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.filters",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--only", nargs="*", default=None, help="Filter names to benchmark."
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=1000,
+        help="Number of lines in the long string and items in the big list.",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.02,
+        help="Minimum timed duration (seconds) per measurement.",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=0, help="Only print the slowest results."
+    )
+    parser.add_argument(
+        "--chains",
+        action="store_true",
+        help="Time the filter chains, compiled and filter by filter, instead.",
+    )
+    parser.add_argument(
+        "--output", default=None, help="Location to save the results as JSON."
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_argument()
+    if args.chains:
+        results = run_chains(args.size, args.min_time)
+        lines = format_chain_results(results)
+    else:
+        results = run(args.only, args.size, args.min_time)
+        lines = format_results(results, args.limit)
+    for line in lines:
+        print(line)
+    if args.output:
+        with open(args.output, "w") as out_file:
+            json.dump(results, out_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Djist benchmarks: Command line startup time
+
+Times `djist --version` and a trivial run in fresh interpreters, and lists
+the heaviest modules they import (from python -X importtime). pyparsing,
+dateutil and sqlite3 are only imported when a template needs them, so a
+trivial run importing one of them is reported.
+
+Usage:
+    python -m benchmarks.importtime --repeat 10
+    python -m benchmarks.importtime --output startup.json
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import djist
+
+
+# Wall time a trivial run should stay under
+TARGET_S = 0.05
+
+# Modules imported on first use, not by trivial runs
+DEFERRED_MODULES = ("pyparsing", "dateutil", "sqlite3")
+
+TRIVIAL_TEMPLATE = """<h1>{{ title }}</h1>
+{% for item in items %}<p>{{ item.name|upper }}</p>
+{% endfor %}"""
+
+TRIVIAL_DATASET = {
+    "title": "Startup",
+    "items": [{"name": "first"}, {"name": "second"}],
+}
+
+
+def commands(directory: str) -> dict:
+    """djist arguments of each timed command"""
+    return {
+        "version": ["--version"],
+        "run": [
+            "--console",
+            "quiet",
+            "--log-level",
+            "quiet",
+            "run",
+            os.path.join(directory, "startup.template"),
+            os.path.join(directory, "startup.json"),
+            "--output-file",
+            os.path.join(directory, "startup.html"),
+        ],
+    }
+
+
+def environment() -> dict:
+    """Environment of the timed interpreters, importing this djist"""
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(djist.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_root, env.get("PYTHONPATH", "")])
+    )
+    # Bytecode is written once, so later runs time loading, not compiling
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def start(arguments: list, directory: str, options: tuple = ()):
+    return subprocess.run(
+        [sys.executable, *options, "-m", "djist", *arguments],
+        cwd=directory,
+        env=environment(),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def wall_time(arguments: list, directory: str, repeat: int) -> float:
+    """Fastest wall clock time (seconds) of several runs"""
+    start(arguments, directory)
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        start(arguments, directory)
+        timings.append(time.perf_counter() - begin)
+    return min(timings)
+
+
+def imports(arguments: list, directory: str) -> list:
+    """(module, cumulative seconds, top level) of every import of a run"""
+    found = []
+    completed = start(arguments, directory, ("-X", "importtime"))
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        found.append(
+            (name.strip(), int(cumulative) / 1e6, not name[1:].startswith(" "))
+        )
+    return found
+
+
+def measure(name: str, arguments: list, directory: str, repeat: int, top: int) -> dict:
+    found = imports(arguments, directory)
+    top_level = sorted(
+        ((module, seconds) for module, seconds, is_top in found if is_top),
+        key=lambda entry: entry[1],
+        reverse=True,
+    )
+    imported = {module.split(".")[0] for module, _, _ in found}
+    return {
+        "command": name,
+        "startup_s": wall_time(arguments, directory, repeat),
+        "modules": len(found),
+        "heaviest": [[module, seconds] for module, seconds in top_level[:top]],
+        "deferred_imported": [
+            module for module in DEFERRED_MODULES if module in imported
+        ],
+    }
+
+
+def run(repeat: int = 5, top: int = 5) -> dict:
+    """Startup results by command, with the bare interpreter for reference"""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="djist-startup-") as directory:
+        with open(os.path.join(directory, "startup.template"), "w") as template:
+            template.write(TRIVIAL_TEMPLATE)
+        with open(os.path.join(directory, "startup.json"), "w") as dataset:
+            json.dump(TRIVIAL_DATASET, dataset)
+        timings = []
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], check=False)
+            timings.append(time.perf_counter() - begin)
+        results["python"] = {"command": "python", "startup_s": min(timings)}
+        for name, arguments in commands(directory).items():
+            results[name] = measure(name, arguments, directory, repeat, top)
+    return results
+
+
+def format_results(results: dict) -> list:
+    lines = [f"{'command':<12}{'startup (ms)':>14}{'modules':>10}  heaviest imports"]
+    for result in results.values():
+        heaviest = ", ".join(
+            f"{module} {seconds * 1000:.1f}"
+            for module, seconds in result.get("heaviest", [])
+        )
+        lines.append(
+            f"{result['command']:<12}{result['startup_s'] * 1000:>14.1f}"
+            f"{result.get('modules', 0):>10}  {heaviest}"
+        )
+    trivial = next(
+        (result for result in results.values() if result["command"] == "run"), None
+    )
+    if trivial:
+        if trivial["deferred_imported"]:
+            lines.append(
+                "Trivial run imported " + ", ".join(trivial["deferred_imported"])
+            )
+        if trivial["startup_s"] > TARGET_S:
+            lines.append(f"Trivial run above the {TARGET_S * 1000:.0f} ms target")
+    return lines
+
+
+def parse_argument():
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.importtime",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed runs per command."
+    )
+    parser.add_argument(
+        "--top", type=int, default=5, help="Heaviest top level imports listed."
+    )
+    parser.add_argument(
+        "--output", default=None, help="Location to save the results as JSON."
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_argument()
+    results = run(args.repeat, args.top)
+    for line in format_results(results):
+        print(line)
+    if args.output:
+        with open(args.output, "w") as out_file:
+            json.dump(results, out_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
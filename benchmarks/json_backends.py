@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Djist benchmarks: JSON backend load times
+
+Times every installed JSON backend decoding synthetic datasets, and any
+dataset files given, from file contents already in memory. Backends that
+read bytes are also timed on text (UTF-8 decoding included, as when a file
+is read as text) to show what skipping text decoding saves.
+
+Usage:
+    python -m benchmarks.json_backends --rows 1000 100000
+    python -m benchmarks.json_backends --dataset data/products.json
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import argparse
+import json
+import os
+import time
+from djist.assembler.generics import jsonbackend
+
+
+def synthetic_dataset(rows: int) -> dict:
+    """Catalogue shaped dataset of rows products"""
+    return {
+        "title": "Products",
+        "djist_base_location": "",
+        "products": [
+            {
+                "id": index,
+                "name": f"Product {index}",
+                "price": round(index * 1.25, 2),
+                "description": "Plain text <b>with</b> markup & \"quotes\" " * 3,
+                "tags": ["new", "sale", f"group-{index % 10}"],
+                "stock": {"warehouse": index % 7, "store": index % 3, "active": True},
+            }
+            for index in range(rows)
+        ],
+    }
+
+
+def best_time(call, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure(name: str, data: bytes, repeat: int) -> list:
+    """Results of every backend for one dataset"""
+    results = []
+    for backend_name in jsonbackend.available():
+        backend = jsonbackend.get(backend_name)
+        calls = [("text", lambda: backend.loads(data.decode("utf-8")))]
+        if backend.reads_bytes:
+            calls.insert(0, ("bytes", lambda: backend.loads(data)))
+        for kind, call in calls:
+            seconds = best_time(call, repeat)
+            results.append(
+                {
+                    "dataset": name,
+                    "bytes": len(data),
+                    "backend": backend_name,
+                    "input": kind,
+                    "load_s": seconds,
+                    "mib_per_s": len(data) / 1048576 / seconds if seconds else 0.0,
+                }
+            )
+    return results
+
+
+def run(rows: list, datasets: list, repeat: int) -> list:
+    results = []
+    for count in rows:
+        data = json.dumps(synthetic_dataset(count)).encode("utf-8")
+        results.extend(measure(f"synthetic-{count}", data, repeat))
+    for filename in datasets:
+        with open(filename, "rb") as dataset_file:
+            data = dataset_file.read()
+        results.extend(measure(os.path.basename(filename), data, repeat))
+    return results
+
+
+def format_results(results: list) -> list:
+    lines = [f"{'dataset':<24}{'size (KiB)':>12}  {'backend':<10}{'input':<7}{'load (s)':>11}{'MiB/s':>9}"]
+    for result in results:
+        lines.append(
+            f"{result['dataset']:<24}{result['bytes'] / 1024:>12.1f}  "
+            f"{result['backend']:<10}{result['input']:<7}"
+            f"{result['load_s']:>11.4f}{result['mib_per_s']:>9.1f}"
+        )
+    return lines
+
+
+def parse_argument():
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.json_backends",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="*",
+        default=[1000, 20000, 100000],
+        help="Product counts of the synthetic datasets.",
+    )
+    parser.add_argument(
+        "--dataset", action="append", default=[], help="Dataset file to time."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed loads per measurement."
+    )
+    parser.add_argument(
+        "--output", default=None, help="Location to save the results as JSON."
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_argument()
+    results = run(args.rows, args.dataset, args.repeat)
+    for line in format_results(results):
+        print(line)
+    if args.output:
+        with open(args.output, "w") as out_file:
+            json.dump(results, out_file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
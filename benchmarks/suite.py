@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Djist benchmarks: End-to-end render, prep and memory measurements
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import copy
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import djist
+from djist.assembler.job import job as mjob
+from djist.assembler.template import context as mcontext
+from djist.assembler.template import prepper as mprepper
+from . import importtime as mimporttime
+from . import workloads as mworkloads
+
+
+# Metrics compared against a baseline, lower is better
+COMPARED_METRICS = ("prep_s", "render_s", "peak_bytes", "startup_s")
+
+# Command line startup results are named by command, e.g. startup-run
+STARTUP_PREFIX = "startup-"
+
+
+def best_time(function, repeat: int) -> float:
+    """Fastest wall clock time (seconds) of several calls"""
+    timings = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_memory(function) -> int:
+    """Peak traced memory (bytes) allocated while calling function"""
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def write_files(workload: mworkloads.Workload, directory: str):
+    for filename, content in workload.files.items():
+        full_path = os.path.join(directory, filename)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as out_file:
+            if isinstance(content, str):
+                out_file.write(content)
+            else:
+                json.dump(content, out_file)
+
+
+def render(workload: mworkloads.Workload) -> str:
+    page_context = mcontext.Context(0)
+    page_context.set_template(workload.template)
+    page_context.set_dataset(copy.deepcopy(workload.dataset))
+    return page_context.process()
+
+
+def run_template(workload: mworkloads.Workload, repeat: int) -> dict:
+    prep_s = best_time(lambda: mprepper.Prepper().run(workload.template), repeat)
+    timings = []
+    output = ""
+    for _ in range(max(repeat, 1)):
+        page_context = mcontext.Context(0)
+        page_context.set_template(workload.template)
+        page_context.set_dataset(copy.deepcopy(workload.dataset))
+        start = time.perf_counter()
+        output = page_context.process()
+        timings.append(time.perf_counter() - start)
+    render_s = min(timings)
+    return {
+        "prep_s": prep_s,
+        "render_s": render_s,
+        "units": workload.units,
+        "units_per_s": workload.units / render_s if render_s else 0.0,
+        "output_bytes": len(output),
+        "peak_bytes": peak_memory(lambda: render(workload)),
+    }
+
+
+def run_job(workload: mworkloads.Workload, repeat: int) -> dict:
+    def job_run():
+        mjob.Job(copy.deepcopy(workload.job_config)).run()
+
+    render_s = best_time(job_run, repeat)
+    return {
+        "prep_s": 0.0,
+        "render_s": render_s,
+        "units": workload.units,
+        "units_per_s": workload.units / render_s if render_s else 0.0,
+        "output_bytes": 0,
+        "peak_bytes": peak_memory(job_run),
+    }
+
+
+def run(scale: str = "small", repeat: int = 3, only: list = None) -> dict:
+    """Run every workload of a scale in a scratch directory
+
+    Templates write prep reports and output files relative to the working
+    directory, so each workload runs inside its own temporary directory.
+    Command line startup (benchmarks.importtime) is timed after them.
+    """
+    results = {}
+    start_directory = os.getcwd()
+    logging.disable(logging.CRITICAL)
+    try:
+        for workload in mworkloads.build(scale):
+            if only and not any(name in workload.name for name in only):
+                continue
+            with tempfile.TemporaryDirectory(prefix="djist-bench-") as directory:
+                write_files(workload, directory)
+                os.chdir(directory)
+                try:
+                    if workload.kind == "job":
+                        results[workload.name] = run_job(workload, repeat)
+                    else:
+                        results[workload.name] = run_template(workload, repeat)
+                finally:
+                    os.chdir(start_directory)
+    finally:
+        logging.disable(logging.NOTSET)
+    if not only or any(name in STARTUP_PREFIX for name in only):
+        for command, result in mimporttime.run(repeat).items():
+            results[STARTUP_PREFIX + command] = result
+    return {
+        "meta": {
+            "djist_version": djist.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "repeat": repeat,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """Regressions beyond the threshold (fraction) compared with a baseline
+
+    Returns:
+        list: (workload, metric, baseline value, current value, ratio)
+    """
+    regressions = []
+    baseline_results = baseline.get("results", {})
+    for name, metrics in current.get("results", {}).items():
+        if name not in baseline_results:
+            continue
+        for metric in COMPARED_METRICS:
+            old_value = baseline_results[name].get(metric)
+            new_value = metrics.get(metric)
+            if not old_value or new_value is None:
+                continue
+            ratio = new_value / old_value
+            if ratio > 1 + threshold:
+                regressions.append((name, metric, old_value, new_value, ratio))
+    return regressions
+
+
+def format_results(current: dict) -> list:
+    """Human readable result table"""
+    lines = [
+        f"{'workload':<24}{'prep (ms)':>12}{'render (ms)':>14}"
+        f"{'units/s':>14}{'peak (KiB)':>14}"
+    ]
+    startup = {}
+    for name, metrics in current["results"].items():
+        if name.startswith(STARTUP_PREFIX):
+            startup[name] = metrics
+            continue
+        lines.append(
+            f"{name:<24}{metrics['prep_s'] * 1000:>12.2f}"
+            f"{metrics['render_s'] * 1000:>14.2f}"
+            f"{metrics['units_per_s']:>14.1f}"
+            f"{metrics['peak_bytes'] / 1024:>14.1f}"
+        )
+    if startup:
+        lines.append("")
+        lines.extend(mimporttime.format_results(startup))
+    return lines
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Djist benchmarks: Synthetic workloads
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+# Workload size per scale
+SCALES = {
+    "small": {
+        "depth": 3,
+        "loop": 10,
+        "chain": 5,
+        "includes": 5,
+        "pages": 5,
+    },
+    "medium": {
+        "depth": 6,
+        "loop": 1000,
+        "chain": 20,
+        "includes": 50,
+        "pages": 50,
+    },
+    "large": {
+        "depth": 10,
+        "loop": 100000,
+        "chain": 50,
+        "includes": 200,
+        "pages": 500,
+    },
+}
+
+# String to string filters that can be chained in any order
+CHAIN_FILTERS = [
+    "lower",
+    "capfirst",
+    'cut:"x"',
+    "capitalize",
+    'center:"40"',
+    "addslashes",
+    'ljust:"48"',
+    "escape",
+    'rjust:"56"',
+    "linebreaksbr",
+]
+
+
+class Workload:
+    """Synthetic template, dataset and supporting files for one benchmark"""
+
+    def __init__(self, name: str, kind: str = "template", units: int = 1):
+        self.name = name
+        self.kind = kind
+        self.units = units
+        self.template = ""
+        self.dataset = {}
+        # filename: content, written to the working directory before the run
+        self.files = {}
+        self.job_config = {}
+
+    def __repr__(self):
+        return f"{self.__class__} {self.name}"
+
+
+def record(index: int) -> dict:
+    """Flat record used by the loop and job workloads"""
+    return {
+        "id": index,
+        "name": f"item number {index}",
+        "category": f"category-{index % 7}",
+        "price": round(index * 1.25, 2),
+        "published": "2021-01-07 09:50:07",
+    }
+
+
+def loop_workload(size: int) -> Workload:
+    """Single for loop over a list of flat records"""
+    workload = Workload(f"for_loop_{size}", units=size)
+    workload.template = (
+        "<ul>\n{% for item in items %}"
+        "<li>{{ item.name|capfirst }} ({{ item.category }}) "
+        '{{ item.price|floatformat:"2" }}</li>\n'
+        "{% endfor %}</ul>\n"
+    )
+    workload.dataset = {"items": [record(index) for index in range(size)]}
+    return workload
+
+
+def nesting_workload(depth: int) -> Workload:
+    """Nested for loops over a binary tree of the given depth"""
+
+    def tree(level: int) -> list:
+        if level == depth:
+            return []
+        return [
+            {"label": f"node-{level}-{branch}", "children": tree(level + 1)}
+            for branch in range(2)
+        ]
+
+    workload = Workload(f"nesting_{depth}", units=2 ** (depth + 1) - 2)
+    inner = ""
+    for level in reversed(range(depth)):
+        source = "tree" if level == 0 else f"n{level - 1}.children"
+        inner = (
+            f"{{% for n{level} in {source} %}}"
+            f"<div>{{{{ n{level}.label }}}}{inner}</div>"
+            "{% endfor %}"
+        )
+    workload.template = inner + "\n"
+    workload.dataset = {"tree": tree(0)}
+    return workload
+
+
+def filter_chain_workload(length: int) -> Workload:
+    """Long filter chains applied to the same value"""
+    chain = "|".join(
+        CHAIN_FILTERS[index % len(CHAIN_FILTERS)] for index in range(length)
+    )
+    workload = Workload(f"filter_chain_{length}", units=length * 10)
+    workload.template = "".join(
+        f"<p>{{{{ text|{chain} }}}}</p>\n" for _ in range(10)
+    )
+    workload.dataset = {"text": "The Quick Brown Fox\nJumps over the 'lazy' dog"}
+    return workload
+
+
+def include_workload(count: int) -> Workload:
+    """Many usetemplate includes of small partials"""
+    workload = Workload(f"includes_{count}", units=count)
+    lines = []
+    for index in range(count):
+        filename = f"partials/part_{index}.template"
+        workload.files[filename] = (
+            f'<section id="part-{index}">{{{{ title|upper }}}} '
+            f"{{{{ subtitle|lower }}}}</section>\n"
+        )
+        lines.append(f'{{% usetemplate "{filename}" %}}\n')
+    workload.template = "".join(lines)
+    workload.dataset = {"title": "Section title", "subtitle": "Sub Title"}
+    return workload
+
+
+def job_workload(pages: int) -> Workload:
+    """Job with many pages sharing one template and one dataset each"""
+    workload = Workload(f"job_{pages}_pages", kind="job", units=pages)
+    workload.files["job/page.template"] = (
+        "<h1>{{ title }}</h1>\n{% for item in items %}"
+        "<p>{{ item.name }}</p>\n{% endfor %}"
+    )
+    page_list = []
+    for index in range(pages):
+        dataset_name = f"job/page_{index}.json"
+        workload.files[dataset_name] = {
+            "title": f"Page {index}",
+            "items": [record(item) for item in range(10)],
+        }
+        page_list.append(
+            {
+                "djist_page_name": f"page {index}",
+                "djist_output_filename": f"page_{index}.html",
+                "djist_page_template": "job/page.template",
+                "djist_page_dataset": dataset_name,
+            }
+        )
+    workload.job_config = {
+        "djist_job_name": "Benchmark",
+        "djist_output_job": "output",
+        "djist_sites": [
+            {
+                "djist_site_name": "bench",
+                "djist_output_site": "bench_site",
+                "djist_pages": page_list,
+            }
+        ],
+    }
+    return workload
+
+
+def build(scale: str = "small") -> list:
+    """All workloads for the given scale"""
+    sizes = SCALES[scale]
+    workloads = [
+        loop_workload(10),
+        loop_workload(sizes["loop"]),
+        nesting_workload(sizes["depth"]),
+        filter_chain_workload(sizes["chain"]),
+        include_workload(sizes["includes"]),
+        job_workload(sizes["pages"]),
+    ]
+    return list({workload.name: workload for workload in workloads}.values())
@@ -1,5 +1,12 @@
-from . import assembler
+import importlib
 
 __author__ = "liorelse"
 __version__ = "0.2.1"
 __license__ = "GPLv3"
+
+
+def __getattr__(name: str):
+    # The assembler is imported on first use, so reading the version is free
+    if name == "assembler":
+        return importlib.import_module(f"{__name__}.assembler")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -27,9 +27,8 @@ def parse_argument():
     )
     parser.add_argument(
         "--log-file",
-        type=argparse.FileType("w"),
         default="djist.log",
-        help=msg.HELP_LOG_LEVEL,
+        help=msg.HELP_LOG_FILE,
     )
     parser.add_argument(
         "--log-level",
@@ -43,6 +42,86 @@ def parse_argument():
         choices=["quiet", "critical", "error", "warning", "info", "debug"],
         help=msg.HELP_CONSOLE_LEVEL,
     )
+    parser.add_argument(
+        "--json-backend",
+        default="auto",
+        choices=["auto"] + list(assembler.generics.jsonbackend.factories),
+        help=msg.HELP_JSON_BACKEND,
+    )
+    parser.add_argument(
+        "--lazy-json-threshold",
+        type=float,
+        default=64,
+        help=msg.HELP_LAZY_JSON_THRESHOLD,
+    )
+    parser.add_argument(
+        "--lazy-json-depth",
+        type=int,
+        choices=[1, 2],
+        default=1,
+        help=msg.HELP_LAZY_JSON_DEPTH,
+    )
+    parser.add_argument(
+        "--lazy-json-index-file",
+        action="store_true",
+        help=msg.HELP_LAZY_JSON_INDEX_FILE,
+    )
+    parser.add_argument(
+        "--autoescape",
+        action="store_true",
+        help=msg.HELP_AUTOESCAPE,
+    )
+    parser.add_argument(
+        "--filter-memo-size",
+        type=int,
+        default=4096,
+        metavar="ENTRIES",
+        help=msg.HELP_FILTER_MEMO_SIZE,
+    )
+    parser.add_argument(
+        "--fragment-cache-size",
+        type=float,
+        default=16,
+        metavar="MIB",
+        help=msg.HELP_FRAGMENT_CACHE_SIZE,
+    )
+    parser.add_argument(
+        "--fragment-cache-dir",
+        default=None,
+        metavar="DIR",
+        help=msg.HELP_FRAGMENT_CACHE_DIR,
+    )
+    parser.add_argument(
+        "--fragment-cache-dir-size",
+        type=float,
+        default=256,
+        metavar="MIB",
+        help=msg.HELP_FRAGMENT_CACHE_DIR_SIZE,
+    )
+    parser.add_argument(
+        "--partial-memo-size",
+        type=float,
+        default=16,
+        metavar="MIB",
+        help=msg.HELP_PARTIAL_MEMO_SIZE,
+    )
+    parser.add_argument(
+        "--columnar-threshold",
+        type=int,
+        default=0,
+        metavar="ROWS",
+        help=msg.HELP_COLUMNAR_THRESHOLD,
+    )
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help=msg.HELP_MEMORY_REPORT,
+    )
+    parser.add_argument(
+        "--memory-report-file",
+        default=None,
+        help=msg.HELP_MEMORY_REPORT_FILE,
+    )
     subparsers = parser.add_subparsers(dest="djist_mode")
 
     # Scan
@@ -64,6 +143,17 @@ def parse_argument():
         default=None,
         help=msg.HELP_SCAN_OUTPUT,
     )
+    parser_scan.add_argument(
+        "--cost",
+        action="store_true",
+        help=msg.HELP_SCAN_COST,
+    )
+    parser_scan.add_argument(
+        "--cost-top",
+        type=int,
+        default=10,
+        help=msg.HELP_SCAN_COST_TOP,
+    )
 
     # Run
     parser_run = subparsers.add_parser("run", help=msg.HELP_RUN)
@@ -93,6 +183,47 @@ def parse_argument():
         help=msg.HELP_JOB_CONFIG,
     )
 
+    # Dataset
+    parser_dataset = subparsers.add_parser("dataset", help=msg.HELP_DATASET)
+    dataset_subparsers = parser_dataset.add_subparsers(
+        dest="dataset_action", required=True
+    )
+    parser_import = dataset_subparsers.add_parser(
+        "import", help=msg.HELP_DATASET_IMPORT
+    )
+    parser_import.add_argument(
+        "source",
+        help=msg.HELP_DATASET_IMPORT_SOURCE,
+    )
+    parser_import.add_argument(
+        "target",
+        help=msg.HELP_DATASET_IMPORT_TARGET,
+    )
+    parser_import.add_argument(
+        "--table",
+        default="",
+        help=msg.HELP_DATASET_IMPORT_TABLE,
+    )
+    parser_import.add_argument(
+        "--index",
+        action="append",
+        default=None,
+        help=msg.HELP_DATASET_IMPORT_INDEX,
+    )
+
+    parser_compile = dataset_subparsers.add_parser(
+        "compile", help=msg.HELP_DATASET_COMPILE
+    )
+    parser_compile.add_argument(
+        "source",
+        help=msg.HELP_DATASET_COMPILE_SOURCE,
+    )
+    parser_compile.add_argument(
+        "--output",
+        default="",
+        help=msg.HELP_DATASET_COMPILE_OUTPUT,
+    )
+
     # parse
     return parser.parse_args()
 
@@ -105,11 +236,9 @@ def configure():
 
     # Log
     conf.LOG_FILE_LEVEL = args.log_level
-    conf.LOG_FILE_LOCATION = args.log_file.name
-    conf.IO_LOG = args.log_file
+    conf.LOG_FILE_LOCATION = args.log_file
     if conf.LOG_FILE_LEVEL == "quiet":
         conf.LOG_FILE = False
-        conf.IO_LOG.close()
     else:
         conf.LOG_FILE = True
     conf.LOG_CONSOLE_LEVEL = args.console
@@ -118,10 +247,32 @@ def configure():
     else:
         conf.LOG_CONSOLE = True
 
+    # JSON
+    conf.JSON_BACKEND = args.json_backend
+
+    # Memory-mapped JSON datasets
+    conf.LAZY_JSON_MIN_BYTES = int(args.lazy_json_threshold * 1024 * 1024)
+    conf.LAZY_JSON_DEPTH = args.lazy_json_depth
+    conf.LAZY_JSON_INDEX_FILE = args.lazy_json_index_file
+    conf.COLUMNAR_MIN_ROWS = args.columnar_threshold
+    conf.FILTER_MEMO_SIZE = args.filter_memo_size
+    conf.FRAGMENT_CACHE_SIZE = args.fragment_cache_size
+    conf.FRAGMENT_CACHE_DIR = args.fragment_cache_dir or ""
+    conf.FRAGMENT_CACHE_DIR_SIZE = args.fragment_cache_dir_size
+    conf.PARTIAL_MEMO_SIZE = args.partial_memo_size
+    conf.AUTOESCAPE = args.autoescape
+
+    # Memory report
+    if args.memory_report or args.memory_report_file:
+        conf.MEMORY_REPORT = True
+        conf.MEMORY_REPORT_FILE = args.memory_report_file or ""
+
     # Scan
     if args.djist_mode == "scan":
         conf.MODE_SCAN = True
         conf.IO_TEMPLATE = args.template
+        conf.SCAN_COST = args.cost
+        conf.SCAN_COST_TOP = args.cost_top
         if args.dataset:
             conf.IO_DATASET = args.dataset
         else:
@@ -148,6 +299,18 @@ def configure():
         conf.MODE_JOB = True
         conf.IO_CONFIG = args.config
 
+    # Dataset
+    elif args.djist_mode == "dataset":
+        conf.MODE_DATASET = True
+        conf.DATASET_ACTION = args.dataset_action
+        conf.DATASET_SOURCE = args.source
+        if args.dataset_action == "import":
+            conf.DATASET_TARGET = args.target
+            conf.DATASET_TABLE = args.table
+            conf.DATASET_INDEX = args.index
+        elif args.dataset_action == "compile":
+            conf.DATASET_TARGET = args.output
+
 
 def main():
     """Djist"""
@@ -155,6 +318,7 @@ def main():
     configure()
     assembler.job.log.start_logging()
     assembler.job.assemble.run()
+    assembler.dataset.source.close()
     logging.debug("Run time: %s", datetime.now() - run_time)
     assembler.generics.core.close()
 
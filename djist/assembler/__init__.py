@@ -1,3 +1,16 @@
-from . import generics
-from . import job
-from . import template
+import importlib
+
+
+# Submodules, imported on first use
+__all__ = [
+    "dataset",
+    "generics",
+    "job",
+    "template",
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
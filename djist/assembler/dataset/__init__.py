@@ -0,0 +1,20 @@
+import importlib
+
+
+# Submodules, imported on first use
+__all__ = [
+    "columnar",
+    "compiled",
+    "jsonl",
+    "lazy",
+    "mapped",
+    "projection",
+    "source",
+    "sqlite",
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
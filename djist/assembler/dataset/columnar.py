@@ -0,0 +1,270 @@
+#!/usr/bin/python3
+"""Djist: Columnar lists
+
+A long list of flat records sharing the same keys is stored as one column
+per key instead of one dict per record: numbers and booleans as NumPy
+arrays when NumPy is installed (array module arrays otherwise), other
+values as lists. where, whereall, dictsort, length and the aggregation
+filters work on the columns in bulk, and a for loop gets a row view per
+record, which reads the columns only when the loop body asks for a key.
+NumPy is only imported when the first column is built.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import logging
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from ..generics import msg
+from ..job import config as conf
+from ..template import lookup
+from . import lazy
+
+
+# Column kinds, by the single type of their values
+KIND_INT = "int"
+KIND_FLOAT = "float"
+KIND_BOOL = "bool"
+KIND_STR = "str"
+KIND_OBJECT = "object"
+
+KIND_TYPES = {int: KIND_INT, float: KIND_FLOAT, bool: KIND_BOOL, str: KIND_STR}
+VALUE_TYPES = {KIND_INT: int, KIND_FLOAT: float, KIND_BOOL: bool, KIND_STR: str}
+NUMERIC_KINDS = (KIND_INT, KIND_FLOAT, KIND_BOOL)
+
+
+@lru_cache(maxsize=1)
+def numpy_module():
+    """NumPy, imported when the first column is built, or None if it isn't
+    installed"""
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return numpy
+
+
+@lru_cache(maxsize=1)
+def numpy_types() -> dict:
+    """NumPy dtypes of the numeric kinds"""
+    numpy = numpy_module()
+    if numpy is None:
+        return {}
+    return {KIND_INT: numpy.int64, KIND_FLOAT: numpy.float64, KIND_BOOL: numpy.bool_}
+
+
+def column_kind(values: list) -> str:
+    """Kind of a column, object unless every value has the same scalar type"""
+    kinds = {type(value) for value in values}
+    if len(kinds) != 1:
+        return KIND_OBJECT
+    return KIND_TYPES.get(kinds.pop(), KIND_OBJECT)
+
+
+def build_column(values: list, kind: str):
+    """Column storage for values of kind"""
+    numpy = numpy_module() if kind in NUMERIC_KINDS else None
+    try:
+        if numpy is not None:
+            return numpy.array(values, dtype=numpy_types()[kind])
+        if kind == KIND_INT:
+            return array("q", values)
+        if kind == KIND_FLOAT:
+            return array("d", values)
+    except OverflowError:
+        pass
+    return values
+
+
+def is_numpy(column) -> bool:
+    numpy = numpy_module()
+    return numpy is not None and isinstance(column, numpy.ndarray)
+
+
+class Column:
+    """Values of one key, with its kind and an index by value"""
+
+    def __init__(self, values: list):
+        self.kind = column_kind(values)
+        self.values = build_column(values, self.kind)
+        if self.kind == KIND_INT and isinstance(self.values, list):
+            # Integers too big for a 64 bit column are kept as objects
+            self.kind = KIND_OBJECT
+        # Python value at a position, NumPy scalars are converted
+        self.get = self.values.item if is_numpy(self.values) else self.values.__getitem__
+        self.index = None
+
+    def positions(self, value) -> list:
+        """Positions holding value, in order, from an index built on first
+        use"""
+        if self.index is None:
+            self.index = {}
+            for position, item in enumerate(self.values):
+                self.index.setdefault(item, []).append(position)
+        return self.index.get(value, [])
+
+
+class RowView(Mapping):
+    """Record of a columnar list, read from the columns key by key"""
+
+    __slots__ = ("columns", "position")
+
+    def __init__(self, columns: dict, position: int):
+        self.columns = columns
+        self.position = position
+
+    def __getitem__(self, key):
+        return self.columns[key].get(self.position)
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __str__(self):
+        return str(dict(self))
+
+    def copy(self) -> dict:
+        return dict(self)
+
+
+class ColumnarList(lazy.LazySequence):
+    """List of records stored by column
+
+    A filtered or sorted list shares the columns of its source and keeps
+    the positions of its records.
+    """
+
+    def __init__(self, columns: dict, length: int, positions=None):
+        self.columns = columns
+        self.length = length
+        self.positions = positions
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} rows, {list(self.columns)})"
+
+    def derive(self, positions) -> "ColumnarList":
+        return ColumnarList(self.columns, self.length, positions)
+
+    def row_positions(self):
+        if self.positions is None:
+            return range(self.length)
+        return self.positions
+
+    def __iter__(self):
+        columns = self.columns
+        for position in self.row_positions():
+            yield RowView(columns, int(position))
+
+    def __len__(self):
+        return self.length if self.positions is None else len(self.positions)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def item(self, index: int) -> RowView:
+        # No negative indexes, as in dot keys of plain lists
+        positions = self.row_positions()
+        if not 0 <= index < len(positions):
+            raise IndexError(index)
+        return RowView(self.columns, int(positions[index]))
+
+    def values(self, key: str) -> list:
+        """Values of a column, in list order, NumPy arrays as is"""
+        column = self.columns[key]
+        if self.positions is None:
+            return column.values
+        if is_numpy(column.values):
+            return column.values[self.positions]
+        return [column.values[position] for position in self.positions]
+
+    def reduce(self, key: str, operation: str):
+        """sum, min or max of a numeric column, lookup.MISSING if the column
+        isn't numeric or the list is empty"""
+        column = self.columns.get(key)
+        if column is None or column.kind not in (KIND_INT, KIND_FLOAT) or not len(self):
+            return lookup.MISSING
+        values = self.values(key)
+        if is_numpy(values):
+            return getattr(values, operation)().item()
+        return {"sum": sum, "min": min, "max": max}[operation](values)
+
+    def where(self, key: str, value) -> "ColumnarList":
+        column = self.columns.get(key)
+        if column is None or column.kind == KIND_OBJECT:
+            return None
+        converted = lookup.convert(VALUE_TYPES[column.kind], value)
+        if converted is lookup.MISSING:
+            return self.derive([])
+        if is_numpy(column.values):
+            numpy = numpy_module()
+            if self.positions is None:
+                return self.derive(numpy.flatnonzero(column.values == converted))
+            positions = numpy.asarray(self.positions, dtype=numpy.int64)
+            return self.derive(positions[column.values[positions] == converted])
+        found = column.positions(converted)
+        if self.positions is None:
+            return self.derive(found)
+        found = set(found)
+        return self.derive([position for position in self.positions if position in found])
+
+    def sort(self, key: str, reverse: bool = False) -> "ColumnarList":
+        column = self.columns.get(key)
+        if column is None or column.kind == KIND_OBJECT:
+            return None
+        positions = self.row_positions()
+        if is_numpy(column.values):
+            numpy = numpy_module()
+            positions = numpy.asarray(positions, dtype=numpy.int64)
+            values = column.values[positions]
+            if reverse:
+                if column.kind != KIND_FLOAT:
+                    values = values.astype(numpy.int64)
+                values = -values
+            return self.derive(positions[numpy.argsort(values, kind="stable")])
+        get = column.values.__getitem__
+        return self.derive(sorted(positions, key=get, reverse=reverse))
+
+
+def convert(records: list) -> ColumnarList or None:
+    """Columnar list of records, or None unless they are all dicts with
+    the same keys"""
+    if not records or not isinstance(records[0], dict):
+        return None
+    keys = list(records[0])
+    key_set = set(keys)
+    for record in records:
+        if not isinstance(record, dict) or record.keys() != key_set:
+            return None
+    columns = {key: Column([record[key] for record in records]) for key in keys}
+    return ColumnarList(columns, len(records))
+
+
+def columnarize(dataset: dict) -> dict:
+    """Dataset with its long top-level lists of records stored by column,
+    when enabled by the row threshold"""
+    if conf.COLUMNAR_MIN_ROWS <= 0 or not isinstance(dataset, dict):
+        return dataset
+    for key, value in dataset.items():
+        if isinstance(value, list) and len(value) >= conf.COLUMNAR_MIN_ROWS:
+            columnar = convert(value)
+            if columnar is not None:
+                dataset[key] = columnar
+                logging.info(
+                    msg.COLUMNAR_CONVERTED,
+                    key,
+                    len(columnar),
+                    len(columnar.columns),
+                    "NumPy" if numpy_module() is not None else "array",
+                )
+    return dataset
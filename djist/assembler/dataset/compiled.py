@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""Djist: Compiled datasets
+
+A JSON dataset compiled with 'djist dataset compile' is saved next to its
+source as marshal data (.djc), which loads several times faster than JSON.
+Repeated keys are stored once and shared when loaded. The marshal format
+depends on the Python version, so the header records it, and a compiled
+file from another version is ignored in favour of its JSON source.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import gc
+import logging
+import marshal
+import os
+import sys
+from ..generics import file, msg
+
+
+SUFFIX = ".djc"
+MAGIC = b"DJIST-DATASET\x00"
+FORMAT_VERSION = 1
+
+
+def header() -> bytes:
+    return MAGIC + bytes(
+        (FORMAT_VERSION, sys.version_info[0], sys.version_info[1], marshal.version)
+    )
+
+
+def compiled_filename(source: str) -> str:
+    """Compiled file for a JSON source, e.g. 'data/products.djc' for
+    'data/products.json'"""
+    return os.path.splitext(source)[0] + SUFFIX
+
+
+def current(source: str) -> str:
+    """Compiled file to read for source (source itself if it is compiled),
+    or '' if there is none or it is older than source"""
+    if source.lower().endswith(SUFFIX):
+        return source
+    compiled = compiled_filename(source)
+    if not os.path.isfile(compiled):
+        return ""
+    if os.path.isfile(source) and os.path.getmtime(source) > os.path.getmtime(compiled):
+        return ""
+    return compiled
+
+
+def dump(data, filename: str):
+    with open(filename, "wb") as compiled_file:
+        compiled_file.write(header() + marshal.dumps(data))
+
+
+def load(filename: str):
+    """Content of a compiled file, or None if it can't be read by this
+    Python version"""
+    expected = header()
+    try:
+        with open(filename, "rb") as compiled_file:
+            data = compiled_file.read()
+        if not data.startswith(expected):
+            logging.warning(msg.DATASET_COMPILED_VERSION, filename)
+            return None
+        # Loading only allocates, collections would scan the growing
+        # dataset over and over without finding garbage
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return marshal.loads(memoryview(data)[len(expected):])
+        finally:
+            if collecting:
+                gc.enable()
+    except (OSError, EOFError, ValueError, TypeError) as err:
+        logging.error(msg.DATASET_COMPILED_ERROR, filename, err)
+        return None
+
+
+def compile_json(source: str, target: str = "") -> str:
+    """Compile a JSON dataset, next to its source unless target is given
+
+    Returns:
+        (str) - compiled filename, or '' if source couldn't be read
+    """
+    if not os.path.isfile(source):
+        logging.error(msg.DATASET_NOT_FOUND, source)
+        return ""
+    data = file.json_to_dict(source)
+    target = target or compiled_filename(source)
+    dump(data, target)
+    logging.info(msg.DATASET_COMPILED, source, target)
+    return target
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Djist: JSON Lines datasets
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import logging
+import os
+from ..generics import jsonbackend, msg
+from . import lazy
+
+
+# Numbers of rows by (filename, size, mtime)
+lengths = {}
+
+
+class JsonLines(lazy.LazySequence):
+    """Items of a JSON Lines file (one JSON value per line), read line by
+    line every time the sequence is iterated"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.filename!r})"
+
+    def identity(self) -> tuple:
+        return (self.filename,)
+
+    def __iter__(self):
+        if not os.path.isfile(self.filename):
+            return
+        backend = jsonbackend.backend()
+        with open(self.filename, "rb" if backend.reads_bytes else "r") as jsonl_file:
+            for number, line in enumerate(jsonl_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield backend.loads(line)
+                except ValueError as err:
+                    logging.error(
+                        msg.JSON_DECODE_ERROR, f"{self.filename}:{number} - {err}"
+                    )
+
+    def __len__(self):
+        """Number of rows, lines that fail to decode left out as when
+        iterating, counted once per file for the job"""
+        if not os.path.isfile(self.filename):
+            return 0
+        status = os.stat(self.filename)
+        key = (os.path.abspath(self.filename), status.st_size, status.st_mtime_ns)
+        if key not in lengths:
+            backend = jsonbackend.backend()
+            count = 0
+            mode = "rb" if backend.reads_bytes else "r"
+            with open(self.filename, mode) as jsonl_file:
+                for line in jsonl_file:
+                    if not line.strip():
+                        continue
+                    try:
+                        backend.loads(line)
+                    except ValueError:
+                        continue
+                    count += 1
+            lengths[key] = count
+        return lengths[key]
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""Djist: Lazy dataset values
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import logging
+from itertools import islice
+from ..generics import msg
+
+
+class LazySequence:
+    """List of dataset items produced on demand
+
+    A for loop consumes the items one by one without building the list.
+    length counts the items, first, last, where and whereall stream them,
+    and filters that need the whole list (dictsort, dictsortreversed)
+    materialize it first. Subclasses implement __iter__, and may provide
+    a faster __len__ and push filters down to their source with where and
+    sort.
+    """
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __bool__(self):
+        for _ in self:
+            return True
+        return False
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    def item(self, index: int):
+        """Item at index, negative indexes count from the end"""
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError(index)
+        for found in islice(self, index, index + 1):
+            return found
+        raise IndexError(index)
+
+    def where(self, key: str, value) -> "LazySequence":
+        """Items whose key matches value, or None if the filter can't be
+        pushed down and the caller has to scan the items"""
+        return None
+
+    def sort(self, key: str, reverse: bool = False) -> "LazySequence":
+        """Items sorted by key, or None if the sort can't be pushed down"""
+        return None
+
+    def identity(self) -> tuple or None:
+        """Description of the items that stays the same for the whole job
+        (the source they are read from), or None if there is none"""
+        return None
+
+    def materialize(self, reason: str = "") -> list:
+        """All items as a list"""
+        logging.info(msg.DATASET_MATERIALIZED, repr(self), reason)
+        return list(self)
+
+
+class LazyValue:
+    """Dataset value decoded the first time it is used
+
+    The processor resolves it when a key walks into it, dot keys stop at
+    it, and the decoded value is kept for later lookups. Subclasses
+    implement decode.
+    """
+
+    def __init__(self):
+        self.decoded = False
+        self.value = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    def decode(self):
+        return None
+
+    def resolve(self):
+        if not self.decoded:
+            self.value = self.decode()
+            self.decoded = True
+        return self.value
+
+
+def resolve(value):
+    """Decoded value of a LazyValue, other values unchanged"""
+    if isinstance(value, LazyValue):
+        return value.resolve()
+    return value
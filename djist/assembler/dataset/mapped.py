@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+"""Djist: Memory-mapped JSON datasets
+
+A large JSON object is memory-mapped instead of decoded. One scan records
+where the value of every top-level key (and, with depth 2, of every key of
+top-level objects) starts and ends, and each value is decoded from the map
+the first time a key walks into it. Values a page never reads are never
+decoded, and the file is only read where the scan has to pass over it.
+
+The offset index and the map are kept for the job, one per file, and
+closed by close. With LAZY_JSON_INDEX_FILE (--lazy-json-index-file), the
+index is also saved next to the dataset (.djx) so later runs skip the scan
+while the dataset is unchanged.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import json
+import logging
+import mmap
+import os
+import re
+from ..generics import jsonbackend, msg
+from ..job import config as conf
+from . import lazy
+
+
+INDEX_SUFFIX = ".djx"
+INDEX_VERSION = 1
+
+# Offset indexes by (filename, size, mtime, depth)
+indexes = {}
+
+# Memory maps by (filename, size, mtime)
+maps = {}
+
+WHITESPACE = re.compile(rb"[ \t\n\r]*")
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+SCALAR = re.compile(rb"[^,}\] \t\n\r]+")
+# Anything up to the next bracket, strings included
+SKIP = re.compile(rb'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*', re.DOTALL)
+
+
+class ScanError(ValueError):
+    """The file isn't a well-formed JSON object"""
+
+
+def skip_whitespace(buffer, position: int) -> int:
+    return WHITESPACE.match(buffer, position).end()
+
+
+def value_end(buffer, position: int) -> int:
+    """End offset of the JSON value starting at position"""
+    first = buffer[position : position + 1]
+    if first == b'"':
+        match = STRING.match(buffer, position)
+        if not match:
+            raise ScanError(position)
+        return match.end()
+    if first not in (b"{", b"["):
+        match = SCALAR.match(buffer, position)
+        if not match:
+            raise ScanError(position)
+        return match.end()
+    depth = 0
+    size = len(buffer)
+    while position < size:
+        bracket = buffer[position : position + 1]
+        if bracket in (b"{", b"["):
+            depth += 1
+        elif bracket in (b"}", b"]"):
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        position = SKIP.match(buffer, position + 1).end()
+    raise ScanError(position)
+
+
+def scan_object(buffer, position: int, depth: int) -> tuple:
+    """Offsets of the values of the object starting at position
+
+    Returns:
+        (dict, int) - [start, end] by key, with a third item holding the
+        offsets of the object keys when depth is more than 1, and the end
+        offset of the object
+    """
+    if buffer[position : position + 1] != b"{":
+        raise ScanError(position)
+    entries = {}
+    position = skip_whitespace(buffer, position + 1)
+    if buffer[position : position + 1] == b"}":
+        return entries, position + 1
+    while True:
+        match = STRING.match(buffer, position)
+        if not match:
+            raise ScanError(position)
+        key = json.loads(match.group())
+        position = skip_whitespace(buffer, match.end())
+        if buffer[position : position + 1] != b":":
+            raise ScanError(position)
+        start = skip_whitespace(buffer, position + 1)
+        if depth > 1 and buffer[start : start + 1] == b"{":
+            children, end = scan_object(buffer, start, depth - 1)
+            entries[key] = [start, end, children]
+        else:
+            end = value_end(buffer, start)
+            entries[key] = [start, end]
+        position = skip_whitespace(buffer, end)
+        separator = buffer[position : position + 1]
+        if separator == b"}":
+            return entries, position + 1
+        if separator != b",":
+            raise ScanError(position)
+        position = skip_whitespace(buffer, position + 1)
+
+
+def index_filename(filename: str) -> str:
+    return os.path.splitext(filename)[0] + INDEX_SUFFIX
+
+
+def read_index(filename: str, stamp: dict) -> dict or None:
+    try:
+        with open(index_filename(filename), "r") as index_file:
+            saved = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(saved, dict) or saved.get("stamp") != stamp:
+        return None
+    return saved.get("keys")
+
+
+def write_index(filename: str, stamp: dict, keys: dict):
+    try:
+        with open(index_filename(filename), "w") as index_file:
+            json.dump({"stamp": stamp, "keys": keys}, index_file)
+    except OSError as err:
+        logging.debug(msg.LAZY_JSON_INDEX_UNSAVED, index_filename(filename), err)
+
+
+def offset_index(filename: str, buffer, depth: int) -> dict or None:
+    """Key offsets of a JSON object file, or None if it isn't an object"""
+    status = os.stat(filename)
+    stamp = {
+        "version": INDEX_VERSION,
+        "size": status.st_size,
+        "mtime": status.st_mtime_ns,
+        "depth": depth,
+    }
+    cache_key = (os.path.abspath(filename), status.st_size, status.st_mtime_ns, depth)
+    if cache_key in indexes:
+        return indexes[cache_key]
+    keys = None
+    if conf.LAZY_JSON_INDEX_FILE:
+        keys = read_index(filename, stamp)
+    if keys is None:
+        try:
+            keys, end = scan_object(buffer, skip_whitespace(buffer, 0), depth)
+        except (ScanError, IndexError, ValueError):
+            return None
+        if skip_whitespace(buffer, end) != len(buffer):
+            return None
+        logging.info(msg.LAZY_JSON_INDEXED, filename, len(keys))
+        if conf.LAZY_JSON_INDEX_FILE:
+            write_index(filename, stamp, keys)
+    indexes[cache_key] = keys
+    return keys
+
+
+class MappedValue(lazy.LazyValue):
+    """JSON value at a span of a memory-mapped file"""
+
+    def __init__(self, buffer: mmap.mmap, filename: str, start: int, end: int):
+        super().__init__()
+        self.buffer = buffer
+        self.filename = filename
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.filename!r}, {self.start}, {self.end})"
+
+    def decode(self):
+        logging.debug(msg.LAZY_JSON_DECODE, self.filename, self.end - self.start)
+        try:
+            return jsonbackend.loads(self.buffer[self.start : self.end])
+        except ValueError as err:
+            logging.error(msg.JSON_DECODE_ERROR, f"{self.filename} - {err}")
+            return None
+
+
+def dataset(buffer: mmap.mmap, filename: str, keys: dict) -> dict:
+    return {
+        key: dataset(buffer, filename, entry[2])
+        if len(entry) > 2
+        else MappedValue(buffer, filename, entry[0], entry[1])
+        for key, entry in keys.items()
+    }
+
+
+def is_large(filename: str) -> bool:
+    """The file is big enough to map instead of decoding it"""
+    return (
+        conf.LAZY_JSON_MIN_BYTES > 0
+        and os.path.isfile(filename)
+        and os.path.getsize(filename) >= conf.LAZY_JSON_MIN_BYTES
+    )
+
+
+def memory_map(filename: str) -> mmap.mmap or None:
+    """Map of a file, shared by every page reading it"""
+    try:
+        status = os.stat(filename)
+    except OSError:
+        return None
+    map_key = (os.path.abspath(filename), status.st_size, status.st_mtime_ns)
+    if map_key not in maps:
+        try:
+            with open(filename, "rb") as json_file:
+                maps[map_key] = mmap.mmap(
+                    json_file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        except (OSError, ValueError):
+            return None
+    return maps[map_key]
+
+
+def close():
+    for buffer in maps.values():
+        buffer.close()
+    maps.clear()
+
+
+def load(filename: str, depth: int = None) -> dict or None:
+    """Dataset of lazily decoded values, or None if the file can't be
+    mapped (empty, or not a JSON object)"""
+    depth = depth or conf.LAZY_JSON_DEPTH
+    buffer = memory_map(filename)
+    if buffer is None:
+        return None
+    keys = offset_index(filename, buffer, depth)
+    if keys is None:
+        return None
+    return dataset(buffer, filename, keys)
@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+"""Djist: Dataset projection
+
+Reduce a dataset to the subtrees a template reads. Paths come from the
+template dependency scan as (steps, whole) pairs, where whole means the
+complete value at the path is needed, and a partial path only needs the
+containers leading to values used further down.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import logging
+import os
+from io import TextIOWrapper
+from ..generics import file, msg
+from . import lazy
+
+
+# Marks a tree node whose complete value is kept
+WHOLE = object()
+
+
+def build_tree(paths: list) -> dict:
+    """Nested dict of path steps, WHOLE marks values kept completely"""
+    tree = {}
+    for steps, whole in paths:
+        node = tree
+        for step in steps:
+            if WHOLE in node:
+                break
+            node = node.setdefault(step, {})
+        else:
+            if whole:
+                node.clear()
+                node[WHOLE] = True
+    return tree
+
+
+def merge_trees(first: dict, second: dict) -> dict:
+    if WHOLE in first or WHOLE in second:
+        return {WHOLE: True}
+    merged = dict(first)
+    for step, node in second.items():
+        if step in merged:
+            merged[step] = merge_trees(merged[step], node)
+        else:
+            merged[step] = node
+    return merged
+
+
+def item_tree(node: dict) -> dict:
+    """Tree applied to every item of a list
+
+    Index steps select items, and named steps reached through a for loop
+    variable apply to the items, so every step is applied to every item.
+    """
+    tree = {}
+    for step, child in node.items():
+        if step is WHOLE:
+            continue
+        if step.lstrip("-").isdigit():
+            tree = merge_trees(tree, child)
+        else:
+            tree = merge_trees(tree, {step: child})
+    return tree
+
+
+def resolve_objects(value):
+    """Value with the lazily decoded values of its objects decoded, copied
+    only where one is found
+
+    Memory-mapped datasets hold them in objects (two key levels), decoded
+    values never hold any.
+    """
+    if isinstance(value, lazy.LazyValue):
+        return value.resolve()
+    if isinstance(value, dict):
+        resolved = {key: resolve_objects(item) for key, item in value.items()}
+        if any(resolved[key] is not item for key, item in value.items()):
+            return resolved
+    return value
+
+
+def project(value, node: dict):
+    """Copy of value reduced to the subtrees in node
+
+    Lazily decoded values are decoded, as the page reads them anyway, also
+    inside values kept whole.
+    """
+    value = lazy.resolve(value)
+    if WHOLE in node:
+        return resolve_objects(value)
+    if isinstance(value, dict):
+        return {
+            key: project(value[key], child)
+            for key, child in node.items()
+            if key is not WHOLE and key in value
+        }
+    if isinstance(value, list):
+        items_node = item_tree(node)
+        return [project(item, items_node) for item in value]
+    return value
+
+
+def project_dataset(dataset: dict, paths: list) -> dict:
+    """Project a dataset, djist_ settings are always kept"""
+    tree = build_tree(paths)
+    projected = project(dataset, tree)
+    for key, value in dataset.items():
+        if key.startswith("djist_"):
+            projected[key] = value
+    return projected
+
+
+def source_name(source: str or TextIOWrapper or dict) -> str:
+    if isinstance(source, TextIOWrapper):
+        return source.name
+    if isinstance(source, str):
+        return source
+    return ""
+
+
+def cache_filename(cache_location: str, template_name: str, sources: list) -> str:
+    """Projected dataset file for a template and its dataset sources"""
+    import hashlib  # pylint: disable=import-outside-toplevel
+
+    key = "\n".join([template_name] + [source_name(src) for src in sources])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    stem = os.path.basename(template_name).split(".")[0] or "template"
+    return file.path_join(cache_location, f"{stem}-{digest}.json")
+
+
+def cache_is_current(filename: str, dependencies: list) -> bool:
+    """The cache file exists and is newer than every file it depends on"""
+    if not os.path.isfile(filename):
+        return False
+    cache_time = os.path.getmtime(filename)
+    for dependency in dependencies:
+        if not os.path.isfile(dependency) or os.path.getmtime(dependency) > cache_time:
+            return False
+    return True
+
+
+def read_cache(filename: str) -> dict:
+    logging.debug(msg.PROJECTION_CACHE_READ, filename)
+    return file.json_to_dict(filename)
+
+
+def write_cache(filename: str, dataset: dict):
+    logging.debug(msg.PROJECTION_CACHE_WRITE, filename)
+    directory, name = os.path.split(filename)
+    file.write_file(dataset, name, directory, "json")
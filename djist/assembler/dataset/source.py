@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""Djist: Dataset sources
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import os
+import sys
+from ..generics import file
+from . import compiled
+from . import jsonl
+from . import mapped
+
+
+JSONL_SUFFIXES = (".jsonl",)
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+def stem(filename: str) -> str:
+    """Dataset name for a file, e.g. 'rows' for 'data/rows.jsonl'"""
+    return os.path.basename(filename).split(".")[0]
+
+
+def is_lazy_source(filename: str) -> bool:
+    return filename.lower().endswith(JSONL_SUFFIXES + SQLITE_SUFFIXES)
+
+
+def loads_by_name(filename: str) -> bool:
+    """load reads the file some other way than decoding it as JSON, so an
+    already open stream of it isn't used"""
+    return (
+        is_lazy_source(filename)
+        or bool(compiled.current(filename))
+        or mapped.is_large(filename)
+    )
+
+
+def load(filename: str):
+    """Dataset content of a file
+
+    Returns:
+        dict (or the decoded JSON value) for JSON files, a lazy sequence
+        for JSON Lines (.jsonl) files and a dict of lazy tables for SQLite
+        files. JSON is read from its compiled file (.djc) while that is
+        newer, and large JSON objects are memory-mapped and decoded by
+        top-level key on first use.
+    """
+    if filename.lower().endswith(JSONL_SUFFIXES):
+        return jsonl.JsonLines(filename)
+    if filename.lower().endswith(SQLITE_SUFFIXES):
+        # sqlite3 is only imported by runs reading SQLite datasets
+        from . import sqlite  # pylint: disable=import-outside-toplevel
+
+        return sqlite.load(filename)
+    compiled_filename = compiled.current(filename)
+    if compiled_filename:
+        content = compiled.load(compiled_filename)
+        if content is not None:
+            return content
+    if mapped.is_large(filename):
+        content = mapped.load(filename)
+        if content is not None:
+            return content
+    return file.json_to_dict(filename)
+
+
+def close():
+    """Close the memory maps and SQLite connections of the datasets read"""
+    mapped.close()
+    # sqlite is only loaded by runs that read SQLite datasets
+    sqlite = sys.modules.get(f"{__package__}.sqlite")
+    if sqlite is not None:
+        sqlite.close()
+
+
+def named(filename: str, content) -> dict:
+    """Dataset to merge when no name is given, sequences are named by file"""
+    if isinstance(content, dict):
+        return content
+    return {stem(filename): content}
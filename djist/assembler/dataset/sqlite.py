@@ -0,0 +1,315 @@
+#!/usr/bin/python3
+"""Djist: SQLite datasets
+
+A SQLite file used as a dataset is a dict of its tables, and every table a
+lazy sequence of row dicts. where, whereall, dictsort and length on a table
+run as SQL queries, so they use the table indexes instead of scanning rows.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from ..generics import file, jsonbackend, msg
+from . import lazy
+
+
+# Declared column types, JSON columns hold lists and dicts as JSON text
+INTEGER = "INTEGER"
+REAL = "REAL"
+TEXT = "TEXT"
+BOOLEAN = "BOOLEAN"
+JSON = "JSON TEXT"
+PUSHDOWN_TYPES = (INTEGER, REAL, TEXT, BOOLEAN, "")
+
+# Read only connections by database filename
+connections = {}
+
+
+def quote(name: str) -> str:
+    """SQL identifier"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def connect(filename: str) -> sqlite3.Connection:
+    filename = os.path.abspath(filename)
+    if filename not in connections:
+        uri = Path(filename).as_uri() + "?mode=ro"
+        connections[filename] = sqlite3.connect(uri, uri=True)
+    return connections[filename]
+
+
+def close():
+    for connection in connections.values():
+        connection.close()
+    connections.clear()
+
+
+def table_names(connection: sqlite3.Connection) -> list:
+    rows = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'"
+        " AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )
+    return [row[0] for row in rows]
+
+
+def table_columns(connection: sqlite3.Connection, table: str) -> dict:
+    """Declared type by column name"""
+    rows = connection.execute(f"PRAGMA table_info({quote(table)})")
+    return {row[1]: row[2].upper() for row in rows}
+
+
+def load(filename: str) -> dict:
+    """Tables of a SQLite file by name"""
+    if not os.path.isfile(filename):
+        return {}
+    try:
+        connection = connect(filename)
+        return {
+            table: SqliteTable(connection, filename, table)
+            for table in table_names(connection)
+        }
+    except sqlite3.Error as err:
+        logging.error(msg.SQLITE_ERROR, filename, err)
+        return {}
+
+
+class SqliteTable(lazy.LazySequence):
+    """Rows of a table, with where conditions and sort order kept as SQL
+
+    Rows are read in table order (rowid) unless sorted, and sorts are
+    stable like Python's sorted. NULL columns are left out of the row.
+    """
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        filename: str,
+        table: str,
+        conditions: tuple = (),
+        order: tuple = (),
+    ):
+        self.connection = connection
+        self.filename = filename
+        self.table = table
+        self.columns = table_columns(connection, table)
+        self.conditions = conditions
+        self.order = order
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.filename!r}, {self.table!r})"
+
+    def identity(self) -> tuple:
+        return (self.filename, self.table, self.conditions, self.order)
+
+    def derive(self, conditions: tuple, order: tuple) -> "SqliteTable":
+        derived = SqliteTable.__new__(SqliteTable)
+        derived.__dict__.update(self.__dict__)
+        derived.conditions = conditions
+        derived.order = order
+        return derived
+
+    def where_clause(self) -> tuple:
+        """SQL WHERE clause and its parameters"""
+        if not self.conditions:
+            return "", []
+        clauses = []
+        parameters = []
+        for column, candidates in self.conditions:
+            marks = ", ".join("?" * len(candidates))
+            clauses.append(f"{quote(column)} IN ({marks})")
+            parameters.extend(candidates)
+        return " WHERE " + " AND ".join(clauses), parameters
+
+    def order_clause(self) -> str:
+        """ORDER BY clause, NULLs last in both directions as in dictsort
+        (SQLite puts them first in ascending order)"""
+        terms = []
+        for column, reverse in self.order:
+            terms.append(f"{quote(column)} IS NULL")
+            terms.append(f"{quote(column)} DESC" if reverse else quote(column))
+        return " ORDER BY " + ", ".join(terms + ["rowid"])
+
+    def query(self, select: str, suffix: str = "", parameters: list = None):
+        where, where_parameters = self.where_clause()
+        sql = f"SELECT {select} FROM {quote(self.table)}{where}{suffix}"
+        try:
+            return self.connection.execute(sql, where_parameters + (parameters or []))
+        except sqlite3.Error as err:
+            logging.error(msg.SQLITE_ERROR, self.filename, err)
+            return iter(())
+
+    def row(self, values: tuple) -> dict:
+        row = {}
+        for (column, declared), value in zip(self.columns.items(), values):
+            if value is None:
+                continue
+            if declared == JSON:
+                value = jsonbackend.loads(value)
+            elif declared == BOOLEAN:
+                value = bool(value)
+            row[column] = value
+        return row
+
+    def __iter__(self):
+        select = ", ".join(quote(column) for column in self.columns)
+        for values in self.query(select, self.order_clause()):
+            yield self.row(values)
+
+    def __len__(self):
+        for (count,) in self.query("COUNT(*)"):
+            return count
+        return 0
+
+    def __bool__(self):
+        for _ in self.query("1", " LIMIT 1"):
+            return True
+        return False
+
+    def item(self, index: int):
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError(index)
+        select = ", ".join(quote(column) for column in self.columns)
+        suffix = self.order_clause() + " LIMIT 1 OFFSET ?"
+        for values in self.query(select, suffix, [index]):
+            return self.row(values)
+        raise IndexError(index)
+
+    def candidates(self, column: str, value) -> tuple:
+        """Values a column is compared to, the template value converted to
+        the column type where it can be"""
+        declared = self.columns[column]
+        if declared == BOOLEAN:
+            if isinstance(value, str):
+                return (int(value.strip().lower() in ("true", "1")),)
+            return (int(bool(value)),)
+        if declared == "" and isinstance(value, str):
+            for convert in (int, float):
+                try:
+                    return (value, convert(value))
+                except ValueError:
+                    continue
+        return (value,)
+
+    def where(self, key: str, value) -> "SqliteTable":
+        declared = self.columns.get(key)
+        if declared not in PUSHDOWN_TYPES or not isinstance(value, (str, int, float)):
+            return None
+        condition = (key, self.candidates(key, value))
+        return self.derive(self.conditions + (condition,), self.order)
+
+    def sort(self, key: str, reverse: bool = False) -> "SqliteTable":
+        if self.columns.get(key) not in PUSHDOWN_TYPES:
+            return None
+        return self.derive(self.conditions, ((key, reverse),) + self.order)
+
+
+def column_type(values: list) -> str:
+    """Declared type for the values of a column, '' (no type) for mixed"""
+    kinds = {type(value) for value in values if value is not None}
+    if not kinds:
+        return TEXT
+    if kinds & {dict, list}:
+        return JSON
+    if kinds == {bool}:
+        return BOOLEAN
+    if kinds == {int}:
+        return INTEGER
+    if kinds <= {int, float}:
+        return REAL
+    if kinds == {str}:
+        return TEXT
+    return ""
+
+
+def column_value(value, declared: str):
+    if value is None:
+        return None
+    if declared == JSON:
+        return jsonbackend.dumps(value)
+    return value
+
+
+def import_rows(
+    connection: sqlite3.Connection, table: str, items: list, index: list = None
+) -> int:
+    """Replace a table with the object items of a list, and index it
+
+    Without index every column that isn't JSON is indexed.
+    """
+    rows = [item for item in items if isinstance(item, dict)]
+    if len(rows) < len(items):
+        logging.warning(msg.DATASET_IMPORT_SKIPPED, len(items) - len(rows), table)
+    columns = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(key, None)
+    declared = {
+        column: column_type([row.get(column) for row in rows]) for column in columns
+    }
+    definitions = ", ".join(
+        f"{quote(column)} {kind}".rstrip() for column, kind in declared.items()
+    )
+    connection.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+    connection.execute(f"CREATE TABLE {quote(table)} ({definitions})")
+    if columns:
+        names = ", ".join(quote(column) for column in columns)
+        marks = ", ".join("?" * len(columns))
+        connection.executemany(
+            f"INSERT INTO {quote(table)} ({names}) VALUES ({marks})",
+            (
+                [column_value(row.get(column), kind) for column, kind in declared.items()]
+                for row in rows
+            ),
+        )
+    if index is None:
+        index = [column for column, kind in declared.items() if kind != JSON]
+    for column in index:
+        if column not in columns:
+            logging.warning(msg.DATASET_IMPORT_NO_COLUMN, column, table)
+            continue
+        connection.execute(
+            f"CREATE INDEX {quote(f'{table}_{column}_index')}"
+            f" ON {quote(table)} ({quote(column)})"
+        )
+    logging.info(msg.DATASET_IMPORT, len(rows), table)
+    return len(rows)
+
+
+def import_json(source: str, target: str, table: str = "", index: list = None) -> dict:
+    """Convert a JSON dataset to an indexed SQLite file
+
+    A JSON array becomes one table, named table or after the source file,
+    and every array of an object becomes a table named by its key.
+
+    Returns:
+        (dict) - imported row count by table
+    """
+    content = file.json_to_dict(source)
+    if isinstance(content, list):
+        tables = {table or Path(source).name.split(".")[0]: content}
+    elif isinstance(content, dict):
+        tables = {key: value for key, value in content.items() if isinstance(value, list)}
+    else:
+        tables = {}
+    if not tables:
+        logging.error(msg.DATASET_IMPORT_INVALID, source)
+        return {}
+    imported = {}
+    connection = sqlite3.connect(target)
+    try:
+        with connection:
+            for name, items in tables.items():
+                imported[name] = import_rows(connection, name, items, index)
+            connection.execute("ANALYZE")
+    except sqlite3.Error as err:
+        logging.error(msg.SQLITE_ERROR, target, err)
+    finally:
+        connection.close()
+    return imported
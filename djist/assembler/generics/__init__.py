@@ -1,4 +1,17 @@
-from . import core
-from . import date
-from . import file
-from . import msg
+import importlib
+
+
+# Submodules, imported on first use
+__all__ = [
+    "core",
+    "date",
+    "file",
+    "jsonbackend",
+    "msg",
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
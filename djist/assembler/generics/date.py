@@ -1,5 +1,10 @@
 #!/usr/bin/python3
 """Djist: Generic date/time operations
+
+Format strings are compiled to strftime formats once per (format, type),
+and date/time strings are parsed once each: ISO 8601 strings with
+datetime.fromisoformat, anything else with dateutil. dateutil and pyparsing
+are imported the first time they are needed, not when the module is.
 """
 __author__ = "llelse"
 __version__ = "0.2.0"
@@ -7,15 +12,21 @@ __license__ = "GPLv3"
 
 
 import logging
-from platform import system
-from dateutil.parser import parse
-from pyparsing import printables, Combine, Char, Literal, White, Word, ZeroOrMore
+from datetime import datetime
+import sys
+from functools import lru_cache
 from . import msg
 
 
+WINDOWS = sys.platform == "win32"
+
+# Python directives matched when tokenizing a 'python' format
+PYTHON_DIRECTIVES = "aAwdbBmyYHIpMSfzZjUWcxX%"
+
+
 def platform_check(directive: str) -> str:
     """Change directive to correct style if Windows platform detected"""
-    if system() == "Windows":
+    if WINDOWS:
         return directive.replace("%-", "%#")
     return directive
 
@@ -30,82 +41,109 @@ def default_format() -> dict:
     }
 
 
+# Django to Python directives
+DIRECTIVES_DJ_PY = {
+    # Day
+    "d": "%d",  # Day of the month, 2 digits with leading zeros
+    "j": "%-d",  # Day of the month without leading zeros
+    "D": "%a",  # Day of the week, textual, 3 letters
+    "l": "%A",  # Day of the week, textual, long
+    #'S': '[ord]', # English ordinal suffix for day of the month, 2 chars
+    "w": "%w",  # Day of the week, digits without leading zeros
+    "z": "%-j",  # Day of the year
+    # Week
+    "W": "%V",  # ISO-8601 week number of year, with weeks starting on Mon
+    # Month
+    "m": "%m",  # Month, 2 digits with leading zeros
+    "n": "%-m",  # Month without leading zeros
+    "M": "%b",  # Month, textual, 3 letters (or abbreviated)
+    #'b': '[low%b]', # Month, textual, 3 letters, lowercase
+    "E": "%B",
+    "F": "%B",  # Month, textual, long
+    #'N': '[abr]',
+    #'t': '[dim]',
+    # Year
+    "y": "%y",  # Year, 2 digits
+    "Y": "%Y",  # Year, 4 digits
+    #'L': '[lep]', # Boolean for whether it’s a leap year
+    "o": "%G",  # ISO-8601 week-numbering year
+    # Time
+    "g": "%-I",  # Hour, 12-hour format without leading zeros
+    "G": "%-H",  # Hour, 24-hour format without leading zeros
+    "h": "%I",  # Hour, 12-hour format
+    "H": "%H",  # Hour, 24-hour format
+    "i": "%M",  # Minutes, 2 digits with leading zeros
+    "s": "%S",  # Seconds, 2 digits with leading zeros
+    "u": "%f",  # Microseconds
+    #'a': '[apm%p]', # 'a.m.' or 'p.m.'
+    "A": "%p",  # 'AM' or 'PM'.
+    #'f': '[]', # 12-hour hours and minutes, minutes left off if zero
+    #'P': '[]',
+    # Timezone
+    "e": "%Z",  # Timezone name. Could be in any format
+    "I": "",  # Daylight Savings Time, whether it’s in effect or not
+    "O": "%z",  # Difference to Greenwich time in hours
+    "T": "",  # Time zone of this machine
+    "Z": "",  # Time zone offset in seconds
+    # Date/Time
+    "c": "",  # ISO 8601 format.
+    "r": "",  # RFC 5322 formatted date
+    #'U': '%s', # Seconds since the Unix Epoch
+}
+
+
 def directives_dj_py() -> dict:
     """Django to Python directives"""
-    return {
-        # Day
-        "d": "%d",  # Day of the month, 2 digits with leading zeros
-        "j": "%-d",  # Day of the month without leading zeros
-        "D": "%a",  # Day of the week, textual, 3 letters
-        "l": "%A",  # Day of the week, textual, long
-        #'S': '[ord]', # English ordinal suffix for day of the month, 2 chars
-        "w": "%w",  # Day of the week, digits without leading zeros
-        "z": "%-j",  # Day of the year
-        # Week
-        "W": "%V",  # ISO-8601 week number of year, with weeks starting on Mon
-        # Month
-        "m": "%m",  # Month, 2 digits with leading zeros
-        "n": "%-m",  # Month without leading zeros
-        "M": "%b",  # Month, textual, 3 letters (or abbreviated)
-        #'b': '[low%b]', # Month, textual, 3 letters, lowercase
-        "E": "%B",
-        "F": "%B",  # Month, textual, long
-        #'N': '[abr]',
-        #'t': '[dim]',
-        # Year
-        "y": "%y",  # Year, 2 digits
-        "Y": "%Y",  # Year, 4 digits
-        #'L': '[lep]', # Boolean for whether it’s a leap year
-        "o": "%G",  # ISO-8601 week-numbering year
-        # Time
-        "g": "%-I",  # Hour, 12-hour format without leading zeros
-        "G": "%-H",  # Hour, 24-hour format without leading zeros
-        "h": "%I",  # Hour, 12-hour format
-        "H": "%H",  # Hour, 24-hour format
-        "i": "%M",  # Minutes, 2 digits with leading zeros
-        "s": "%S",  # Seconds, 2 digits with leading zeros
-        "u": "%f",  # Microseconds
-        #'a': '[apm%p]', # 'a.m.' or 'p.m.'
-        "A": "%p",  # 'AM' or 'PM'.
-        #'f': '[]', # 12-hour hours and minutes, minutes left off if zero
-        #'P': '[]',
-        # Timezone
-        "e": "%Z",  # Timezone name. Could be in any format
-        "I": "",  # Daylight Savings Time, whether it’s in effect or not
-        "O": "%z",  # Difference to Greenwich time in hours
-        "T": "",  # Time zone of this machine
-        "Z": "",  # Time zone offset in seconds
-        # Date/Time
-        "c": "",  # ISO 8601 format.
-        "r": "",  # RFC 5322 formatted date
-        #'U': '%s', # Seconds since the Unix Epoch
-    }
+    return DIRECTIVES_DJ_PY
 
 
 def translate_dj_py(dj_directive: str) -> str:
     """Translate a Django format directive into a Python directive"""
-    py_directive = dj_directive
-    if dj_directive in directives_dj_py().keys():
-        py_directive = directives_dj_py()[dj_directive]
-    return py_directive
+    return DIRECTIVES_DJ_PY.get(dj_directive, dj_directive)
+
+
+@lru_cache(maxsize=1)
+def python_format_grammar():
+    # pylint: disable-next=import-outside-toplevel
+    from pyparsing import printables, Combine, Char, Literal, White, Word, ZeroOrMore
+
+    return ZeroOrMore(
+        White()
+        | Combine((Literal("%-") ^ Literal("%")) + Char(PYTHON_DIRECTIVES))
+        | Word(printables)
+    )
 
 
 def tokenize_format(format_string: str, format_type: str) -> list:
     """Tokenize a datetime format string"""
     tokens = []
     if format_type.lower() == "python":
-        directives = "aAwdbBmyYHIpMSfzZjUWcxX%"
-        match = ZeroOrMore(
-            White()
-            | Combine((Literal("%-") ^ Literal("%")) + Char(directives))
-            | Word(printables)
-        )
-        tokens = match.parseString(format_string).asList()
+        tokens = python_format_grammar().parseString(format_string).asList()
     else:
         tokens = list(format_string)
     return tokens
 
 
+@lru_cache(maxsize=256)
+def compile_format(dt_format: str, format_type: str) -> str:
+    """strftime format of a Django or Python style format string"""
+    tokens = tokenize_format(dt_format, format_type)
+    if format_type.lower() == "python":
+        return "".join(platform_check(token) for token in tokens)
+    return "".join(platform_check(translate_dj_py(token)) for token in tokens)
+
+
+@lru_cache(maxsize=4096)
+def parse_datetime(dt_value: str) -> datetime:
+    """datetime of a date/time string, ISO 8601 strings parsed directly"""
+    try:
+        return datetime.fromisoformat(dt_value)
+    except ValueError:
+        from dateutil.parser import parse  # pylint: disable=import-outside-toplevel
+
+        return parse(dt_value)
+
+
 def format_datetime(dt_value: str, dt_format: str, format_type: str) -> str:
     """Date/time string formatter
 
@@ -118,15 +156,11 @@ def format_datetime(dt_value: str, dt_format: str, format_type: str) -> str:
     Returns:
         str: Formatted date/time string
     """
-    datetime_value = parse(dt_value)
-    tokens = tokenize_format(dt_format, format_type)
-    strftime_format = ""
-    if format_type.lower() == "python":
-        for token in tokens:
-            strftime_format += platform_check(token)
+    if isinstance(dt_value, datetime):
+        datetime_value = dt_value
     else:
-        for token in tokens:
-            strftime_format += platform_check(translate_dj_py(token))
+        datetime_value = parse_datetime(dt_value)
+    strftime_format = compile_format(dt_format, format_type)
     try:
         return datetime_value.strftime(strftime_format)
     except ValueError:
@@ -6,12 +6,12 @@ __version__ = "0.2.0"
 __license__ = "GPLv3"
 
 
-import json
 import logging
 import os
+import sys
 from io import TextIOWrapper
 from os.path import pathsep
-from . import core, msg
+from . import core, jsonbackend, msg
 
 
 def path_exists(path: str):
@@ -52,7 +52,7 @@ def write_file(data, filename: str, path: str = "output", outformat: str = ""):
     try:
         with open(full_path, "w") as file:
             if outformat == "json":
-                json.dump(data, file, indent=4)
+                file.write(jsonbackend.dumps(data, indent=4))
             else:
                 if isinstance(data, list):
                     file.writelines(data)
@@ -78,9 +78,10 @@ def file_to_str(filename):
 
 def json_to_dict(filename):
     if os.path.isfile(filename):
-        with open(filename) as json_file:
+        backend = jsonbackend.backend()
+        with open(filename, "rb" if backend.reads_bytes else "r") as json_file:
             try:
-                json_dict = json.load(json_file)
+                json_dict = backend.loads(json_file.read())
             except ValueError as err:
                 logging.error(msg.JSON_DECODE_ERROR, f"{filename} - {err}")
                 json_dict = {}
@@ -98,7 +99,7 @@ def write_io(file: TextIOWrapper, kind: str, data: str and list and dict):
             elif isinstance(data, str):
                 file.write(data)
         elif kind == "dataset":
-            json.dump(data, file, indent=4)
+            file.write(jsonbackend.dumps(data, indent=4))
         elif kind == "scan":
             if isinstance(data, list):
                 for line in data:
@@ -109,7 +110,8 @@ def write_io(file: TextIOWrapper, kind: str, data: str and list and dict):
     except OSError as err:
         logging.error(msg.GENERAL_ERROR, err)
         core.close()
-    file.close()
+    if file not in (sys.stdout, sys.stderr):
+        file.close()
 
 
 def read_io(file: TextIOWrapper, kind: str):
@@ -118,7 +120,7 @@ def read_io(file: TextIOWrapper, kind: str):
         if kind == "template":
             read_in = file.read()
         elif kind == "dataset":
-            read_in = json.load(file)
+            read_in = read_json(file)
     except ValueError as err:
         logging.error(msg.JSON_DECODE_ERROR, err)
         core.close()
@@ -129,6 +131,14 @@ def read_io(file: TextIOWrapper, kind: str):
     return read_in
 
 
+def read_json(file: TextIOWrapper):
+    """Decoded JSON of a stream, read as bytes if the backend allows"""
+    backend = jsonbackend.backend()
+    if backend.reads_bytes and hasattr(file, "buffer"):
+        return backend.loads(file.buffer.read())
+    return backend.loads(file.read())
+
+
 def read_template(file: TextIOWrapper) -> str:
     template_str: str
     try:
@@ -143,7 +153,7 @@ def read_template(file: TextIOWrapper) -> str:
 def read_json_dataset(file: TextIOWrapper) -> dict:
     json_dict: dict
     try:
-        json_dict = json.load(file)
+        json_dict = read_json(file)
     except ValueError as err:
         logging.error(msg.JSON_DECODE_ERROR, err)
         core.close()
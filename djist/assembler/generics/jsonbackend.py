@@ -0,0 +1,150 @@
+#!/usr/bin/python3
+"""Djist: JSON backends
+
+JSON is decoded and encoded by the first importable backend in order of
+preference (orjson, simdjson, ujson, then the standard library json), or
+the one chosen with --json-backend. Backends that decode bytes are given
+file contents as bytes, skipping text decoding. Each backend counts what
+it decoded for the job summary.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import gc
+import importlib
+import importlib.util
+import json
+import logging
+import time
+from . import msg
+
+
+class Backend:
+    """Decoder and encoder of one JSON library"""
+
+    def __init__(self, name: str, loads, dumps, reads_bytes: bool):
+        self.name = name
+        self.reads_bytes = reads_bytes
+        self.decoder = loads
+        self.encoder = dumps
+        self.documents = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name!r})"
+
+    def loads(self, data: bytes or str):
+        """Decoded JSON document, ValueError if it isn't valid JSON
+
+        Decoding only allocates, so the garbage collector is paused rather
+        than left to rescan the growing result.
+        """
+        start = time.perf_counter()
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return self.decoder(data)
+        finally:
+            if collecting:
+                gc.enable()
+            self.documents += 1
+            self.bytes += len(data)
+            self.seconds += time.perf_counter() - start
+
+    def dumps(self, data, indent: int = None) -> str:
+        return self.encoder(data, indent)
+
+
+def stdlib_dumps(data, indent: int = None) -> str:
+    return json.dumps(data, indent=indent)
+
+
+def stdlib_backend(module) -> Backend:
+    return Backend("json", module.loads, stdlib_dumps, True)
+
+
+def orjson_backend(module) -> Backend:
+    def dumps(data, indent: int = None) -> str:
+        # orjson only indents by 2
+        if indent not in (None, 2):
+            return stdlib_dumps(data, indent)
+        option = module.OPT_NON_STR_KEYS
+        if indent:
+            option |= module.OPT_INDENT_2
+        return module.dumps(data, option=option).decode("utf-8")
+
+    return Backend("orjson", module.loads, dumps, True)
+
+
+def simdjson_backend(module) -> Backend:
+    return Backend("simdjson", module.loads, stdlib_dumps, True)
+
+
+def ujson_backend(module) -> Backend:
+    def dumps(data, indent: int = None) -> str:
+        return module.dumps(data, indent=indent or 0, escape_forward_slashes=False)
+
+    return Backend("ujson", module.loads, dumps, True)
+
+
+# Backend factories by module name, in order of preference
+factories = {
+    "orjson": orjson_backend,
+    "simdjson": simdjson_backend,
+    "ujson": ujson_backend,
+    "json": stdlib_backend,
+}
+
+# Backends created so far by name, and the one in use
+backends = {}
+active = None
+
+
+def register(name: str, factory, preferred: bool = False):
+    """Add a backend, factory(module) returns its Backend"""
+    global factories
+    if preferred:
+        factories = {name: factory, **factories}
+    else:
+        factories[name] = factory
+
+
+def available() -> list:
+    """Names of the registered backends that can be imported"""
+    return [name for name in factories if importlib.util.find_spec(name)]
+
+
+def get(name: str) -> Backend:
+    if name not in backends:
+        backends[name] = factories[name](importlib.import_module(name))
+    return backends[name]
+
+
+def select(name: str = "auto") -> Backend:
+    """Use a backend, the preferred available one for 'auto'"""
+    global active
+    names = available()
+    if name != "auto" and name not in names:
+        logging.warning(msg.JSON_BACKEND_UNAVAILABLE, name)
+        name = "auto"
+    if name == "auto":
+        name = names[0]
+    active = get(name)
+    logging.debug(msg.JSON_BACKEND_SELECTED, active.name)
+    return active
+
+
+def backend() -> Backend:
+    """Backend in use"""
+    return active or select()
+
+
+def loads(data: bytes or str):
+    return backend().loads(data)
+
+
+def dumps(data, indent: int = None) -> str:
+    return backend().dumps(data, indent)
@@ -19,6 +19,8 @@ INDEX_OUT_OF_RANGE = "Invalid index (%s) for list/array length (%s)"
 INVALID_DICT_KEY = "Invalid key (%s) for dictionary/object."
 INVALID_LIST_INDEX = "Invalid index (%s) for list/array."
 JSON_DECODE_ERROR = "The JSON data file contains an error: %s"
+JSON_BACKEND_UNAVAILABLE = "JSON backend (%s) is not installed, using the default"
+JSON_BACKEND_SELECTED = "JSON backend: %s"
 KEY_VALUE = "Key (%s) has value (%s)."
 UNEXPECTED_TYPE = "Unexpected data type (%s)."
 
@@ -27,6 +29,7 @@ UNEXPECTED_TYPE = "Unexpected data type (%s)."
 HELP_LOG_LEVEL = (
     "Level of information to output to log file, or 'quiet' for no logging."
 )
+HELP_LOG_FILE = "Location of the log file, not created when --log-level is quiet."
 HELP_CONSOLE_LEVEL = "Level of information sent to console, or 'quiet' for no messages."
 HELP_SCAN = "Scan a djist-format template to determine data fields."
 HELP_SCAN_TEMPLATE = "Individual template to scan."
@@ -34,12 +37,36 @@ HELP_SCAN_DATASET = (
     "Check if dataset contains the required fields to process the template."
 )
 HELP_SCAN_OUTPUT = "Location to save the scan results. If no location is specified, console logging will be disabled and the scan results streamed to the console instead."
+HELP_SCAN_COST = "Estimate the work needed to process the template (with the dataset, if given), including for loop bodies and usetemplate partials, and list the most expensive constructs."
+HELP_SCAN_COST_TOP = "Number of constructs listed by --cost."
 HELP_RUN = "Process an individual djist-format template. A template and dataset should be specified when using this option."
 HELP_RUN_TEMPLATE = "Individual template to process."
 HELP_RUN_DATASET = "Dataset to use for individual template."
 HELP_RUN_OUTPUT = "Location to save the processed template."
 HELP_JOB = "Run a job using a config file."
 HELP_JOB_CONFIG = "Job configuration file."
+HELP_DATASET = "Convert datasets to formats djist reads faster."
+HELP_DATASET_IMPORT = "Convert a JSON array of objects (or an object of such arrays, one table each) into an indexed SQLite file, for use with usedataset."
+HELP_DATASET_IMPORT_SOURCE = "JSON dataset to import."
+HELP_DATASET_IMPORT_TARGET = "SQLite file to create or update. Imported tables are replaced."
+HELP_DATASET_IMPORT_TABLE = "Table name for a JSON array. Defaults to the source file name."
+HELP_DATASET_IMPORT_INDEX = "Column to index, can be repeated. Defaults to every column that doesn't hold lists or objects."
+HELP_DATASET_COMPILE = "Compile a JSON dataset to a binary file (.djc) that loads faster. Datasets are read from the compiled file while it is newer than its JSON source."
+HELP_DATASET_COMPILE_SOURCE = "JSON dataset to compile."
+HELP_DATASET_COMPILE_OUTPUT = "Location of the compiled file. Defaults to the source with a .djc extension, where djist looks for it."
+HELP_LAZY_JSON_THRESHOLD = "JSON datasets of at least this many MiB are memory-mapped and their top-level values decoded when first used. 0 disables."
+HELP_COLUMNAR_THRESHOLD = "Top-level dataset lists of at least this many records with the same keys are stored by column. 0 disables."
+HELP_AUTOESCAPE = "Escape the output of {{ }} tags for HTML, except values marked safe. The autoescape tag turns it on or off for part of a template."
+HELP_FILTER_MEMO_SIZE = "Results of pure filters (date, floatformat, escape, ...) kept for reuse across loop iterations and pages. 0 disables the memo."
+HELP_FRAGMENT_CACHE_SIZE = "MiB of rendered cache tag fragments kept in memory for the job, least recently used evicted first. 0 disables it."
+HELP_FRAGMENT_CACHE_DIR = "Directory keeping rendered cache tag fragments across runs."
+HELP_FRAGMENT_CACHE_DIR_SIZE = "MiB of fragments kept in the fragment cache directory, least recently used removed first."
+HELP_PARTIAL_MEMO_SIZE = "MiB of rendered usetemplate partials kept for the job, reused when a partial is included again with the same values. 0 disables the memo."
+HELP_LAZY_JSON_DEPTH = "Key levels indexed in memory-mapped JSON datasets. With 2, values of top-level objects are decoded separately."
+HELP_LAZY_JSON_INDEX_FILE = "Save the key offsets of memory-mapped JSON datasets next to them (.djx), so later runs skip the scan."
+HELP_JSON_BACKEND = "Library used to decode and encode JSON. 'auto' uses the first one installed of orjson, simdjson, ujson and json (standard library)."
+HELP_MEMORY_REPORT = "Record peak traced memory, top allocation sites and dataset size for each page, and add them to the job summary."
+HELP_MEMORY_REPORT_FILE = "Location to save the memory report as JSON. Implies --memory-report."
 
 
 # Filter messages
@@ -61,8 +88,57 @@ FILTER_GET_DIGIT_ARG_ERROR = (
 )
 
 
+PLUGIN_LOAD_ERROR = "Plugin (%s) could not be loaded from (%s): %s"
+
+
 # Processor
 PROC_GETDATA_ERROR_NONKEY = "Key (%s) is not in dataset, and isn't a number"
 PROC_GETDATA_INVALID_RETURN = "Invalid return type (%s)"
 PROC_GETDATA_LIST_1 = "Invalid index (%s)"
 PROC_ACTION_SUCCESS = "Action (%s) was successfully processed"
+AUTOESCAPE_ARGUMENT_ERROR = "Expected {%% autoescape on %%} or {%% autoescape off %%}, got (%s)"
+REGROUP_SYNTAX_ERROR = "Expected {%% regroup list by key as name %%}, got (%s)"
+CACHE_ARGUMENT_ERROR = "Expected {%% cache \"key\" var1 var2 ... %%}, got (%s). Rendering without the cache"
+FRAGMENT_CACHE_WRITE_ERROR = "Fragment (%s) could not be saved: %s"
+
+
+# Scanner
+SCAN_COST_TOTALS = "Estimated totals: %.0f contexts, %.0f filter calls, %.0f includes, %.0f tag executions"
+SCAN_COST_TRIPS = "(%.1f trips)"
+SCAN_COST_UNKNOWN_TRIPS = "(list not in dataset, assumed %s trips)"
+SCAN_COST_DYNAMIC_PARTIAL = "(partial named by dataset value, not followed)"
+SCAN_COST_MISSING_PARTIAL = "(partial %s not found or included recursively)"
+
+
+# Dataset
+DATASET_MATERIALIZED = "Dataset (%s) was read into memory: %s"
+DATASET_IMPORT = "Imported %s rows into table (%s)"
+DATASET_IMPORT_SKIPPED = "Skipped %s items that are not objects in table (%s)"
+DATASET_IMPORT_NO_COLUMN = "Index column (%s) is not in table (%s)"
+DATASET_IMPORT_INVALID = "Nothing to import from (%s), expected an array of objects or an object of arrays"
+SQLITE_ERROR = "SQLite error in (%s): %s"
+DATASET_NOT_FOUND = "Dataset (%s) was not found"
+LAZY_JSON_INDEXED = "Indexed dataset (%s): %s top-level keys"
+LAZY_JSON_INDEX_UNSAVED = "Dataset index (%s) was not saved: %s"
+LAZY_JSON_DECODE = "Decoding value from dataset (%s): %s bytes"
+COLUMNAR_CONVERTED = "Stored list by column (%s): %s records, %s columns (%s)"
+DATASET_COMPILED = "Compiled dataset (%s) to (%s)"
+DATASET_COMPILED_VERSION = "Compiled dataset (%s) was written by another djist or Python version, compile it again. Reading its source instead"
+DATASET_COMPILED_ERROR = "Compiled dataset (%s) could not be read: %s"
+
+
+# Projection
+PROJECTION_UNKNOWN = "Page (%s): dataset not projected, the template includes a partial named by a dataset value"
+PROJECTION_CACHE_READ = "Reading projected dataset (%s)"
+PROJECTION_CACHE_WRITE = "Saving projected dataset (%s)"
+
+
+# Report
+REPORT_HEADER = "Job summary"
+REPORT_FILTER_MEMO = "Filter memo: %s hits, %s misses (%.1f%% hit rate), %s calls not hashable, %s results kept"
+REPORT_FILTER_MEMO_FILTER = "    %s: %s hits, %s misses"
+REPORT_FRAGMENT_CACHE = "Fragment cache: %s hits (%s read from the cache directory), %s misses, %.1f KiB kept"
+REPORT_PARTIAL_MEMO = "Partial memo: %s hits, %s misses, %s renders of partials that can't be memoized, %.1f KiB kept"
+REPORT_JSON_BACKEND = "JSON backend (%s): %s documents, %.1f KiB decoded in %.3f s"
+REPORT_MEMORY_PAGE = "Page (%s) template (%s): peak %.1f KiB, dataset %.1f KiB in memory (%.1f KiB on disk)"
+REPORT_MEMORY_SITE = "    %+.1f KiB in %+d blocks at %s"
@@ -1,5 +1,18 @@
-from . import assemble
-from . import config
-from . import job
-from . import log
-from . import page
+import importlib
+
+
+# Submodules, imported on first use
+__all__ = [
+    "assemble",
+    "config",
+    "job",
+    "log",
+    "page",
+    "report",
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
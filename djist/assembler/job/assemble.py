@@ -7,15 +7,19 @@ __license__ = "GPLv3"
 
 
 import logging
+import sys
 from . import config as conf
 from . import job as mjob
 from . import page as mpage
+from . import report as mreport
+from ..dataset import compiled as mcompiled
 from ..template import scanner as mscanner
-from ..generics import file
+from ..generics import file, jsonbackend
 
 
 def run():
     logging.info("Djist assemble running")
+    jsonbackend.select(conf.JSON_BACKEND)
 
     # Job
     if conf.MODE_JOB:
@@ -41,7 +45,37 @@ def run():
         logging.info("Running template scan")
         raw_template = file.read_io(conf.IO_TEMPLATE, "template")
         scanner = mscanner.Scanner(raw_template)
-        scanner.run()
+        if conf.SCAN_COST:
+            dataset = {}
+            if conf.IO_DATASET:
+                dataset = file.read_io(conf.IO_DATASET, "dataset")
+            cost_report = scanner.cost(dataset, conf.IO_TEMPLATE.name)
+            file.write_io(conf.IO_OUTFILE or sys.stdout, "scan", cost_report)
+        else:
+            scanner.run()
+
+    # Dataset
+    elif conf.MODE_DATASET:
+        if conf.DATASET_ACTION == "import":
+            logging.info("Importing dataset into SQLite")
+            # pylint: disable-next=import-outside-toplevel
+            from ..dataset import sqlite as msqlite
+
+            msqlite.import_json(
+                conf.DATASET_SOURCE,
+                conf.DATASET_TARGET,
+                conf.DATASET_TABLE,
+                conf.DATASET_INDEX,
+            )
+        elif conf.DATASET_ACTION == "compile":
+            logging.info("Compiling dataset")
+            mcompiled.compile_json(conf.DATASET_SOURCE, conf.DATASET_TARGET)
+
+    mreport.log_summary()
+    if conf.MEMORY_REPORT:
+        if conf.MEMORY_REPORT_FILE:
+            mreport.write_report(conf.MEMORY_REPORT_FILE)
+        mreport.stop_tracing()
 
 
 if __name__ == "__main__":
@@ -13,6 +13,7 @@ from io import TextIOWrapper
 MODE_SCAN: bool = False
 MODE_RUN: bool = False
 MODE_JOB: bool = False
+MODE_DATASET: bool = False
 
 # Logging
 LOG_CONSOLE: bool
@@ -21,6 +22,55 @@ LOG_FILE: bool
 LOG_FILE_LEVEL: str
 LOG_FILE_LOCATION: str
 
+# Scan
+SCAN_COST: bool = False
+SCAN_COST_TOP: int = 10
+SCAN_COST_UNKNOWN_TRIPS: int = 10
+# Estimated cost of a new context (template prep and dataset copy), in
+# units of one tag execution
+SCAN_COST_CONTEXT_WEIGHT: int = 100
+
+# Dataset conversion
+DATASET_ACTION: str = ""
+DATASET_SOURCE: str = ""
+DATASET_TARGET: str = ""
+DATASET_TABLE: str = ""
+DATASET_INDEX: list = None
+
+# JSON
+JSON_BACKEND: str = "auto"
+
+# Memory-mapped JSON datasets
+LAZY_JSON_MIN_BYTES: int = 64 * 1024 * 1024
+LAZY_JSON_DEPTH: int = 1
+# Key offsets saved next to the dataset (.djx) for later runs
+LAZY_JSON_INDEX_FILE: bool = False
+
+# Escape {{ }} output for HTML
+AUTOESCAPE: bool = False
+
+# Results of pure filters kept for the job, 0 disables the memo
+FILTER_MEMO_SIZE: int = 4096
+
+# Rendered {% cache %} fragments kept for the job (MiB), 0 disables it
+# unless a cache directory is set, which keeps them across runs
+FRAGMENT_CACHE_SIZE: float = 16
+FRAGMENT_CACHE_DIR: str = ""
+FRAGMENT_CACHE_DIR_SIZE: float = 256
+
+# Rendered usetemplate partials kept for the job by their input values
+# (MiB), 0 renders every inclusion
+PARTIAL_MEMO_SIZE: float = 16
+
+# Columnar lists, 0 keeps lists of records as they are
+COLUMNAR_MIN_ROWS: int = 0
+
+# Memory report
+MEMORY_REPORT: bool = False
+MEMORY_REPORT_FILE: str = ""
+MEMORY_REPORT_TOP: int = 5
+MEMORY_REPORT_FRAMES: int = 1
+
 # File streams
 IO_LOG: TextIOWrapper
 IO_CONFIG: TextIOWrapper
@@ -38,7 +38,8 @@ def start_logging():
         cons_handler.setFormatter(cons_format)
         logger.addHandler(cons_handler)
     if config.LOG_FILE:
-        # Log File
+        # Log File, opened here rather than when the arguments are parsed
+        config.IO_LOG = open(config.LOG_FILE_LOCATION, "w")
         file_handler = logging.StreamHandler(config.IO_LOG)
         file_handler.setLevel(get_level(config.LOG_FILE_LEVEL))
         f_fmt = "%(asctime)s %(levelname)s: [%(module)s] %(message)s"
@@ -8,8 +8,13 @@ __license__ = "GPLv3"
 
 import logging
 from io import TextIOWrapper
-from ..generics import file
+from ..dataset import columnar, projection
+from ..dataset import source as msource
+from ..generics import file, msg
 from ..template import context as c
+from ..template import scanner as mscanner
+from . import config as conf
+from . import report as mreport
 
 
 class Page:
@@ -19,6 +24,11 @@ class Page:
         self.name = self.config.pop("djist_page_name")
         self.page_context = c.Context(0)
         self.processed_template = ""
+        self.memory_record = None
+        if conf.MEMORY_REPORT:
+            self.memory_record = mreport.MemoryRecord(
+                self.name, self.template_name(self.config.get("djist_page_template"))
+            )
         # Template
         self.page_template = self.read_template(self.config.get("djist_page_template"))
         self.page_context.set_template(self.page_template)
@@ -31,6 +41,11 @@ class Page:
             return self.config.get("djist_base_location")
         return ""
 
+    def template_name(self, config_template: str or TextIOWrapper) -> str:
+        if isinstance(config_template, TextIOWrapper):
+            return config_template.name
+        return str(config_template)
+
     def read_template(self, config_template: str or TextIOWrapper) -> str:
         if isinstance(config_template, TextIOWrapper):
             return file.read_template(config_template)
@@ -41,18 +56,81 @@ class Page:
     def set_dataset(self, new_dataset: dict):
         self.page_context.set_dataset(new_dataset)
 
+    def load_dataset(self, src: str or dict or TextIOWrapper) -> dict:
+        if isinstance(src, TextIOWrapper):
+            if msource.loads_by_name(src.name):
+                src.close()
+                return msource.named(src.name, msource.load(src.name))
+            return file.read_json_dataset(src)
+        elif isinstance(src, str) and src != '':
+            # Future resolve id
+            src = file.path_join(self.base(), src)
+            return msource.named(src, msource.load(src))
+        elif isinstance(src, dict):
+            return src
+        return {}
+
     def resolve_dataset(self, dataset: list or str or dict or TextIOWrapper):
         if not isinstance(dataset, list):
             dataset = [dataset]
+        paths = self.projection_paths()
+        cache_file = self.projection_cache_file(dataset, paths)
+        if cache_file and projection.cache_is_current(
+            cache_file, self.projection_dependencies(dataset)
+        ):
+            self.set_dataset(columnar.columnarize(projection.read_cache(cache_file)))
+            return
+        loaded = {}
         for src in dataset:
+            if self.memory_record:
+                self.memory_record.start_dataset()
+            loaded.update(self.load_dataset(src))
+            if self.memory_record:
+                self.memory_record.stop_dataset(src)
+        if paths is not None:
+            loaded = projection.project_dataset(loaded, paths)
+            if cache_file:
+                projection.write_cache(cache_file, loaded)
+        self.set_dataset(columnar.columnarize(loaded))
+
+    # Projection
+    def projection_paths(self) -> list or None:
+        """Dataset paths read by the template, if projection is enabled"""
+        self.projection_partials = []
+        if not self.config.get("djist_projection"):
+            return None
+        scanner = mscanner.DependencyScanner(self.base())
+        paths = scanner.run(self.page_template)
+        if paths is None:
+            logging.info(msg.PROJECTION_UNKNOWN, self.name)
+        self.projection_partials = scanner.partials
+        return paths
+
+    def projection_dependencies(self, dataset: list) -> list:
+        """Files a persisted projection must be newer than"""
+        sources = [self.config.get("djist_page_template")] + dataset
+        dependencies = list(self.projection_partials)
+        for src in sources:
             if isinstance(src, TextIOWrapper):
-                self.set_dataset(file.read_json_dataset(src))
+                dependencies.append(src.name)
             elif isinstance(src, str) and src != '':
-                # Future resolve id
-                src = file.path_join(self.base(), src)
-                self.set_dataset(file.json_to_dict(src))
-            elif isinstance(src, dict):
-                self.set_dataset(src)
+                dependencies.append(file.path_join(self.base(), src))
+        return dependencies
+
+    def projection_cache_file(self, dataset: list, paths: list or None) -> str:
+        """Persisted projection, only for templates and datasets from files"""
+        cache_location = self.config.get("djist_projection_cache")
+        if paths is None or not cache_location:
+            return ""
+        if not all(isinstance(src, (str, TextIOWrapper)) for src in dataset):
+            return ""
+        if any(msource.is_lazy_source(projection.source_name(src)) for src in dataset):
+            return ""
+        return projection.cache_filename(
+            file.path_join(self.base(), cache_location),
+            self.template_name(self.config.get("djist_page_template")),
+            dataset,
+        )
 
     def write_page_to_file(self):
         if "djist_output_job" in self.config.keys():
@@ -74,5 +152,9 @@ class Page:
             file.write_file(self.processed_template, path_output_filename, full_path)
 
     def process(self):
+        if self.memory_record:
+            self.memory_record.start_process()
         self.processed_template = self.page_context.process()
+        if self.memory_record:
+            self.memory_record.stop_process()
         self.write_page_to_file()
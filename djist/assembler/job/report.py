@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+"""Djist: Job summary and memory report
+
+tracemalloc is only imported once memory is traced, for --memory-report.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import linecache
+import logging
+import os
+from io import TextIOWrapper
+from ..generics import file, jsonbackend, msg
+from ..template import fragment, memo, partial
+from . import config
+
+
+# Memory records of processed pages
+pages = []
+
+
+def start_tracing():
+    import tracemalloc  # pylint: disable=import-outside-toplevel
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(config.MEMORY_REPORT_FRAMES)
+
+
+def stop_tracing():
+    import tracemalloc  # pylint: disable=import-outside-toplevel
+
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def take_snapshot():
+    """tracemalloc snapshot without the allocations of tracemalloc and the
+    import system"""
+    import tracemalloc  # pylint: disable=import-outside-toplevel
+
+    return tracemalloc.take_snapshot().filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        )
+    )
+
+
+def traced_memory() -> tuple:
+    """(current, peak) traced memory in bytes"""
+    import tracemalloc  # pylint: disable=import-outside-toplevel
+
+    return tracemalloc.get_traced_memory()
+
+
+def reset_peak():
+    import tracemalloc  # pylint: disable=import-outside-toplevel
+
+    tracemalloc.reset_peak()
+
+
+def source_size(source: str or TextIOWrapper) -> int:
+    """Size in bytes of a dataset file, or 0 if it isn't a file"""
+    if isinstance(source, TextIOWrapper):
+        source = source.name
+    if isinstance(source, str) and os.path.isfile(source):
+        return os.path.getsize(source)
+    return 0
+
+
+class MemoryRecord:
+    """Traced memory for one page: dataset load and template processing"""
+
+    def __init__(self, page_name: str, template_name: str = ""):
+        start_tracing()
+        self.page_name = page_name
+        self.template_name = template_name
+        self.dataset_file_bytes = 0
+        self.dataset_bytes = 0
+        self.peak_bytes = 0
+        self.top_sites = []
+        self.load_start = 0
+        self.process_start = 0
+        self.snapshot = None
+
+    def start_dataset(self):
+        self.load_start = traced_memory()[0]
+
+    def stop_dataset(self, source: str or TextIOWrapper = None):
+        self.dataset_bytes += traced_memory()[0] - self.load_start
+        self.dataset_file_bytes += source_size(source)
+
+    def start_process(self):
+        self.snapshot = take_snapshot()
+        self.process_start = traced_memory()[0]
+        reset_peak()
+
+    def stop_process(self):
+        self.peak_bytes = traced_memory()[1] - self.process_start
+        after = take_snapshot()
+        statistics = [
+            stat
+            for stat in after.compare_to(self.snapshot, "lineno")
+            if stat.size_diff > 0
+        ]
+        self.snapshot = None
+        self.top_sites = []
+        for stat in statistics[: config.MEMORY_REPORT_TOP]:
+            frame = stat.traceback[0]
+            self.top_sites.append(
+                {
+                    "site": f"{frame.filename}:{frame.lineno}",
+                    "line": linecache.getline(frame.filename, frame.lineno).strip(),
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                }
+            )
+        pages.append(self)
+
+    def as_dict(self) -> dict:
+        return {
+            "page": self.page_name,
+            "template": self.template_name,
+            "dataset_file_bytes": self.dataset_file_bytes,
+            "dataset_bytes": self.dataset_bytes,
+            "peak_bytes": self.peak_bytes,
+            "top_sites": self.top_sites,
+        }
+
+
+def memory_summary() -> list:
+    lines = []
+    ordered = sorted(pages, key=lambda record: record.peak_bytes, reverse=True)
+    for record in ordered:
+        lines.append(
+            msg.REPORT_MEMORY_PAGE
+            % (
+                record.page_name,
+                record.template_name,
+                record.peak_bytes / 1024,
+                record.dataset_bytes / 1024,
+                record.dataset_file_bytes / 1024,
+            )
+        )
+        for site in record.top_sites:
+            lines.append(
+                msg.REPORT_MEMORY_SITE
+                % (site["size_diff"] / 1024, site["count_diff"], site["site"])
+            )
+    return lines
+
+
+def summary() -> list:
+    """Lines of the job summary"""
+    lines = []
+    if config.MEMORY_REPORT:
+        lines.extend(memory_summary())
+    for backend in jsonbackend.backends.values():
+        if backend.documents:
+            lines.append(
+                msg.REPORT_JSON_BACKEND
+                % (backend.name, backend.documents, backend.bytes / 1024, backend.seconds)
+            )
+    lines.extend(memo_summary())
+    hits, directory_hits, misses, kept = fragment.fragments.summary()
+    if hits or directory_hits or misses:
+        lines.append(
+            msg.REPORT_FRAGMENT_CACHE
+            % (hits + directory_hits, directory_hits, misses, kept)
+        )
+    hits, misses, unmemoized, kept = partial.partials.summary()
+    if hits or misses or unmemoized:
+        lines.append(msg.REPORT_PARTIAL_MEMO % (hits, misses, unmemoized, kept))
+    return lines
+
+
+def memo_summary() -> list:
+    """Filter memo hit rate, and the filters it saved the most calls of"""
+    counts = memo.filters.summary()
+    if not counts:
+        return []
+    hits = sum(entry[1] for entry in counts)
+    misses = sum(entry[2] for entry in counts)
+    lines = [
+        msg.REPORT_FILTER_MEMO
+        % (
+            hits,
+            misses,
+            100 * hits / (hits + misses or 1),
+            sum(entry[3] for entry in counts),
+            len(memo.filters.entries),
+        )
+    ]
+    for name, filter_hits, filter_misses, _ in counts[:5]:
+        if filter_hits:
+            lines.append(msg.REPORT_FILTER_MEMO_FILTER % (name, filter_hits, filter_misses))
+    return lines
+
+
+def log_summary():
+    lines = summary()
+    if lines:
+        logging.info(msg.REPORT_HEADER)
+        for line in lines:
+            logging.info(line)
+
+
+def write_report(filename: str):
+    """Save the memory report as JSON"""
+    report = {"pages": [record.as_dict() for record in pages]}
+    file.write_file(report, filename, "", "json")
@@ -1,8 +1,26 @@
-from . import context
-from . import prepper
-from . import processor
-from . import scanner
-from . import tag
-from . import template
-from . import token
-from . import token_filter
+import importlib
+
+
+# Submodules, imported on first use
+__all__ = [
+    "context",
+    "fragment",
+    "prepper",
+    "lookup",
+    "memo",
+    "partial",
+    "processor",
+    "registry",
+    "safe",
+    "scanner",
+    "tag",
+    "template",
+    "token",
+    "token_filter",
+]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,13 +8,15 @@ __license__ = "GPLv3"
 
 import logging
 from ..generics import file
+from . import lookup
 from . import prepper as mprepper
 from . import processor as mprocessor
 
 
 class Context:
-    def __init__(self, parent_level: int, source: str = ""):
+    def __init__(self, parent_level: int, source: str = "", autoescape: bool = None):
         self.context_level = parent_level + 1
+        self.autoescape = autoescape
         self.source_tag_state = list(source.split("."))
         self.source_tag = str(self.source_tag_state.pop(0))
         self.dataset = {}
@@ -53,8 +55,17 @@ class Context:
     # Process
     def process(self):
         logging.debug("start context (level: %s)", self.context_level)
-        processor = mprocessor.Processor(self.context_level)
-        self.result = processor.run(self.prepped_template, self.dataset)
+        processor = mprocessor.Processor(self.context_level, self.autoescape)
+        if self.context_level > 1:
+            self.result = processor.run(self.prepped_template, self.dataset)
+        else:
+            # Indexes and sorted lists hold the lists of the render, they
+            # are only kept while it runs
+            lookup.clear()
+            try:
+                self.result = processor.run(self.prepped_template, self.dataset)
+            finally:
+                lookup.clear()
         self.prepped_template = []
         logging.debug("completed context (level: %s)", self.context_level)
         return self.result
@@ -0,0 +1,187 @@
+#!/usr/bin/python3
+"""Djist: Fragment cache
+
+{% cache "key" var1 var2 %}...{% endcache %} renders its content once for
+each key, value of the listed variables, block content and autoescape
+setting. Rendered fragments are kept for the whole job, up to
+FRAGMENT_CACHE_SIZE MiB with the least recently used evicted first. With
+a FRAGMENT_CACHE_DIR, they are also saved there, one file each, for later
+runs, and the directory is trimmed to FRAGMENT_CACHE_DIR_SIZE MiB the
+same way (file modification times keep the order across runs).
+
+Partials and variables the block uses but doesn't list aren't part of the
+key, as in Django: list what the fragment depends on.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import logging
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from ..dataset import lazy
+from ..generics import msg
+from ..job import config as conf
+
+
+# Fragment files in the cache directory
+SUFFIX = ".fragment"
+
+MIB = 1024 * 1024
+
+
+def feed(digest, value):
+    """Add a dataset value to a digest, walking objects and lists"""
+    value = lazy.resolve(value)
+    if isinstance(value, Mapping):
+        digest.update(b"{")
+        for key in sorted(value, key=str):
+            feed(digest, key)
+            feed(digest, value[key])
+        digest.update(b"}")
+    elif isinstance(value, (list, tuple, lazy.LazySequence)):
+        digest.update(b"[")
+        for item in value:
+            feed(digest, item)
+        digest.update(b"]")
+    else:
+        digest.update(f"{type(value).__name__}:{value!r};".encode("utf-8"))
+
+
+def fragment_key(name: str, values: list, content: str, autoescape: bool) -> str:
+    """Hex digest of everything a fragment is rendered from, also used as
+    its file name"""
+    import hashlib  # pylint: disable=import-outside-toplevel
+
+    digest = hashlib.blake2b(digest_size=20)
+    feed(digest, [name, content, bool(autoescape), values])
+    return digest.hexdigest()
+
+
+class FragmentCache:
+    """Rendered fragments by key, in memory and in the cache directory"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.size = 0
+        # Sizes of the files in the cache directory, least recently used
+        # first, listed on first use
+        self.files = None
+        self.files_size = 0
+        # [hits, hits read from the directory, misses]
+        self.counts = [0, 0, 0]
+
+    def get(self, key: str) -> str or None:
+        text = self.entries.get(key)
+        if text is not None:
+            self.entries.move_to_end(key)
+            self.counts[0] += 1
+            return text
+        text = self.read(key)
+        if text is not None:
+            self.counts[1] += 1
+            self.keep(key, text)
+            return text
+        self.counts[2] += 1
+        return None
+
+    def put(self, key: str, text: str):
+        self.keep(key, text)
+        self.write(key, text)
+
+    def keep(self, key: str, text: str):
+        """Keep a fragment in memory, sized by its characters"""
+        limit = conf.FRAGMENT_CACHE_SIZE * MIB
+        if len(text) > limit:
+            return
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        self.entries[key] = text
+        self.size += len(text)
+        while self.size > limit:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def directory_files(self) -> OrderedDict:
+        if self.files is None:
+            self.files = OrderedDict()
+            found = []
+            try:
+                with os.scandir(conf.FRAGMENT_CACHE_DIR) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(SUFFIX) and entry.is_file():
+                            stat = entry.stat()
+                            found.append((stat.st_mtime, entry.name, stat.st_size))
+            except OSError:
+                pass
+            for _, name, size in sorted(found):
+                self.files[name] = size
+            self.files_size = sum(self.files.values())
+        return self.files
+
+    def read(self, key: str) -> str or None:
+        if not conf.FRAGMENT_CACHE_DIR:
+            return None
+        files = self.directory_files()
+        name = key + SUFFIX
+        if name not in files:
+            return None
+        path = os.path.join(conf.FRAGMENT_CACHE_DIR, name)
+        try:
+            with open(path, encoding="utf-8") as fragment_file:
+                text = fragment_file.read()
+            os.utime(path)
+        except OSError:
+            self.files_size -= files.pop(name)
+            return None
+        files.move_to_end(name)
+        return text
+
+    def write(self, key: str, text: str):
+        """Save a fragment to the cache directory, then trim it"""
+        if not conf.FRAGMENT_CACHE_DIR:
+            return
+        data = text.encode("utf-8")
+        limit = conf.FRAGMENT_CACHE_DIR_SIZE * MIB
+        if len(data) > limit:
+            return
+        files = self.directory_files()
+        name = key + SUFFIX
+        path = os.path.join(conf.FRAGMENT_CACHE_DIR, name)
+        # Written under another name first, so other runs never read half
+        # a fragment
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(conf.FRAGMENT_CACHE_DIR, exist_ok=True)
+            with open(temporary, "wb") as fragment_file:
+                fragment_file.write(data)
+            os.replace(temporary, path)
+        except OSError as err:
+            logging.warning(msg.FRAGMENT_CACHE_WRITE_ERROR, path, err)
+            return
+        self.files_size += len(data) - files.pop(name, 0)
+        files[name] = len(data)
+        while self.files_size > limit:
+            evicted, size = files.popitem(last=False)
+            self.files_size -= size
+            try:
+                os.remove(os.path.join(conf.FRAGMENT_CACHE_DIR, evicted))
+            except OSError:
+                pass
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+        self.files = None
+        self.files_size = 0
+        self.counts = [0, 0, 0]
+
+    def summary(self) -> tuple:
+        """(hits, hits read from the directory, misses, KiB kept in memory)"""
+        return tuple(self.counts) + (self.size / 1024,)
+
+
+# Fragments shared by every page of the job
+fragments = FragmentCache()
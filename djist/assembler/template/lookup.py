@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+"""Djist: Key paths and list indexes
+
+Key paths given to filters ("id", "stock.warehouse", "images.0") are
+compiled once into steps and walked without a processor. where and
+whereall index a list by the value at a key path the first time it is
+searched, and later searches of the same list answer from the index until
+the render ends (clear). dictsort keeps its sorted lists the same way, and
+regroup groups a list in one pass.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+from collections.abc import Mapping
+from functools import lru_cache
+from ..dataset import lazy
+
+
+# Returned by get_path when a step is missing
+MISSING = object()
+
+# ValueIndex by (list id, key path), with the list to keep its id in use
+indexes = {}
+
+# Sorted copies by (list id, sort keys, reverse), with the source list
+sorted_lists = {}
+
+# Sort rank of values by type, missing values sort last in any direction
+RANK_NUMBER = 0
+RANK_STRING = 1
+RANK_OTHER = 2
+RANK_MISSING = 3
+
+
+@lru_cache(maxsize=1024)
+def compile_path(key: str) -> tuple:
+    """Steps of a dotted key, as (name, list index or None) pairs"""
+    steps = []
+    for name in str(key).split("."):
+        index = int(name) if name.lstrip("-").isdigit() else None
+        steps.append((name, index))
+    return tuple(steps)
+
+
+def get_path(value, path: tuple, default=MISSING):
+    """Value at a compiled key path, or default if a step is missing"""
+    for name, index in path:
+        value = lazy.resolve(value)
+        if isinstance(value, Mapping):
+            value = value.get(name, MISSING)
+        elif isinstance(value, list) and index is not None:
+            value = value[index] if -len(value) <= index < len(value) else MISSING
+        elif isinstance(value, lazy.LazySequence) and index is not None:
+            try:
+                value = value.item(index)
+            except IndexError:
+                value = MISSING
+        else:
+            value = MISSING
+        if value is MISSING:
+            return default
+    return lazy.resolve(value)
+
+
+def convert(value_type: type, argument):
+    """Template argument as a value of value_type, MISSING if it can't be"""
+    if type(argument) is value_type:
+        return argument
+    try:
+        if value_type is bool and isinstance(argument, str):
+            return argument.strip().lower() in ("true", "1")
+        return value_type(argument)
+    except (TypeError, ValueError):
+        return MISSING
+
+
+def matches(value, argument) -> bool:
+    """A list item value equals the argument converted to its type"""
+    if value is None or value is MISSING or isinstance(value, (Mapping, list)):
+        return False
+    return value == convert(type(value), argument)
+
+
+class ValueIndex:
+    """Items of a list by (type, value) at a key path, with positions"""
+
+    def __init__(self, items: list, path: tuple):
+        self.items = items
+        self.buckets = {}
+        for position, item in enumerate(items):
+            value = get_path(item, path, None)
+            if value is None or isinstance(value, (Mapping, list)):
+                continue
+            self.buckets.setdefault((type(value), value), []).append(position)
+        self.types = list(dict.fromkeys(value_type for value_type, _ in self.buckets))
+
+    def positions(self, argument) -> list:
+        """Positions of the matching items, in list order"""
+        found = []
+        for value_type in self.types:
+            converted = convert(value_type, argument)
+            if converted is not MISSING:
+                found.append(self.buckets.get((value_type, converted), []))
+        found = [bucket for bucket in found if bucket]
+        if len(found) == 1:
+            return found[0]
+        return sorted(position for bucket in found for position in bucket)
+
+    def first(self, argument):
+        positions = self.positions(argument)
+        return self.items[positions[0]] if positions else None
+
+    def all(self, argument) -> list:
+        return [self.items[position] for position in self.positions(argument)]
+
+
+def index(items: list, key: str) -> ValueIndex:
+    """Index of a list by key, built on first use during the render"""
+    path = compile_path(key)
+    cache_key = (id(items), path)
+    entry = indexes.get(cache_key)
+    if entry is None or entry[0] is not items:
+        entry = (items, ValueIndex(items, path))
+        indexes[cache_key] = entry
+    return entry[1]
+
+
+@lru_cache(maxsize=256)
+def compile_sort(keys: str) -> tuple:
+    """Sort keys of a comma separated list, as (key path, descending)
+    pairs, where a key prefixed by - sorts in descending order"""
+    compiled = []
+    for key in str(keys).split(","):
+        key = key.strip()
+        descending = key.startswith("-")
+        compiled.append((compile_path(key.lstrip("-")), descending))
+    return tuple(compiled)
+
+
+def sort_key(value, descending: bool = False) -> tuple:
+    """Key ordering numbers before strings before other values, so mixed
+    types never compare, and missing values after everything else"""
+    if value is MISSING or value is None:
+        return (-1 if descending else RANK_MISSING, 0)
+    if isinstance(value, (bool, int, float)):
+        return (RANK_NUMBER, value)
+    if isinstance(value, str):
+        return (RANK_STRING, value)
+    return (RANK_OTHER, repr(value))
+
+
+def sort_items(items: list, keys: str, reverse: bool = False) -> list:
+    """Sorted copy of a list by comma separated key paths
+
+    Each key is one stable pass, from the last key to the first, and sort
+    keys are computed once per item and pass. The result is kept until
+    the render ends, so sorting the same list again is free.
+    """
+    cache_key = (id(items), keys, reverse)
+    entry = sorted_lists.get(cache_key)
+    if entry is not None and entry[0] is items:
+        return entry[1]
+    result = list(items)
+    for path, descending in reversed(compile_sort(keys)):
+        descending = descending != reverse
+        result.sort(
+            key=lambda item: sort_key(get_path(item, path), descending),
+            reverse=descending,
+        )
+    sorted_lists[cache_key] = (items, result)
+    return result
+
+
+def regroup(items, key: str) -> list:
+    """Items grouped by the value at a key path in one pass
+
+    Returns:
+        (list) - {"grouper": value, "list": items} per distinct value, in
+        order of first appearance, items in list order. Items missing the
+        key are grouped under None.
+    """
+    path = compile_path(key)
+    groups = {}
+    for item in items:
+        grouper = get_path(item, path, None)
+        # Objects and lists aren't hashable, their repr stands in
+        marker = (
+            type(grouper),
+            repr(grouper) if isinstance(grouper, (Mapping, list)) else grouper,
+        )
+        group = groups.get(marker)
+        if group is None:
+            group = groups[marker] = {"grouper": grouper, "list": []}
+        group["list"].append(item)
+    return list(groups.values())
+
+
+def clear():
+    """Forget the indexes and sorted lists, at the start and end of a
+    render"""
+    indexes.clear()
+    sorted_lists.clear()
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""Djist: Filter result memo
+
+Filters declared pure (token_filter.pure_filters, or registered with
+pure=True) return the same result for the same value and arguments, so
+their results are kept in a bounded LRU memo for the whole job: the same
+date or category name filtered in every loop iteration, or on every page,
+is only worked out once. Values and arguments that can't be hashed (lists,
+objects) aren't memoized.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+from collections import OrderedDict
+from ..job import config as conf
+
+
+# Returned by OrderedDict.get when a result isn't kept
+MISSING = object()
+
+
+class FilterMemo:
+    """Results of pure filter calls by (filter, value, arguments,
+    autoescape)"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        # [hits, misses, unhashable calls] by filter name
+        self.counts = {}
+
+    def call(self, filter_name: str, function, value, argument: list, proc):
+        """Result of function(value, argument, proc), from the memo if the
+        same call was made before"""
+        size = conf.FILTER_MEMO_SIZE
+        if size <= 0:
+            return function(value, argument, proc)
+        counts = self.counts.get(filter_name)
+        if counts is None:
+            counts = self.counts[filter_name] = [0, 0, 0]
+        # Types are part of the key, so 1, 1.0 and True are told apart, and
+        # filters building HTML escape their input under autoescape
+        key = (
+            filter_name,
+            type(value),
+            value,
+            tuple((type(item), item) for item in argument),
+            getattr(proc, "autoescape", False),
+        )
+        try:
+            result = self.entries.get(key, MISSING)
+        except TypeError:
+            counts[2] += 1
+            return function(value, argument, proc)
+        if result is not MISSING:
+            counts[0] += 1
+            self.entries.move_to_end(key)
+            return result
+        counts[1] += 1
+        result = function(value, argument, proc)
+        self.entries[key] = result
+        while len(self.entries) > size:
+            self.entries.popitem(last=False)
+        return result
+
+    def forget(self, filter_name: str):
+        """Drop the results of a filter, alone or in a fused run"""
+        for key in [key for key in self.entries if filter_name in key[0].split("|")]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+        self.counts.clear()
+
+    def summary(self) -> list:
+        """(filter, hits, misses, unhashable calls) per filter used, most
+        hits first"""
+        return sorted(
+            ((name,) + tuple(counts) for name, counts in self.counts.items()),
+            key=lambda entry: entry[1],
+            reverse=True,
+        )
+
+
+# Memo shared by every page of the job
+filters = FilterMemo()
+
+
+def memoized(filter_name: str, function):
+    """Filter function whose results are kept in the memo"""
+
+    def call(value, argument: list, proc):
+        return filters.call(filter_name, function, value, argument, proc)
+
+    call.__name__ = getattr(function, "__name__", filter_name)
+    call.__doc__ = function.__doc__
+    call.__wrapped__ = function
+    return call
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+"""Djist: Partial memo
+
+{% usetemplate "file" %} partials are read and scanned once per job. The
+scan lists the dataset paths a partial reads (scanner.DependencyScanner),
+and the values at those paths are fingerprinted on every inclusion: a
+partial included again with the same values, autoescape setting and
+djist_ settings, on the same page or another page of the job, reuses its
+rendered output. Rendered partials are kept up to PARTIAL_MEMO_SIZE MiB,
+the least recently used evicted first.
+
+Partials whose output can't be told from their inputs are always
+rendered: those including a partial named by a dataset value, or using
+tags of the registry or filters that aren't pure or built in (random).
+Lazy sequences (JSON Lines files, SQLite tables) stand in the fingerprint
+for their source, so it never reads them. An inclusion reading a lazy
+sequence without one (columnar lists) is rendered.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+from collections import OrderedDict
+from ..dataset import lazy, projection
+from ..generics import file
+from ..job import config as conf
+from . import fragment
+from . import registry
+from . import scanner as mscanner
+from . import tag as mtag
+
+
+# Built in filters whose result changes between calls
+IMPURE_FILTERS = ["random"]
+
+
+# Returned by stand_ins when a value can't be fingerprinted without reading
+# all of it
+UNKNOWN = object()
+
+
+class LazyIdentity:
+    """Stand-in of a lazy sequence in fingerprints"""
+
+    __slots__ = ("description",)
+
+    def __init__(self, sequence: lazy.LazySequence, identity: tuple):
+        self.description = (type(sequence).__name__,) + identity
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}{self.description!r}"
+
+
+def stand_ins(value):
+    """Projected value with lazy sequences replaced by their identity, or
+    UNKNOWN if one has none"""
+    if isinstance(value, lazy.LazySequence):
+        identity = value.identity()
+        if identity is None:
+            return UNKNOWN
+        return LazyIdentity(value, identity)
+    if isinstance(value, dict):
+        replaced = {}
+        for key, item in value.items():
+            item = stand_ins(item)
+            if item is UNKNOWN:
+                return UNKNOWN
+            replaced[key] = item
+        return replaced
+    if isinstance(value, list):
+        replaced = []
+        for item in value:
+            item = stand_ins(item)
+            if item is UNKNOWN:
+                return UNKNOWN
+            replaced.append(item)
+        return replaced
+    return value
+
+
+def deterministic_filter(name: str) -> bool:
+    """Filter giving the same result for the same value and arguments"""
+    info = registry.environment.filter(name)
+    if info is None:
+        return True
+    return info.pure or (info.builtin and name not in IMPURE_FILTERS)
+
+
+class PartialScanner(mscanner.DependencyScanner):
+    """Dataset paths read by a partial, None when its output may depend on
+    anything else"""
+
+    def add_token(self, token, scope: dict, whole: bool = True) -> tuple or None:
+        for filter_name, _ in token.get_filters():
+            if not deterministic_filter(filter_name):
+                self.dynamic = True
+        return super().add_token(token, scope, whole)
+
+    def visit_tag(self, action: mtag.Action, scope, multiplier, source: str):
+        if action.get_action() not in mtag.builtin_tags():
+            self.dynamic = True
+        super().visit_tag(action, scope, multiplier, source)
+
+    def visit_filter(self, action: mtag.Action, scope, multiplier, source: str):
+        for token in action.get_argument():
+            if token.is_name() and not deterministic_filter(token.get_value()):
+                self.dynamic = True
+        super().visit_filter(action, scope, multiplier, source)
+
+
+class PartialMemo:
+    """Partial templates by filename, and their rendered output by input
+    fingerprint"""
+
+    def __init__(self):
+        # (content, paths or None) by (filename, base location)
+        self.partials = {}
+        self.entries = OrderedDict()
+        self.size = 0
+        # [hits, misses, renders of partials that can't be memoized]
+        self.counts = [0, 0, 0]
+
+    def partial(self, filename: str, base_location: str) -> tuple:
+        """Content of a partial and the dataset paths it reads, read and
+        scanned on first use"""
+        found = self.partials.get((filename, base_location))
+        if found is None:
+            content = file.file_to_str(filename)
+            paths = None
+            if conf.PARTIAL_MEMO_SIZE > 0:
+                paths = PartialScanner(base_location).run(content)
+            found = self.partials[(filename, base_location)] = (content, paths)
+        return found
+
+    def render(self, proc, filename: str) -> str:
+        """Rendered partial, from the memo if it was rendered from the
+        same inputs before"""
+        base_location = ""
+        if proc.key_in_dataset("djist_base_location"):
+            base_location = proc.get_data("str", "djist_base_location")
+        content, paths = self.partial(filename, base_location)
+        values = UNKNOWN
+        if paths is not None and conf.PARTIAL_MEMO_SIZE > 0:
+            values = stand_ins(projection.project_dataset(proc.dataset, paths))
+        if values is UNKNOWN:
+            self.counts[2] += 1
+            return proc.new_context(content, {}, source="usetemplate")
+        # The content is the same for the whole job, so the filename
+        # stands for it
+        key = fragment.fragment_key(filename, [values], "", proc.autoescape)
+        rendered = self.entries.get(key)
+        if rendered is not None:
+            self.counts[0] += 1
+            self.entries.move_to_end(key)
+            return rendered
+        self.counts[1] += 1
+        rendered = proc.new_context(content, {}, source="usetemplate")
+        self.keep(key, rendered)
+        return rendered
+
+    def keep(self, key: str, text: str):
+        """Keep a rendered partial, sized by its characters"""
+        limit = conf.PARTIAL_MEMO_SIZE * fragment.MIB
+        if len(text) > limit:
+            return
+        self.entries[key] = text
+        self.size += len(text)
+        while self.size > limit:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self.partials.clear()
+        self.entries.clear()
+        self.size = 0
+        self.counts = [0, 0, 0]
+
+    def summary(self) -> tuple:
+        """(hits, misses, renders not memoized, KiB kept)"""
+        return tuple(self.counts) + (self.size / 1024,)
+
+
+# Partials shared by every page of the job
+partials = PartialMemo()
@@ -1,5 +1,9 @@
 #!/usr/bin/python3
 """Djist: Prepper
+
+Tags and their arguments are split with regular expressions when they are
+plain, which is nearly always. The pyparsing grammars are only built (and
+pyparsing imported) for the arguments the expressions leave.
 """
 __author__ = "llelse"
 __version__ = "0.2.0"
@@ -8,21 +12,139 @@ __license__ = "GPLv3"
 
 import logging
 import re
-from pyparsing import (
-    Combine,
-    printables,
-    ZeroOrMore,
-    MatchFirst,
-    Word,
-    quotedString,
-    CaselessKeyword,
-    delimitedList,
-)
+from functools import lru_cache
 from ..generics import core
+from . import registry
 from . import tag as mtag
 from . import token as mtoken
 
 
+# Tags with their own argument grammar, others use "all"
+ARGUMENT_TAGS = ("filter", "firstof", "for", "regroup", "use", "usedataset")
+
+# {{ }} and {% %} tags, as split by tag.match_tag
+REPLACE_TAG = re.compile(r"\{\{(.*?)(?:\}\}|%\}|#\})", re.DOTALL)
+ACTION_TAG = re.compile(r"\{%[ \t\r\n]*([A-Za-z]+)(.*?)(?:\}\}|%\}|#\})", re.DOTALL)
+
+
+@lru_cache(maxsize=1)
+def argument_grammar() -> dict:
+    """pyparsing grammar of the arguments of each tag in ARGUMENT_TAGS and
+    of all others"""
+    # pylint: disable-next=import-outside-toplevel
+    from pyparsing import (
+        Combine,
+        printables,
+        ZeroOrMore,
+        MatchFirst,
+        Word,
+        quotedString,
+        CaselessKeyword,
+    )
+
+    match_literal = quotedString
+    match_name = Word(printables, excludeChars="|:")
+    match_argument = ZeroOrMore(":" + MatchFirst(match_literal | match_name))
+    match_filter = ZeroOrMore("|" + match_name + match_argument)
+
+    match_lit_w_argument = match_literal + match_argument
+    match_name_w_argument = match_name + match_argument
+    match_literal_w_filter = Combine(match_lit_w_argument + match_filter)
+    match_name_w_filter = Combine(match_name_w_argument + match_filter)
+
+    return {
+        "all": ZeroOrMore(match_literal_w_filter | match_name_w_filter),
+        # 'if': ZeroOrMore(match_literal),
+        "filter": ZeroOrMore(match_name_w_filter),
+        "firstof": ZeroOrMore(match_literal | match_name),
+        "for": ZeroOrMore(
+            Combine(match_name_w_argument)
+            + CaselessKeyword("in")
+            + match_name_w_filter
+        ),
+        "regroup": MatchFirst(
+            match_name_w_filter
+            + CaselessKeyword("by")
+            + match_name
+            + CaselessKeyword("as")
+            + match_name
+        ),
+        # 'replace': MatchFirst(match_name_w_filter),
+        "use": MatchFirst(match_name_w_filter + CaselessKeyword("as") + match_name),
+        "usedataset": MatchFirst(
+            match_literal + ZeroOrMore(CaselessKeyword("as") + match_name_w_filter)
+        ),
+    }
+
+
+def is_keyword(token: str, keyword: str) -> bool:
+    return token.lower() == keyword
+
+
+def is_quoted(token: str) -> bool:
+    return token[0] in ("'", '"')
+
+
+def plain_arguments(action_tag: str, argument_string: str) -> list or None:
+    """Argument tokens of a tag as its grammar gives them, or None if the
+    grammar has to parse them
+
+    Keywords (in, by, as) are lowercased, as the grammar does.
+    """
+    tokens = mtoken.split_arguments(argument_string)
+    if tokens is None:
+        return None
+    count = len(tokens)
+    if action_tag == "filter":
+        plain = not any(is_quoted(token) for token in tokens)
+    elif action_tag == "firstof":
+        plain = all(mtoken.ATOM_PATTERN.fullmatch(token) for token in tokens)
+    elif action_tag == "for":
+        plain = count % 3 == 0 and all(
+            mtoken.NAME_ARGUMENT_PATTERN.fullmatch(tokens[index])
+            and is_keyword(tokens[index + 1], "in")
+            and not is_quoted(tokens[index + 2])
+            for index in range(0, count, 3)
+        )
+        keywords = range(1, count, 3)
+    elif action_tag == "regroup":
+        plain = (
+            count == 5
+            and not is_quoted(tokens[0])
+            and is_keyword(tokens[1], "by")
+            and mtoken.NAME_PATTERN.fullmatch(tokens[2])
+            and is_keyword(tokens[3], "as")
+            and mtoken.NAME_PATTERN.fullmatch(tokens[4])
+        )
+        keywords = (1, 3)
+    elif action_tag == "use":
+        plain = (
+            count == 3
+            and not is_quoted(tokens[0])
+            and is_keyword(tokens[1], "as")
+            and mtoken.NAME_PATTERN.fullmatch(tokens[2])
+        )
+        keywords = (1,)
+    elif action_tag == "usedataset":
+        plain = (
+            count % 2 == 1
+            and mtoken.LITERAL_PATTERN.fullmatch(tokens[0])
+            and all(
+                is_keyword(tokens[index], "as") and not is_quoted(tokens[index + 1])
+                for index in range(1, count, 2)
+            )
+        )
+        keywords = range(1, count, 2)
+    else:
+        plain = True
+    if not plain:
+        return None
+    if action_tag in ("for", "regroup", "use", "usedataset"):
+        for index in keywords:
+            tokens[index] = tokens[index].lower()
+    return tokens
+
+
 class Prepper:
     def __init__(self):
         self.prepped_template = [("ignore", "", "")]
@@ -30,49 +152,27 @@ class Prepper:
         self.tag_list = [("", "", "", 0, 0)]
         self.matching_tags = mtag.block_tags()
         self.multiblock_tags = mtag.multiblock_tags()
+        self.builtin_tags = set(mtag.builtin_tags())
         self.tag_patterns = {
             "all": r"((?s).*)",
             "tags_list": r"({#[\s\S]*?[\s\S]#})|({{[\s\S]*?[\s\S]}})|({%[\s\S]*?[\s\S]%})",
         }
 
-        self.match_literal = quotedString
-        self.match_name = Word(printables, excludeChars="|:")
-        self.match_argument = ZeroOrMore(
-            ":" + MatchFirst(self.match_literal | self.match_name)
-        )
-        self.match_filter = ZeroOrMore("|" + self.match_name + self.match_argument)
-
-        self.match_lit_w_argument = self.match_literal + self.match_argument
-        self.match_name_w_argument = self.match_name + self.match_argument
-        self.match_literal_w_filter = Combine(
-            self.match_lit_w_argument + self.match_filter
-        )
-        self.match_name_w_filter = Combine(
-            self.match_name_w_argument + self.match_filter
-        )
-
-        self.argument_patterns = {
-            "all": ZeroOrMore(self.match_literal_w_filter | self.match_name_w_filter),
-            # 'if': ZeroOrMore(self.match_literal),
-            "filter": ZeroOrMore(self.match_name_w_filter),
-            "firstof": ZeroOrMore(self.match_literal | self.match_name),
-            "for": ZeroOrMore(
-                Combine(self.match_name_w_argument)
-                + CaselessKeyword("in")
-                + self.match_name_w_filter
-            ),
-            # 'replace': MatchFirst(self.match_name_w_filter),
-            "use": MatchFirst(
-                self.match_name_w_filter + CaselessKeyword("as") + self.match_name
-            ),
-            "usedataset": MatchFirst(
-                self.match_literal
-                + ZeroOrMore(CaselessKeyword("as") + self.match_name_w_filter)
-            ),
-        }
-
     def is_block_tag(self, action_tag):
-        return action_tag in self.matching_tags.keys()
+        if action_tag in self.matching_tags.keys():
+            return True
+        if (
+            action_tag in self.builtin_tags
+            or self.is_end_tag(action_tag)
+            or self.is_multiblock_inner_tag(action_tag)
+        ):
+            return False
+        # Block tags of the registry are known once they are loaded
+        tag_info = registry.environment.tag(action_tag)
+        if tag_info is None or not tag_info.end_tag:
+            return False
+        self.matching_tags[action_tag] = tag_info.end_tag
+        return True
 
     def is_end_tag(self, action_tag):
         return action_tag in self.matching_tags.values()
@@ -108,14 +208,20 @@ class Prepper:
         # Tags with Verbatim arguments
         verbatim = action_tag in (None,)  # Add tag for verbatim tags
         expression = action_tag in mtag.expression_argument_tags()
-        if action_tag not in self.argument_patterns.keys():
+        if action_tag not in ARGUMENT_TAGS:
             action_tag = "all"
 
         if verbatim:
             token_list = [argument_string]
         else:
-            match = self.argument_patterns[action_tag]
-            token_list = delimitedList(match, " ").parseString(argument_string).asList()
+            token_list = plain_arguments(action_tag, argument_string)
+            if token_list is None:
+                # pylint: disable-next=import-outside-toplevel
+                from pyparsing import delimitedList
+
+                match = argument_grammar()[action_tag]
+                token_list = delimitedList(match, " ").parseString(argument_string)
+                token_list = token_list.asList()
 
         tokens = []
         for token_string in token_list:
@@ -125,6 +231,14 @@ class Prepper:
         return tuple(tokens)
 
     def split_tag(self, full_tag: str):
+        if full_tag.startswith("{{"):
+            match = REPLACE_TAG.match(full_tag)
+            if match is not None:
+                return ("replace", match.group(1).strip())
+        elif full_tag.startswith("{%"):
+            match = ACTION_TAG.match(full_tag)
+            if match is not None:
+                return (match.group(1).lower(), match.group(2).strip())
         decon_match = mtag.match_tag()["deconstruct"]
         decon_tag = decon_match.parseString(full_tag).asList()
         tag_group = decon_tag.pop(0)
@@ -6,21 +6,34 @@ __version__ = "0.2.0"
 __license__ = "GPLv3"
 
 
+import functools
 import logging
+from collections.abc import Mapping
+from ..dataset import columnar, lazy
+from ..dataset import source as msource
 from ..generics import core, file, msg
+from ..job import config as conf
 from . import context as mcontext
+from . import fragment
+from . import lookup
+from . import registry
+from . import safe as msafe
 from . import tag as mtag
 from . import token as mtoken
-from . import token_filter as tf
 
 
 class Processor:
-    def __init__(self, context_level: int):
+    def __init__(self, context_level: int, autoescape: bool = None):
         self.context_level = context_level
+        # Escape {{ }} output for HTML, the job setting unless a parent
+        # context or autoescape tag says otherwise
+        self.autoescape = conf.AUTOESCAPE if autoescape is None else autoescape
         self.processed_template = []
         self.dataset = {}
         self.dataset_keyset = {}
         self.tagselect = {
+            "autoescape": self.tag_autoescape,
+            "cache": self.tag_cache,
             "comment": self.tag_comment,
             "copy": self.tag_copy,
             "filter": self.tag_filter,
@@ -29,6 +42,7 @@ class Processor:
             "if": self.tag_if,
             "ignore": self.tag_ignore,
             "length": self.tag_length,
+            "regroup": self.tag_regroup,
             "replace": self.tag_replace,
             "use": self.tag_use,
             "usedataset": self.tag_usedataset,
@@ -52,14 +66,14 @@ class Processor:
                 for item in value:
                     index_added_key = f"{current_key + key}.{item_index}"
                     valid_set.add(index_added_key)
-                    if isinstance(item, (dict, list)):
+                    if isinstance(item, (Mapping, list)):
                         valid_set.update(
                             self.generate_dot_keys(item, current_key + key)
                         )
                         valid_set.update(self.generate_dot_keys(item, index_added_key))
                     item_index += 1
-            # Dictionary
-            elif isinstance(value, dict):
+            # Dictionary, or a row of a columnar list
+            elif isinstance(value, Mapping):
                 if core.not_empty(current_key) and not current_key.endswith("."):
                     current_key += "."
                 valid_set.add(current_key + key)
@@ -74,10 +88,38 @@ class Processor:
     def key_in_dataset(self, key: str, dataset: dict = None):
         if core.not_empty(key):
             if dataset is None:
-                return key in self.dataset_keyset
+                return key in self.dataset_keyset or self.key_in_lazy(key)
             else:
                 return key in self.generate_dot_keys(dataset)
 
+    def key_in_lazy(self, key: str) -> bool:
+        """Key below a lazy value, whose dot keys aren't generated
+
+        Lazily decoded values on the way are decoded to check the key.
+        """
+        if "." not in key:
+            return False
+        steps = key.split(".")
+        value = self.dataset
+        decoded = False
+        for step in steps:
+            if isinstance(value, lazy.LazyValue):
+                value = value.resolve()
+                decoded = True
+            if isinstance(value, Mapping):
+                if step not in value:
+                    return False
+                value = value.get(step)
+            elif isinstance(value, list) and step.lstrip("-").isdigit():
+                if not core.index_in_list(int(step), value):
+                    return False
+                value = value[int(step)]
+            else:
+                return False
+            if isinstance(value, lazy.LazySequence):
+                return True
+        return decoded
+
     def get_data(self, return_type: str = "copy", key: str = "", dataset: dict = None):
         return_value = key
         return_type = return_type.lower()
@@ -100,7 +142,8 @@ class Processor:
                 return_value = dataset.copy()
             key = key.split(".")
             for step in key:
-                if isinstance(return_value, dict):
+                return_value = lazy.resolve(return_value)
+                if isinstance(return_value, Mapping):
                     return_value = return_value.get(step)
                 elif isinstance(return_value, list):
                     try:
@@ -110,10 +153,18 @@ class Processor:
                         logging.error(msg.INVALID_LIST_INDEX, step)
                         return_value = None
                         break
+                elif isinstance(return_value, lazy.LazySequence):
+                    try:
+                        return_value = return_value.item(int(step))
+                    except (ValueError, IndexError):
+                        logging.error(msg.INVALID_LIST_INDEX, step)
+                        return_value = None
+                        break
                 else:
                     logging.error(msg.UNEXPECTED_TYPE, core.types(return_value))
                     return_value = None
                     break
+            return_value = lazy.resolve(return_value)
             actual_type = type(return_value)
             if return_type == "type":
                 return actual_type
@@ -168,32 +219,22 @@ class Processor:
         filtered_value = token_value
         tfilter = filter_value
         argument = filter_argument
-        if tfilter in tf.filter_select.keys():
-            selected_filter = tf.filter_select[tfilter]
+        filter_info = registry.environment.filter(tfilter)
+        if filter_info is not None:
+            selected_filter = filter_info.callable()
             filtered_value = selected_filter(filtered_value, argument, self)
         return filtered_value
 
     def resolve_filter(self, token, resolved_token) -> str or bool:
+        """Value passed through the token's compiled filter chain, only
+        arguments naming dataset keys are looked up here"""
         filtered_token = resolved_token
-        if token.is_filtered():  # and resolved_token is not None:
-            while token.has_next_filter():
-                token.load_next_filter()
-                filter_value = token.get_filter_value()
-                filter_argument_list = []
-                filter_argument = ""
-                while token.has_next_filter_argument():
-                    token.load_next_filter_argument()
-                    # filter_argument = token.get_filter_argument()
-                    if token.is_filter_argument_literal():
-                        filter_argument = token.get_filter_argument()
-                    elif token.is_filter_argument_name():
-                        filter_argument = self.get_data(
-                            "any", token.get_filter_argument()
-                        )
-                    filter_argument_list.append(filter_argument)
-                filtered_token = self.apply_filter(
-                    filtered_token, filter_value, filter_argument_list
-                )
+        for selected_filter, argument, named in token.compiled_filters():
+            if named:
+                argument = list(argument)
+                for position, key in named:
+                    argument[position] = self.get_data("any", key)
+            filtered_token = selected_filter(filtered_token, argument, self)
         return filtered_token
 
     def resolve_token(self, token):
@@ -246,8 +287,16 @@ class Processor:
                 evaluated = core.not_empty(evaluated)
         return evaluated
 
-    def new_context(self, template_segment: str, add_dataset: dict, source: str = ""):
-        newcontext = mcontext.Context(self.context_level, source)
+    def new_context(
+        self,
+        template_segment: str,
+        add_dataset: dict,
+        source: str = "",
+        autoescape: bool = None,
+    ):
+        if autoescape is None:
+            autoescape = self.autoescape
+        newcontext = mcontext.Context(self.context_level, source, autoescape)
         newcontext.set_dataset(self.get_data("copy"))
         newcontext.set_dataset(add_dataset)
         newcontext.set_template(template_segment)
@@ -259,7 +308,11 @@ class Processor:
         if action.get_action() in self.tagselect.keys():
             selected_tag = self.tagselect[action.get_action()]
         else:
-            selected_tag = self.tag_ignore
+            tag_info = registry.environment.tag(action.get_action())
+            if tag_info is not None:
+                selected_tag = functools.partial(tag_info.function, self)
+            else:
+                selected_tag = self.tag_ignore
         processed_action = selected_tag(action)
         try:
             processed_action = str(processed_action)
@@ -269,6 +322,39 @@ class Processor:
             core.close()
         return processed_action
 
+    def tag_autoescape(self, action: mtag.Action) -> str:
+        """autoescape on|off - Escaping of {{ }} output inside the block"""
+        arguments = action.get_argument()
+        setting = arguments[0].get_value().lower() if arguments else ""
+        if setting not in ("on", "off"):
+            logging.error(msg.AUTOESCAPE_ARGUMENT_ERROR, setting)
+            return self.new_context(action.get_content(), {}, source="autoescape")
+        return self.new_context(
+            action.get_content(), {}, source="autoescape", autoescape=setting == "on"
+        )
+
+    def tag_cache(self, action: mtag.Action) -> str:
+        """cache "key" var1 var2 - Content rendered once per key and value
+        of the listed variables, kept for the job and in the fragment cache
+        directory (fragment.py)"""
+        arguments, content = action.get()
+        if not arguments:
+            logging.error(msg.CACHE_ARGUMENT_ERROR, action)
+            return self.new_context(content, {}, source="cache")
+        if conf.FRAGMENT_CACHE_SIZE <= 0 and not conf.FRAGMENT_CACHE_DIR:
+            return self.new_context(content, {}, source="cache")
+        key = fragment.fragment_key(
+            self.resolve_token(arguments[0]),
+            [self.resolve_token(token) for token in arguments[1:]],
+            content,
+            self.autoescape,
+        )
+        rendered = fragment.fragments.get(key)
+        if rendered is None:
+            rendered = self.new_context(content, {}, source="cache")
+            fragment.fragments.put(key, rendered)
+        return rendered
+
     def tag_comment(self, action: mtag.Action):
         return ""
 
@@ -307,7 +393,7 @@ class Processor:
             dataset_name = arguments[2].get_value()
         if assigner == "in" and dataset_name:
             for_dataset = self.resolve_token(arguments[2])
-            if isinstance(for_dataset, list):
+            if isinstance(for_dataset, (list, lazy.LazySequence)):
                 try:
                     for item in for_dataset:
                         # if isinstance(item, (dict, list)):
@@ -358,8 +444,32 @@ class Processor:
                 length = str(len(self.get_data(data_type, first_token.get_value())))
         return length
 
+    def tag_regroup(self, action: mtag.Action) -> str:
+        """regroup list by key as name - Groups the items of a list by the
+        value at key, as a list of {grouper, list} in order of first
+        appearance
+
+        Unlike Django, the list doesn't have to be sorted by key first.
+        """
+        arguments = action.get_argument()
+        if len(arguments) != 5 or arguments[1].get_value().lower() != "by":
+            logging.error(msg.REGROUP_SYNTAX_ERROR, action)
+            return ""
+        source = self.resolve_token(arguments[0])
+        if isinstance(source, (list, lazy.LazySequence)):
+            groups = lookup.regroup(source, arguments[2].get_value())
+        else:
+            logging.error(msg.UNEXPECTED_TYPE, core.types(source))
+            groups = []
+        self.update_dataset({arguments[4].get_value(): groups})
+        return ""
+
     def tag_replace(self, action: mtag.Action):
-        replace_value = self.resolve_token(action.get_argument()[0])
+        token = action.get_argument()[0]
+        replace_value = self.resolve_token(token)
+        # Literals written in the template are output as they are
+        if self.autoescape and not (token.is_literal() and not token.is_filtered()):
+            replace_value = msafe.escape(replace_value)
         return replace_value
 
     def tag_use(self, action: mtag.Action) -> str:
@@ -375,12 +485,12 @@ class Processor:
         filename = self.resolve_token(arguments[0])
         filename = self.adjusted_filename(filename)
         if core.not_empty(filename):
-            dataset_content = file.json_to_dict(filename)
-            if arguments[1].get_value() == "as":
+            dataset_content = columnar.columnarize(msource.load(filename))
+            if len(arguments) > 2 and arguments[1].get_value() == "as":
                 name = arguments[2].get_value()
                 self.update_dataset({name: dataset_content})
             else:
-                self.update_dataset(dataset_content)
+                self.update_dataset(msource.named(filename, dataset_content))
         return ""
 
     def tag_usetemplate(self, action: mtag.Action):
@@ -394,9 +504,12 @@ class Processor:
         if filename:
             # Future: path lookup by keyword
             # filename = core.locate_path('dataset', filename)
+            # The partial memo scans templates, and the scanner imports
+            # this module
+            from . import partial  # pylint: disable=import-outside-toplevel
+
             filename = self.adjusted_filename(filename)
-            template_segment = file.file_to_str(filename)
-            return self.new_context(template_segment, {}, source="usetemplate")
+            return partial.partials.render(self, filename)
         return template
 
     def run(self, prepped_template: list, dataset: dict) -> str:
@@ -0,0 +1,298 @@
+#!/usr/bin/python3
+"""Djist: Filter and tag registry
+
+Filters and tags are looked up by name. Registered ones come first, so a
+filter registered under a built-in name (a faster version, say) replaces
+it, then the built-in filters of token_filter, then filters and tags
+published by installed packages under the djist.filters and djist.tags
+entry point groups. Entry points are only listed the first time a name
+isn't found, and a plugin module is only imported when one of its names
+is first used. Entry point filters give their metadata with
+filter_metadata, entry point block tags their end tag as an end_tag
+attribute.
+
+Example:
+    from djist.assembler.template import registry
+
+    @registry.environment.register_filter("shout", pure=True)
+    def shout_filter(value, argument, proc):
+        return str(value).upper() + "!"
+
+    # In a package's setup.py, for a lazily loaded filter
+    entry_points={"djist.filters": ["shout = mypackage.filters:shout_filter"]}
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+import logging
+import types
+from ..generics import msg
+from . import memo
+from . import token_filter as tf
+
+
+ENTRY_POINT_FILTERS = "djist.filters"
+ENTRY_POINT_TAGS = "djist.tags"
+
+# Attribute holding the register_filter metadata of an entry point filter
+METADATA_ATTRIBUTE = "djist_filter"
+
+# Code flags of *args and **kwargs parameters, as in inspect
+CO_VARARGS = 0x04
+CO_VARKEYWORDS = 0x08
+
+
+def takes_processor(function) -> bool:
+    """A filter function has a third parameter for the processor, assumed
+    for functions without a signature (C functions)"""
+    if isinstance(function, types.FunctionType) and not hasattr(
+        function, "__wrapped__"
+    ):
+        # Read from the code object, inspect is only imported for the rest
+        code = function.__code__
+        parameters = code.co_argcount + code.co_kwonlyargcount
+        parameters += bool(code.co_flags & CO_VARARGS)
+        parameters += bool(code.co_flags & CO_VARKEYWORDS)
+        return parameters >= 3
+    import inspect  # pylint: disable=import-outside-toplevel
+
+    try:
+        return len(inspect.signature(function).parameters) >= 3
+    except (TypeError, ValueError):
+        return True
+
+
+class FilterInfo:
+    """Filter function with its metadata
+
+    Attributes:
+        pure (bool) - result depends only on the value and arguments, so
+            it can be memoized for the job
+        boolean (bool) - result is a bool used by if expressions
+        defaults (tuple or None) - (types, values, disallowed) of its
+            arguments, as in token_filter.filter_defaults
+        needs_processor (bool) - called with the processor as third
+            argument
+        builtin (bool) - one of token_filter's filters
+    """
+
+    __slots__ = (
+        "name",
+        "function",
+        "pure",
+        "boolean",
+        "defaults",
+        "needs_processor",
+        "builtin",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        function,
+        pure: bool = False,
+        boolean: bool = False,
+        defaults: tuple = None,
+        needs_processor: bool = None,
+        builtin: bool = False,
+    ):
+        self.name = name
+        self.function = function
+        self.pure = pure
+        self.boolean = boolean
+        self.defaults = defaults
+        if needs_processor is None:
+            needs_processor = takes_processor(function)
+        self.needs_processor = needs_processor
+        self.builtin = builtin
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name})"
+
+    def callable(self):
+        """Function called as function(value, argument, proc)"""
+        if self.needs_processor:
+            return self.function
+        function = self.function
+
+        def call(value, argument: list, proc):
+            return function(value, argument)
+
+        call.__name__ = getattr(function, "__name__", self.name)
+        call.__wrapped__ = function
+        return call
+
+
+class TagInfo:
+    """Tag function, called as function(processor, action), and the end
+    tag of a block tag"""
+
+    __slots__ = ("name", "function", "end_tag")
+
+    def __init__(self, name: str, function, end_tag: str = None):
+        self.name = name
+        self.function = function
+        self.end_tag = end_tag
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name})"
+
+
+class Environment:
+    """Registered filters and tags, and those of installed plugins"""
+
+    def __init__(self):
+        self.filters = {}
+        self.tags = {}
+        # Entry points by name, loaded on first use
+        self.filter_entry_points = None
+        self.tag_entry_points = None
+
+    def register_filter(self, name: str, function=None, **metadata):
+        """Register a filter, used as a decorator without function
+
+        Arguments:
+            name (str) - filter name used in templates
+            function - filter function, called as (value, argument, proc),
+                or (value, argument) if it takes two parameters
+            metadata - pure, boolean, defaults and needs_processor, see
+                FilterInfo
+        """
+        if function is None:
+
+            def decorator(function):
+                self.register_filter(name, function, **metadata)
+                return function
+
+            return decorator
+        self.filters[name] = FilterInfo(name, function, **metadata)
+        filter_changed(name)
+        return function
+
+    def register_tag(self, name: str, function=None, end_tag: str = None):
+        """Register a tag, used as a decorator without function
+
+        Arguments:
+            name (str) - tag name used in templates
+            function - tag function, called as (processor, action), whose
+                result replaces the tag
+            end_tag (str) - end tag of a block tag, whose content is
+                action.get_content()
+        """
+        if function is None:
+
+            def decorator(function):
+                self.register_tag(name, function, end_tag)
+                return function
+
+            return decorator
+        self.tags[name] = TagInfo(name, function, end_tag)
+        return function
+
+    def filter(self, name: str) -> FilterInfo or None:
+        info = self.filters.get(name)
+        if info is not None:
+            return info
+        function = tf.filter_select.get(name)
+        if function is not None:
+            info = FilterInfo(
+                name,
+                function,
+                pure=name in tf.pure_filters,
+                boolean=name in tf.boolean_filters,
+                defaults=tf.filter_defaults.get(name),
+                builtin=True,
+            )
+        else:
+            info = self.load_filter(name)
+            if info is None:
+                return None
+        self.filters[name] = info
+        return info
+
+    def tag(self, name: str) -> TagInfo or None:
+        info = self.tags.get(name)
+        if info is None:
+            info = self.load_tag(name)
+            if info is not None:
+                self.tags[name] = info
+        return info
+
+    def block_tags(self) -> dict:
+        """End tags of the block tags loaded so far"""
+        return {name: info.end_tag for name, info in self.tags.items() if info.end_tag}
+
+    def load_filter(self, name: str) -> FilterInfo or None:
+        if self.filter_entry_points is None:
+            self.filter_entry_points = entry_points(ENTRY_POINT_FILTERS)
+        entry_point = self.filter_entry_points.get(name)
+        if entry_point is None:
+            return None
+        function = load(entry_point)
+        if function is None:
+            return None
+        metadata = getattr(function, METADATA_ATTRIBUTE, {})
+        filter_changed(name)
+        return FilterInfo(name, function, **metadata)
+
+    def load_tag(self, name: str) -> TagInfo or None:
+        if self.tag_entry_points is None:
+            self.tag_entry_points = entry_points(ENTRY_POINT_TAGS)
+        entry_point = self.tag_entry_points.get(name)
+        if entry_point is None:
+            return None
+        function = load(entry_point)
+        if function is None:
+            return None
+        return TagInfo(name, function, getattr(function, "end_tag", None))
+
+
+def filter_changed(name: str):
+    """Filter chains compiled, and results memoized, before a filter was
+    registered or loaded are dropped, as they may hold an earlier filter
+    of that name or have skipped it as unknown"""
+    tf.compile_chain.cache_clear()
+    memo.filters.forget(name)
+
+
+def entry_points(group: str) -> dict:
+    """Entry points of a group by name, without loading them"""
+    from importlib import metadata  # pylint: disable=import-outside-toplevel
+
+    try:
+        found = metadata.entry_points(group=group)
+    except TypeError:
+        # Python before 3.10
+        found = metadata.entry_points().get(group, [])
+    return {entry_point.name: entry_point for entry_point in found}
+
+
+def load(entry_point):
+    try:
+        return entry_point.load()
+    except Exception as err:  # pylint: disable=broad-except
+        logging.error(msg.PLUGIN_LOAD_ERROR, entry_point.name, entry_point.value, err)
+        return None
+
+
+def filter_metadata(**metadata):
+    """Decorator giving the register_filter metadata of a filter published
+    as an entry point
+
+    Example:
+        @filter_metadata(pure=True, defaults=([(str, int)], ["2"], [("",)]))
+        def repeat_filter(value, argument, proc):
+            ...
+    """
+
+    def decorator(function):
+        setattr(function, METADATA_ATTRIBUTE, metadata)
+        return function
+
+    return decorator
+
+
+# Registry used by templates
+environment = Environment()
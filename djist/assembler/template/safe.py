@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""Djist: Safe strings and escaping
+
+With autoescape on, values are HTML-escaped once, when a {{ }} tag emits
+them. Strings that are already safe for HTML (escaped by a filter, HTML
+built by a filter, or marked with safe/safeseq) are SafeString and are
+never escaped or scanned again.
+
+Escapes are kept as translate tables, but applied as one str.replace per
+escaped character present in the string: CPython translates strings with
+tables of longer replacements character by character, many times slower
+than replace.
+"""
+__author__ = "llelse"
+__version__ = "0.2.0"
+__license__ = "GPLv3"
+
+
+HTML_ESCAPES = str.maketrans(
+    {
+        "&": "&amp;",
+        "<": "&lt;",
+        ">": "&gt;",
+        '"': "&quot;",
+        "'": "&#x27;",
+    }
+)
+
+# Characters escaped for JavaScript strings, as in Django's escapejs
+JS_ESCAPES = str.maketrans(
+    {
+        **{chr(code): f"\\u{code:04X}" for code in range(32)},
+        "\\": "\\u005C",
+        "'": "\\u0027",
+        '"': "\\u0022",
+        ">": "\\u003E",
+        "<": "\\u003C",
+        "&": "\\u0026",
+        "=": "\\u003D",
+        "-": "\\u002D",
+        ";": "\\u003B",
+        "`": "\\u0060",
+        "\u2028": "\\u2028",
+        "\u2029": "\\u2029",
+    }
+)
+
+
+def ordered_replacements(table: dict) -> tuple or None:
+    """(character, replacement) pairs doing what table does when applied
+    one after the other, or None if there is no such order
+
+    A character is replaced before the characters whose replacement holds
+    it, so no replacement is replaced again ("&" before "<" for "&lt;").
+    """
+    pending = {chr(code): replacement or "" for code, replacement in table.items()}
+    ordered = []
+    while pending:
+        ready = [
+            character
+            for character, replacement in pending.items()
+            if not any(other in replacement for other in pending if other != character)
+        ]
+        if not ready:
+            return None
+        for character in ready:
+            ordered.append((character, pending.pop(character)))
+    return tuple(ordered)
+
+
+def replace_all(value: str, replacements: tuple) -> str:
+    """value with the ordered replacements made, skipping characters it
+    doesn't hold"""
+    for character, replacement in replacements:
+        if character in value:
+            value = value.replace(character, replacement)
+    return value
+
+
+HTML_REPLACEMENTS = ordered_replacements(HTML_ESCAPES)
+JS_REPLACEMENTS = ordered_replacements(JS_ESCAPES)
+
+
+class SafeString(str):
+    """String safe for HTML output as it is"""
+
+    __slots__ = ()
+
+    def __html__(self):
+        return self
+
+
+def mark_safe(value) -> SafeString:
+    if isinstance(value, SafeString):
+        return value
+    return SafeString(value)
+
+
+def is_safe(value) -> bool:
+    return isinstance(value, SafeString)
+
+
+def escape(value) -> SafeString:
+    """HTML-escaped string of value, safe strings unchanged"""
+    if isinstance(value, SafeString):
+        return value
+    return SafeString(replace_all(str(value), HTML_REPLACEMENTS))
+
+
+def force_escape(value) -> SafeString:
+    """HTML-escaped string of value, even if it is already safe"""
+    return SafeString(replace_all(str(value), HTML_REPLACEMENTS))
+
+
+def escapejs(value) -> SafeString:
+    """String of value escaped for use in JavaScript strings"""
+    return SafeString(replace_all(str(value), JS_REPLACEMENTS))
+
+
+def conditional_escape(value, autoescape: bool):
+    """Value escaped if autoescape is on"""
+    return escape(value) if autoescape else value
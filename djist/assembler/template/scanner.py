@@ -6,12 +6,38 @@ __version__ = "0.2.0"
 __license__ = "GPLv3"
 
 
+import sys
+from collections.abc import Mapping
+from itertools import islice
 from . import prepper as mprepper
-from ..generics import file
+from ..dataset import lazy
+from ..dataset import source as msource
+from ..generics import core, file, msg
+from ..template import lookup
 from ..template import tag as mtag
 from ..job import config as conf
 
 
+# Filters returning a single item of the list they are applied to
+item_filters = ["first", "last", "random", "where"]
+
+# Filters taking a key of the list items as first (literal) argument
+key_filters = [
+    "avg",
+    "count_by",
+    "dictsort",
+    "dictsortreversed",
+    "group_by",
+    "map",
+    "max",
+    "min",
+    "sum",
+    "unique",
+    "where",
+    "whereall",
+]
+
+
 class Scanner:
     """Djist Template Scanner"""
 
@@ -48,4 +74,390 @@ class Scanner:
             for token in action.get_argument():
                 token_argument(token)
 
-        file.write_io(conf.IO_OUTFILE, "scan", self.value_list)
+        file.write_io(conf.IO_OUTFILE or sys.stdout, "scan", self.value_list)
+
+    def cost(self, dataset: dict = None, source: str = "template") -> list:
+        """Estimate the work needed to process the template with a dataset
+
+        Returns:
+            list: Report lines, most expensive constructs first
+        """
+        estimator = CostEstimator(dataset)
+        estimator.walk(self.prepped_template, estimator.root_scope(), 1, source)
+        return estimator.report(conf.SCAN_COST_TOP)
+
+
+class Walker:
+    """Walks the full nested template: block contents and usetemplate partials
+
+    Subclasses implement visit_<tag> methods, other tags go to visit_tag.
+    """
+
+    def __init__(self, base_location: str = ""):
+        self.base_location = base_location
+        self.include_stack = []
+        self.skipped = ["ignore", "copy", "comment"]
+
+    def prep(self, raw_template: str) -> list:
+        return mprepper.Prepper().run(raw_template)
+
+    def walk(self, prepped_template: list, scope, multiplier, source: str):
+        for action in prepped_template:
+            action: mtag.Action
+            action_tag = action.get_action()
+            if action_tag in self.skipped:
+                continue
+            visit = getattr(self, f"visit_{action_tag}", self.visit_tag)
+            visit(action, scope, multiplier, source)
+
+    def walk_content(self, content: str, scope, multiplier, source: str):
+        if core.not_empty(content.strip()):
+            self.walk(self.prep(content), scope, multiplier, source)
+
+    def partial(self, action: mtag.Action) -> tuple:
+        """Filename and content of a usetemplate partial, if it can be read
+
+        Partials named by a dataset value can't be followed statically.
+        """
+        token = action.get_argument()[0]
+        if not token.is_literal():
+            return (None, None)
+        filename = token.get_value()
+        if self.base_location:
+            filename = file.path_join(self.base_location, filename)
+        if filename in self.include_stack:
+            return (filename, None)
+        return (filename, file.file_to_str(filename))
+
+    def walk_partial(self, action: mtag.Action, scope, multiplier) -> str:
+        filename, content = self.partial(action)
+        if content:
+            self.include_stack.append(filename)
+            self.walk_content(content, scope, multiplier, filename)
+            self.include_stack.pop()
+        return filename
+
+    def visit_tag(self, action: mtag.Action, scope, multiplier, source: str):
+        pass
+
+    def visit_autoescape(self, action: mtag.Action, scope, multiplier, source: str):
+        self.walk_content(action.get_content(), scope, multiplier, source)
+
+    def visit_cache(self, action: mtag.Action, scope, multiplier, source: str):
+        # The listed variables are read, then the content, when it isn't
+        # cached yet
+        self.visit_tag(action, scope, multiplier, source)
+        self.walk_content(action.get_content(), scope, multiplier, source)
+
+
+class CostEstimator(Walker):
+    """Static estimate of loop trips, filter invocations and include fan-out
+
+    Every construct is weighted by the trip counts of its enclosing loops.
+    Loop trip counts are the average length of the lists a dataset provides,
+    or unknown_trips if the list can't be resolved. All branches of an if
+    are counted, so the estimate is an upper bound.
+    """
+
+    def __init__(self, dataset: dict = None):
+        dataset = dataset or {}
+        super().__init__(dataset.get("djist_base_location", ""))
+        self.dataset = dataset
+        self.entries = []
+        self.unknown_trips = conf.SCAN_COST_UNKNOWN_TRIPS
+        self.max_samples = 1000
+
+    def root_scope(self) -> dict:
+        return {key: [value] for key, value in self.dataset.items()}
+
+    def resolve(self, key: str, scope: dict) -> list:
+        """All values a dotted key can take in the current scope"""
+        steps = key.split(".")
+        values = list(scope.get(steps[0], []))
+        for step in steps[1:]:
+            next_values = []
+            for value in values:
+                value = lazy.resolve(value)
+                if isinstance(value, Mapping) and step in value:
+                    next_values.append(value[step])
+                elif isinstance(value, list) and step.lstrip("-").isdigit():
+                    if core.index_in_list(int(step), value):
+                        next_values.append(value[int(step)])
+            values = next_values
+        return [lazy.resolve(value) for value in values]
+
+    def add(self, source: str, action: mtag.Action, executions: float, **counts):
+        filters = counts.get("filters", 0)
+        contexts = counts.get("contexts", 0)
+        self.entries.append(
+            {
+                "source": source,
+                "tag": self.describe(action),
+                "executions": executions,
+                "filters": filters * executions,
+                "contexts": contexts,
+                "includes": counts.get("includes", 0),
+                "note": counts.get("note", ""),
+                "score": executions
+                + filters * executions
+                + contexts * conf.SCAN_COST_CONTEXT_WEIGHT,
+            }
+        )
+
+    def describe(self, action: mtag.Action) -> str:
+        tokens = " ".join(token.token_string for token in action.get_argument())
+        if action.get_action() == "replace":
+            return f"{{{{ {tokens} }}}}"
+        return f"{{% {action.get_action()} {tokens} %}}".replace("  ", " ")
+
+    def filter_count(self, action: mtag.Action) -> int:
+        count = 0
+        for token in action.get_argument():
+            count += len(token.get_filters())
+        return count
+
+    def visit_tag(self, action: mtag.Action, scope, multiplier, source: str):
+        self.add(source, action, multiplier, filters=self.filter_count(action))
+
+    def visit_for(self, action: mtag.Action, scope, multiplier, source: str):
+        arguments, content = action.get()
+        if len(arguments) != 3:
+            return self.visit_tag(action, scope, multiplier, source)
+        loop_key = arguments[0].get_value()
+        lists = [
+            value
+            for value in self.resolve(arguments[2].get_value(), scope)
+            if isinstance(value, (list, lazy.LazySequence))
+        ]
+        note = ""
+        if lists:
+            trips = sum(len(value) for value in lists) / len(lists)
+            items = []
+            for value in lists:
+                items.extend(islice(value, self.max_samples - len(items)))
+        else:
+            trips = self.unknown_trips
+            items = []
+            note = msg.SCAN_COST_UNKNOWN_TRIPS % trips
+        iterations = multiplier * trips
+        self.add(
+            source,
+            action,
+            multiplier,
+            filters=self.filter_count(action),
+            contexts=iterations,
+            note=note or msg.SCAN_COST_TRIPS % trips,
+        )
+        self.walk_content(content, {**scope, loop_key: items}, iterations, source)
+
+    def visit_if(self, action: mtag.Action, scope, multiplier, source: str):
+        filters = 0
+        for block_action, argument, content in action.blocks():
+            for token in argument:
+                filters += len(token.get_filters())
+        self.add(source, action, multiplier, filters=filters, contexts=multiplier)
+        for block_action, argument, content in action.blocks():
+            self.walk_content(content, dict(scope), multiplier, source)
+
+    def visit_filter(self, action: mtag.Action, scope, multiplier, source: str):
+        self.add(
+            source,
+            action,
+            multiplier,
+            filters=len(action.get_argument()) + self.filter_count(action),
+            contexts=multiplier,
+        )
+        self.walk_content(action.get_content(), dict(scope), multiplier, source)
+
+    def visit_use(self, action: mtag.Action, scope, multiplier, source: str):
+        self.visit_tag(action, scope, multiplier, source)
+        arguments = action.get_argument()
+        if len(arguments) == 3 and arguments[0].is_name():
+            values = self.resolve(arguments[0].get_value(), scope)
+            filter_names = [name for name, args in arguments[0].get_filters()]
+            if any(name in item_filters for name in filter_names):
+                values = [
+                    item for value in values if isinstance(value, list) for item in value
+                ][: self.max_samples]
+            scope[arguments[2].get_value()] = values
+
+    def visit_regroup(self, action: mtag.Action, scope, multiplier, source: str):
+        self.visit_tag(action, scope, multiplier, source)
+        arguments = action.get_argument()
+        if len(arguments) == 5:
+            scope[arguments[4].get_value()] = [
+                lookup.regroup(value, arguments[2].get_value())
+                for value in self.resolve(arguments[0].get_value(), scope)
+                if isinstance(value, (list, lazy.LazySequence))
+            ]
+
+    def visit_usedataset(self, action: mtag.Action, scope, multiplier, source: str):
+        self.visit_tag(action, scope, multiplier, source)
+        arguments = action.get_argument()
+        filename = arguments[0].get_value()
+        if self.base_location:
+            filename = file.path_join(self.base_location, filename)
+        content = msource.load(filename)
+        if len(arguments) == 3 and arguments[1].get_value() == "as":
+            scope[arguments[2].get_value()] = [content]
+        else:
+            named = msource.named(filename, content)
+            scope.update({key: [value] for key, value in named.items()})
+
+    def visit_usetemplate(self, action: mtag.Action, scope, multiplier, source: str):
+        filename, content = self.partial(action)
+        note = ""
+        if filename is None:
+            note = msg.SCAN_COST_DYNAMIC_PARTIAL
+        elif content is None:
+            note = msg.SCAN_COST_MISSING_PARTIAL % filename
+        self.add(
+            source,
+            action,
+            multiplier,
+            filters=self.filter_count(action),
+            contexts=multiplier,
+            includes=multiplier,
+            note=note,
+        )
+        self.walk_partial(action, dict(scope), multiplier)
+
+    def report(self, top: int = 10) -> list:
+        totals = {
+            key: sum(entry[key] for entry in self.entries)
+            for key in ("executions", "filters", "contexts", "includes")
+        }
+        lines = [
+            msg.SCAN_COST_TOTALS
+            % (
+                totals["contexts"],
+                totals["filters"],
+                totals["includes"],
+                totals["executions"],
+            ),
+            "",
+            f"{'score':>12} {'contexts':>10} {'filters':>10} {'runs':>10}  construct",
+        ]
+        ordered = sorted(self.entries, key=lambda entry: entry["score"], reverse=True)
+        for entry in ordered[:top]:
+            lines.append(
+                f"{entry['score']:>12.0f} {entry['contexts']:>10.0f} "
+                f"{entry['filters']:>10.0f} {entry['executions']:>10.0f}  "
+                f"{entry['tag']} [{entry['source']}] {entry['note']}".rstrip()
+            )
+        return lines
+
+
+class DependencyScanner(Walker):
+    """Dataset paths read by a template
+
+    Paths are collected through nested blocks and partials. For loop
+    variables and use aliases are mapped back to their source, and names
+    from datasets loaded inside the template are left out. If a partial is
+    named by a dataset value, the dependencies can't be known and run
+    returns None.
+    """
+
+    def __init__(self, base_location: str = ""):
+        super().__init__(base_location)
+        self.paths = []
+        self.partials = []
+        self.dynamic = False
+
+    def run(self, raw_template: str) -> list or None:
+        """Dataset paths as (steps, whole) pairs, or None if unknown"""
+        self.walk_content(raw_template, {}, 1, "template")
+        if self.dynamic:
+            return None
+        return self.paths
+
+    def source_path(self, key: str, scope: dict) -> tuple or None:
+        steps = tuple(key.split("."))
+        if steps[0] in scope:
+            if scope[steps[0]] is None:
+                return None
+            return scope[steps[0]] + steps[1:]
+        return steps
+
+    def add_path(self, key: str, scope: dict, whole: bool = True) -> tuple or None:
+        path = self.source_path(key, scope)
+        if path is not None:
+            self.paths.append((path, whole))
+        return path
+
+    def add_token(self, token, scope: dict, whole: bool = True) -> tuple or None:
+        path = None
+        if token.is_name() and not token.is_operator():
+            path = self.add_path(token.get_value(), scope, whole)
+            if token.is_argument_name():
+                self.add_path(token.get_argument(), scope)
+        for filter_name, filter_arguments in token.get_filters():
+            for index, (argument, argument_type) in enumerate(filter_arguments):
+                if argument_type == "name":
+                    self.add_path(argument, scope)
+                elif index == 0 and filter_name in key_filters and path:
+                    self.paths.append((path + tuple(argument.split(".")), True))
+                elif index == 1 and filter_name in ("where", "whereall"):
+                    # The value to match may also name a dataset key
+                    self.add_path(argument, scope)
+        return path
+
+    def visit_tag(self, action: mtag.Action, scope, multiplier, source: str):
+        for token in action.get_argument():
+            self.add_token(token, scope)
+
+    def visit_for(self, action: mtag.Action, scope, multiplier, source: str):
+        arguments, content = action.get()
+        if len(arguments) != 3:
+            return self.visit_tag(action, scope, multiplier, source)
+        path = self.add_token(arguments[2], scope, whole=False)
+        loop_scope = {**scope, arguments[0].get_value(): path}
+        self.walk_content(content, loop_scope, multiplier, source)
+
+    def visit_if(self, action: mtag.Action, scope, multiplier, source: str):
+        for block_action, argument, content in action.blocks():
+            for token in argument:
+                self.add_token(token, scope)
+            self.walk_content(content, dict(scope), multiplier, source)
+
+    def visit_filter(self, action: mtag.Action, scope, multiplier, source: str):
+        for token in action.get_argument():
+            if token.is_argument_name():
+                self.add_path(token.get_argument(), scope)
+            for filter_name, filter_arguments in token.get_filters():
+                for argument, argument_type in filter_arguments:
+                    if argument_type == "name":
+                        self.add_path(argument, scope)
+        self.walk_content(action.get_content(), dict(scope), multiplier, source)
+
+    def visit_use(self, action: mtag.Action, scope, multiplier, source: str):
+        arguments = action.get_argument()
+        if len(arguments) != 3:
+            return self.visit_tag(action, scope, multiplier, source)
+        path = self.add_token(arguments[0], scope, whole=False)
+        scope[arguments[2].get_value()] = path
+
+    def visit_regroup(self, action: mtag.Action, scope, multiplier, source: str):
+        arguments = action.get_argument()
+        if len(arguments) != 5:
+            return self.visit_tag(action, scope, multiplier, source)
+        # Groups hold the items themselves, whose reads can't be followed
+        # back through grouper and list, so the whole list is kept
+        self.add_token(arguments[0], scope)
+        scope[arguments[4].get_value()] = None
+
+    def visit_usedataset(self, action: mtag.Action, scope, multiplier, source: str):
+        arguments = action.get_argument()
+        self.add_token(arguments[0], scope)
+        if len(arguments) == 3 and arguments[1].get_value() == "as":
+            scope[arguments[2].get_value()] = None
+
+    def visit_usetemplate(self, action: mtag.Action, scope, multiplier, source: str):
+        token = action.get_argument()[0]
+        if not token.is_literal():
+            self.add_token(token, scope)
+            self.dynamic = True
+            return
+        filename = self.walk_partial(action, dict(scope), multiplier)
+        if filename:
+            self.partials.append(filename)
@@ -6,7 +6,6 @@ __version__ = "0.2.0"
 __license__ = "GPLv3"
 
 
-from pyparsing import alphas, MatchFirst, Word, SkipTo
 from . import prepper as mprepper
 
 
@@ -18,6 +17,9 @@ def tag_identifiers():
 
 
 def match_tag():
+    # pylint: disable-next=import-outside-toplevel
+    from pyparsing import alphas, MatchFirst, Word, SkipTo
+
     return {
         "deconstruct": MatchFirst(["{{", "{%" + Word(alphas), "{#"])
         + SkipTo(MatchFirst(tag_identifiers()["close"])),
@@ -30,6 +32,8 @@ def valid_tags():
 
 def block_tags():
     return {
+        "autoescape": "endautoescape",
+        "cache": "endcache",
         "comment": "endcomment",
         "filter": "endfilter",
         "for": "endfor",
@@ -38,6 +42,27 @@ def block_tags():
     }
 
 
+def builtin_tags():
+    """Tags of the Processor, looked up in the registry otherwise"""
+    return [
+        "autoescape",
+        "cache",
+        "comment",
+        "copy",
+        "filter",
+        "firstof",
+        "for",
+        "if",
+        "ignore",
+        "length",
+        "regroup",
+        "replace",
+        "use",
+        "usedataset",
+        "usetemplate",
+    ]
+
+
 def multiblock_tags():
     return {
         "if": ["elif", "else"],
@@ -96,6 +121,13 @@ class Action:
             leading_action = self.multiblock_list.pop(0)
             self.content = leading_action.get_content()
 
+    def blocks(self) -> list:
+        """Every block of a multiblock action as (action, argument, content),
+        without moving to the next block"""
+        blocks = [self.get_all()]
+        blocks.extend(block.get_all() for block in self.multiblock_list)
+        return blocks
+
     def has_next(self):
         return len(self.multiblock_list) > 0
 
@@ -1,24 +1,39 @@
 #!/usr/bin/env python3
 """Djist: Tokens used for tag arguments
+
+Plain tokens (a quoted literal or a name, with :arguments and |filters) are
+split with regular expressions. Anything else, such as escaped quotes or
+non-ASCII names, is left to the pyparsing grammar, which is only imported
+when such a token is first met.
 """
 __author__ = "llelse"
 __version__ = "0.2.0"
 __license__ = "GPLv3"
 
 
-from pyparsing import (
-    Combine,
-    printables,
-    ZeroOrMore,
-    MatchFirst,
-    Word,
-    quotedString,
-    Group,
-    delimitedList,
-)
+import re
+from functools import lru_cache
+from . import registry
 from . import token_filter as tf
 
 
+# Quoted literal without escapes, or a name of ASCII printables other than
+# quotes, backslash, | and :
+LITERAL = r"""(?:"[^"\\\n\r]*"|'[^'\\\n\r]*')"""
+NAME = r"[!#-&(-9;-\[\]-{}~]+"
+ATOM = f"(?:{LITERAL}|{NAME})"
+TOKEN = rf"{ATOM}(?::{ATOM})*(?:\|{NAME}(?::{ATOM})*)*"
+SPACE = r"[ \t\r\n]"
+
+ATOM_PATTERN = re.compile(ATOM)
+LITERAL_PATTERN = re.compile(LITERAL)
+NAME_PATTERN = re.compile(NAME)
+NAME_ARGUMENT_PATTERN = re.compile(f"{NAME}(?::{ATOM})*")
+TOKEN_PATTERN = re.compile(TOKEN)
+TOKEN_PARTS = re.compile(f"([:|]?)({ATOM})")
+ARGUMENTS_PATTERN = re.compile(f"{SPACE}*(?:{TOKEN}(?:{SPACE}+{TOKEN})*)?{SPACE}*")
+
+
 expression_operators = [
     "+",
     "in",
@@ -48,6 +63,57 @@ expression_operators = [
 ]
 
 
+def split_arguments(argument_string: str) -> list or None:
+    """Plain tokens of a tag argument string, None if it holds anything
+    else"""
+    if ARGUMENTS_PATTERN.fullmatch(argument_string) is None:
+        return None
+    return TOKEN_PATTERN.findall(argument_string)
+
+
+def split_token(token_string: str) -> list or None:
+    """Parts of a plain token as the pyparsing grammar groups them,
+    [[value, ":argument", ...], [["|filter", ":argument", ...], ...]], None
+    if it isn't plain"""
+    if TOKEN_PATTERN.fullmatch(token_string) is None:
+        return None
+    value = []
+    filters = []
+    current = value
+    for prefix, text in TOKEN_PARTS.findall(token_string):
+        if prefix == "|":
+            current = ["|" + text]
+            filters.append(current)
+        else:
+            current.append(prefix + text)
+    return [value, filters]
+
+
+@lru_cache(maxsize=1)
+def token_grammar():
+    """pyparsing grammar of a token, for tokens split_token leaves"""
+    # pylint: disable-next=import-outside-toplevel
+    from pyparsing import (
+        Combine,
+        printables,
+        ZeroOrMore,
+        MatchFirst,
+        Word,
+        quotedString,
+        Group,
+        delimitedList,
+    )
+
+    match_literal = quotedString
+    match_name = Word(printables, excludeChars="|:")
+    match_argument = ZeroOrMore(Combine(":" + MatchFirst(match_literal | match_name)))
+    match_filter = Group(ZeroOrMore(Group(Combine("|" + match_name) + match_argument)))
+    match = (Group(match_literal + match_argument) + match_filter) | (
+        Group(match_name + match_argument) + match_filter
+    )
+    return delimitedList(match, " ")
+
+
 class Token:
     def __init__(self):
         self.token_string = ""
@@ -72,6 +138,9 @@ class Token:
         self.filter_argument_is_literal = False
         self.filter_argument_is_name = False
         self.filter_is_boolean = False
+        # (name, ((argument, type), ...)) per filter, and its compiled form
+        self.filter_chain = ()
+        self.compiled_chain = None
 
     def __str__(self):
         return str(self.__class__) + ": " + str(self.__dict__)
@@ -94,22 +163,12 @@ class Token:
         self.is_verbatim_ = verbatim
         self.is_expression_ = expression
 
-        match_literal = quotedString
-        match_name = Word(printables, excludeChars="|:")
-        match_argument = ZeroOrMore(
-            Combine(":" + MatchFirst(match_literal | match_name))
-        )
-        match_filter = Group(
-            ZeroOrMore(Group(Combine("|" + match_name) + match_argument))
-        )
-        match = (Group(match_literal + match_argument) + match_filter) | (
-            Group(match_name + match_argument) + match_filter
-        )
-
         if self.is_verbatim_:
             match_list = [[token_string]]
         else:
-            match_list = delimitedList(match, " ").parseString(token_string).asList()
+            match_list = split_token(token_string)
+            if match_list is None:
+                match_list = token_grammar().parseString(token_string).asList()
 
         # Set token
         if len(match_list) > 0:
@@ -141,7 +200,8 @@ class Token:
             for filter_ in filter_list:
                 token_filter = filter_.pop(0)[1:]
                 f_type = ""
-                if token_filter in tf.boolean_filters:
+                filter_info = registry.environment.filter(token_filter)
+                if filter_info is not None and filter_info.boolean:
                     f_type = "boolean"
                 f_arg = ""
                 f_arg_type = ""
@@ -156,6 +216,13 @@ class Token:
                         f_arg_type = "name"
                     f_arg_list.append((f_arg, f_arg_type))
                 self.filter_list.append((token_filter, f_type, f_arg_list))
+            self.filter_chain = tuple(
+                (f_value, tuple(f_arg_list))
+                for f_value, f_type, f_arg_list in self.filter_list
+            )
+            self.filter_is_boolean = any(
+                "boolean" in f_type for f_value, f_type, f_arg_list in self.filter_list
+            )
 
     def rebuild(self):
         self.build(self.token_string, self.is_verbatim_)
@@ -196,6 +263,18 @@ class Token:
     def is_filtered(self):
         return self.is_filtered_
 
+    def get_filters(self) -> list:
+        """Remaining filters as (name, [(argument, type), ...]) without loading them"""
+        return [
+            (f_value, list(f_arg_list)) for f_value, f_type, f_arg_list in self.filter_list
+        ]
+
+    def compiled_filters(self) -> tuple:
+        """Filter chain as compiled calls (token_filter.compile_chain)"""
+        if self.compiled_chain is None:
+            self.compiled_chain = tf.compile_chain(self.filter_chain)
+        return self.compiled_chain
+
     def has_next_filter(self):
         return len(self.filter_list) > 0
 
@@ -206,6 +285,8 @@ class Token:
         if self.has_next_filter_argument():
             f_arg_value, f_arg_type = self.filter_argument_list.pop(0)
             self.filter_argument_value = f_arg_value
+            self.filter_argument_is_literal = False
+            self.filter_argument_is_name = False
             if "literal" in f_arg_type:
                 self.filter_argument_is_literal = True
             elif "name" in f_arg_type:
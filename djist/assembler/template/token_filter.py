@@ -7,29 +7,55 @@ __version__ = "0.2.0"
 __license__ = "GPLv3"
 
 
-import html
 import logging
+import re
+from functools import lru_cache
+from ..dataset import columnar, lazy
 from ..generics import core, date, msg
+from . import lookup
+from . import memo
 from . import processor
+from . import registry
+from . import safe as msafe
+
+
+# Escape sequences written in template strings, as characters for escapejs
+JS_SEQUENCES = (("\\r", "\r"), ("\\n", "\n"), ("\\'", "'"), ('\\"', '"'))
+
+
+def autoescaping(proc) -> bool:
+    """Filters building HTML escape their input when autoescape is on"""
+    return getattr(proc, "autoescape", False)
+
+
+def defaults_of(filter_name: str) -> tuple or None:
+    """Argument defaults of a built-in or registered filter"""
+    defaults = filter_defaults.get(filter_name)
+    if defaults is None:
+        info = registry.environment.filter(filter_name)
+        defaults = info.defaults if info is not None else None
+    return defaults
 
 
 def arg_default_types(filter_name: str) -> list:
     """Get default types for specific filter"""
-    return filter_defaults[filter_name][0]
+    return defaults_of(filter_name)[0]
 
 
 def arg_default_values(filter_name: str) -> list:
     """Get default values for specific filter"""
-    return filter_defaults[filter_name][1]
+    return defaults_of(filter_name)[1]
 
 
 def arg_default_disallowed(filter_name: str) -> list:
     """Get default values for specific filter"""
-    return filter_defaults[filter_name][2]
+    return defaults_of(filter_name)[2]
 
 
 def resolve_arguments(filter_name: str, argument: list) -> list:
     """Check arguments and replace with defaults where required"""
+    if isinstance(argument, CompiledArguments) and argument.filter_name == filter_name:
+        return argument.resolved
     types = arg_default_types(filter_name)
     default_values = arg_default_values(filter_name)
     disallowed_values = arg_default_disallowed(filter_name)
@@ -73,6 +99,431 @@ def resolve_arguments(filter_name: str, argument: list) -> list:
     return return_arguments
 
 
+class CompiledArguments(list):
+    """Literal arguments of a filter in a compiled chain, checked against
+    the filter defaults once, when the chain is compiled"""
+
+    def __init__(self, filter_name: str, arguments: list):
+        super().__init__(arguments)
+        self.filter_name = filter_name
+        self.resolved = None
+        if defaults_of(filter_name) is not None:
+            self.resolved = resolve_arguments(filter_name, arguments)
+
+
+@lru_cache(maxsize=4096)
+def compile_chain(chain: tuple) -> tuple:
+    """Filter chain of a token compiled into calls
+
+    Arguments:
+        chain (tuple) - (filter name, ((argument, 'literal' or 'name'), ...))
+            per filter, in order
+
+    Returns:
+        (tuple) - (function, arguments, named) per known filter, pure
+        filters wrapped to use the memo, where named
+        holds the (position, dataset key) of the arguments read from the
+        dataset at render time. Without any, arguments are CompiledArguments
+        and resolve_arguments returns their checked values directly.
+        Consecutive pure filters without named arguments are one
+        FusedFilters call.
+    """
+    calls = []
+    # Pure filters with literal arguments waiting to be fused
+    run = []
+    for filter_name, arguments in chain:
+        info = registry.environment.filter(filter_name)
+        if info is None:
+            continue
+        function = info.callable()
+        named = tuple(
+            (position, argument)
+            for position, (argument, argument_type) in enumerate(arguments)
+            if argument_type == "name"
+        )
+        values = [argument for argument, _ in arguments]
+        if info.pure and not named:
+            run.append((info, function, CompiledArguments(filter_name, values)))
+            continue
+        calls.extend(fuse(run))
+        run = []
+        if info.pure:
+            function = memo.memoized(filter_name, function)
+        if named:
+            calls.append((function, tuple(values), named))
+        else:
+            calls.append((function, CompiledArguments(filter_name, values), ()))
+    calls.extend(fuse(run))
+    return tuple(calls)
+
+
+def fuse(run: list) -> list:
+    """Calls of consecutive pure filters, one memoized call for the run"""
+    if len(run) == 1:
+        info, function, arguments = run[0]
+        return [(memo.memoized(info.name, function), arguments, ())]
+    if not run:
+        return []
+    fused = FusedFilters(run)
+    # The memo keys the run by the arguments of all its filters
+    arguments = tuple((info.name, tuple(arguments)) for info, _, arguments in run)
+    return [(memo.memoized(fused.name, fused), arguments, ())]
+
+
+def character_map(info, arguments: CompiledArguments):
+    """How a built-in filter changes a string one character at a time, if
+    it does
+
+    Returns:
+        (tuple or None) - (translate table, escaped first under autoescape,
+        skipped for safe strings, result safe), None if the filter doesn't
+        work one character at a time with these arguments
+    """
+    filter_name = info.name if info.builtin else None
+    if filter_name == "cut":
+        cut = arguments.resolved[0]
+        return ({ord(cut): None}, False, False, False) if len(cut) == 1 else None
+    if filter_name == "force_escape":
+        return (msafe.HTML_ESCAPES, False, False, True)
+    if filter_name == "linebreaksbr":
+        if arguments.resolved[0] != "\n":
+            return None
+        return ({ord("\n"): "<br>"}, True, False, True)
+    return None
+
+
+def compose(first: dict, second: dict) -> dict:
+    """Translate table doing first and then second in one pass"""
+    table = {
+        code: None if replacement is None else replacement.translate(second)
+        for code, replacement in first.items()
+    }
+    for code, replacement in second.items():
+        table.setdefault(code, replacement)
+    return table
+
+
+class FusedFilters:
+    """Consecutive pure filters run as one call
+
+    The run is looked up in the memo once, instead of once per filter with
+    every intermediate string. When every filter replaces single
+    characters (cut of one character, force_escape, linebreaksbr), their
+    character maps are composed into one, and a string value gets one
+    str.replace per character of it that the value holds, where the
+    filters one by one would make a copy per filter and character. escape
+    isn't one of them, as it undoes escapes already written first. Runs
+    whose composed map can't be applied in order, and values holding a
+    backslash (linebreaksbr reads written escape sequences), go through
+    the filters one by one.
+    """
+
+    def __init__(self, run: list):
+        self.name = "|".join(info.name for info, _, _ in run)
+        self.steps = [(function, arguments) for _, function, arguments in run]
+        self.maps = [character_map(info, arguments) for info, _, arguments in run]
+        if None in self.maps:
+            self.maps = None
+        # (replacements, result safe) by (value safe, autoescape)
+        self.tables = {}
+
+    def replacements(self, safe: bool, autoescape: bool) -> tuple:
+        key = (safe, autoescape)
+        if key not in self.tables:
+            table = {}
+            for step_table, escape_first, skip_safe, result_safe in self.maps:
+                if escape_first and autoescape and not safe:
+                    table = compose(table, msafe.HTML_ESCAPES)
+                if not (skip_safe and safe):
+                    table = compose(table, step_table)
+                    safe = result_safe
+            self.tables[key] = (msafe.ordered_replacements(table), safe)
+        return self.tables[key]
+
+    def __call__(self, value, argument, proc):
+        if self.maps is not None and isinstance(value, str) and "\\" not in value:
+            replacements, safe = self.replacements(
+                msafe.is_safe(value), autoescaping(proc)
+            )
+            if replacements is not None:
+                value = msafe.replace_all(str(value), replacements)
+                return msafe.SafeString(value) if safe else value
+        for function, arguments in self.steps:
+            value = function(value, arguments, proc)
+        return value
+
+
+def materialize(value, filter_name: str):
+    """Whole list for filters that can't work on a lazy sequence"""
+    if isinstance(value, lazy.LazySequence):
+        return value.materialize(f"{filter_name} filter")
+    return value
+
+
+def field_values(value, key: str, filter_name: str) -> list or None:
+    """Values at a key path of every item of a list in one pass, or the
+    items themselves if no key is given
+
+    Items missing the key are skipped. Columns of columnar lists are read
+    whole. Returns None (with a warning) if value isn't a list.
+    """
+    if isinstance(value, columnar.ColumnarList) and key in value.columns:
+        values = value.values(key)
+        return list(values) if isinstance(values, list) else values.tolist()
+    if not isinstance(value, (list, lazy.LazySequence)):
+        logging.warning(msg.FILTER_VALUE_TYPE_WARNING, filter_name, core.types(value))
+        return None
+    if not key:
+        return [lazy.resolve(item) for item in value]
+    path = lookup.compile_path(key)
+    found = (lookup.get_path(item, path) for item in value)
+    return [item for item in found if item is not lookup.MISSING]
+
+
+def numbers(values: list) -> list:
+    """Numeric values, other values (booleans included) skipped"""
+    return [
+        number
+        for number in values
+        if isinstance(number, (int, float)) and not isinstance(number, bool)
+    ]
+
+
+def extreme(value, key: str, filter_name: str):
+    """Smallest (min) or largest (max) value at key, numbers ordered before
+    strings as in dictsort"""
+    if isinstance(value, columnar.ColumnarList):
+        found = value.reduce(key, filter_name)
+        if found is not lookup.MISSING:
+            return found
+    values = field_values(value, key, filter_name)
+    values = [item for item in values or [] if item is not None]
+    if not values:
+        return None
+    select = min if filter_name == "min" else max
+    return select(values, key=lookup.sort_key)
+
+
+def grouping_key(value) -> str:
+    """Key of a count_by or group_by result for a value"""
+    if isinstance(value, bool):
+        return str(value).lower()
+    return value if isinstance(value, str) else str(value)
+
+
+# HTML token kinds of html_tokens
+HTML_TEXT = "text"
+HTML_START = "start"
+HTML_END = "end"
+HTML_OTHER = "other"
+
+HTML_TAG = re.compile(
+    r"""<(/?)([a-zA-Z][a-zA-Z0-9:-]*)((?:[^>"']|"[^"]*"|'[^']*')*?)(/?)>"""
+)
+HTML_DECLARATION = re.compile(r"<[!?][^>]*>")
+HTML_ENTITY = re.compile(r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);")
+
+# Elements without an end tag
+HTML_VOID = frozenset(
+    "area base br col embed hr img input link meta param source track wbr".split()
+)
+
+# Elements whose end tag may be left out before one of the same name
+HTML_SELF_ENDING = frozenset("dd dt li option p td th tr".split())
+
+# Web and email addresses, ending before quotes and brackets, escaped or not
+URL_PATTERN = re.compile(
+    r"(?:https?://|www\.)(?:(?!&(?:quot|#x27|lt|gt);)[^\s<>\"'])+"
+    r"|[\w.+-]+@[\w-]+(?:\.[\w-]+)+",
+    re.IGNORECASE,
+)
+URL_TRAILING = ".,:;!?\"')]"
+
+ELLIPSIS = "…"
+
+
+def html_tokens(value: str):
+    """Tokens of an HTML string, as (kind, text, tag name) tuples
+
+    The string is read once from start to end. Text holds character
+    references as written, and a < that doesn't open a tag is text.
+    Comments, doctypes and processing instructions are HTML_OTHER, as are
+    self-closing tags.
+    """
+    position = 0
+    end = len(value)
+    while position < end:
+        found = value.find("<", position)
+        if found == -1:
+            yield (HTML_TEXT, value[position:], "")
+            return
+        if found > position:
+            yield (HTML_TEXT, value[position:found], "")
+        if value.startswith("<!--", found):
+            closing = value.find("-->", found + 4)
+            position = end if closing == -1 else closing + 3
+            yield (HTML_OTHER, value[found:position], "")
+            continue
+        match = HTML_TAG.match(value, found) or HTML_DECLARATION.match(value, found)
+        if match is None:
+            yield (HTML_TEXT, "<", "")
+            position = found + 1
+            continue
+        position = match.end()
+        if match.re is HTML_DECLARATION:
+            yield (HTML_OTHER, match.group(), "")
+            continue
+        name = match.group(2).lower()
+        if match.group(1):
+            yield (HTML_END, match.group(), name)
+        elif match.group(4) or name in HTML_VOID:
+            yield (HTML_OTHER, match.group(), name)
+        else:
+            yield (HTML_START, match.group(), name)
+
+
+def text_length(text: str) -> int:
+    """Characters of HTML text, a character reference counting as one"""
+    if "&" not in text:
+        return len(text)
+    return len(text) - sum(len(match.group()) - 1 for match in HTML_ENTITY.finditer(text))
+
+
+def text_cut(text: str, count: int) -> int:
+    """Position in HTML text after count characters, never inside a
+    character reference"""
+    if "&" not in text:
+        return count
+    position = 0
+    for match in HTML_ENTITY.finditer(text):
+        if match.start() - position >= count:
+            break
+        count -= match.start() - position + 1
+        position = match.end()
+        if count <= 0:
+            return position
+    return position + count
+
+
+class OpenElements:
+    """Elements open at a point of an HTML string, innermost last"""
+
+    def __init__(self):
+        self.names = []
+        # Open elements by name, so end tags are matched without a search
+        self.counts = {}
+
+    def track(self, kind: str, name: str):
+        """Bring the open elements up to date with a tag"""
+        if kind == HTML_START:
+            if name in HTML_SELF_ENDING and self.names and self.names[-1] == name:
+                # A new paragraph or item ends the previous one
+                return
+            self.names.append(name)
+            self.counts[name] = self.counts.get(name, 0) + 1
+        elif kind == HTML_END and self.counts.get(name):
+            # Elements left open inside the ended one end with it
+            while True:
+                ended = self.names.pop()
+                self.counts[ended] -= 1
+                if ended == name:
+                    break
+
+    def end_tags(self) -> str:
+        """End tags of the open elements, innermost first"""
+        return "".join(f"</{name}>" for name in reversed(self.names))
+
+
+def truncate_html(value: str, limit: int, by_words: bool) -> str:
+    """HTML cut after limit characters or words of text, keeping its tags
+    and closing the elements left open
+
+    The string is returned unchanged if it isn't longer than the limit.
+    """
+    pieces = []
+    open_elements = OpenElements()
+    count = 0
+    # Output and open elements at the point the text is cut
+    cut = None
+    for kind, text, name in html_tokens(value):
+        if kind != HTML_TEXT:
+            if cut is None:
+                pieces.append(text)
+                open_elements.track(kind, name)
+            continue
+        if by_words:
+            for match in re.finditer(r"\S+", text):
+                count += 1
+                if count == limit and cut is None:
+                    pieces.append(text[: match.end()])
+                    cut = "".join(pieces) + " " + ELLIPSIS + open_elements.end_tags()
+                elif count > limit:
+                    return cut
+        else:
+            length = text_length(text)
+            if cut is None and count + length >= limit - 1:
+                pieces.append(text[: text_cut(text, limit - 1 - count)])
+                cut = "".join(pieces) + ELLIPSIS + open_elements.end_tags()
+            count += length
+            if count > limit:
+                return cut
+        if cut is None:
+            pieces.append(text)
+    return value
+
+
+def urlize_html(value: str, limit: int or None) -> str:
+    """HTML with the web and email addresses of its text made into links,
+    except inside links, link text cut after limit characters"""
+
+    def link(match) -> str:
+        url = match.group()
+        trailing = ""
+        while url and url[-1] in URL_TRAILING:
+            # A closing bracket belongs to the address if it opens one
+            if url[-1] == ")" and url.count("(") >= url.count(")"):
+                break
+            trailing = url[-1] + trailing
+            url = url[:-1]
+        if "@" in url and "://" not in url:
+            href = "mailto:" + url
+        elif url.lower().startswith("www."):
+            href = "http://" + url
+        else:
+            href = url
+        text = url
+        if limit is not None and len(text) > limit:
+            text = text[: max(limit - 1, 0)] + ELLIPSIS
+        href = href.replace('"', "%22")
+        return f'<a href="{href}" rel="nofollow">{text}</a>{trailing}'
+
+    pieces = []
+    in_link = 0
+    for kind, text, name in html_tokens(value):
+        if kind != HTML_TEXT:
+            if name == "a":
+                in_link += 1 if kind == HTML_START else -1 if kind == HTML_END else 0
+            pieces.append(text)
+        elif in_link > 0:
+            pieces.append(text)
+        else:
+            position = 0
+            for match in URL_PATTERN.finditer(text):
+                pieces.append(text[position : match.start()])
+                pieces.append(link(match))
+                position = match.end()
+            pieces.append(text[position:])
+    return msafe.mark_safe("".join(pieces))
+
+
+def html_input(value: str, proc) -> str:
+    """Value of a filter reading HTML, escaped first if it is plain text
+    under autoescape"""
+    if autoescaping(proc) and not msafe.is_safe(value):
+        return msafe.escape(value)
+    return value
+
+
 def add_filter(value: str or int or float, argument: list, proc: processor) -> str or int or float:
     """add - Adds the argument to the value
 
@@ -143,6 +594,31 @@ def addslashes_filter(value: str, argument: list, proc: processor) -> str:
     return None
 
 
+def avg_filter(value: list, argument: list, proc: processor) -> float:
+    """avg - Returns the average of the numbers in a list, or of the numbers
+    at a key of the objects in a list
+
+    Values that aren't numbers are skipped.
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Example:
+        {{ products|avg:"price" }}
+    """
+    args = resolve_arguments("avg", argument)
+    if isinstance(value, columnar.ColumnarList) and len(value):
+        total = value.reduce(args[0], "sum")
+        if total is not lookup.MISSING:
+            return total / len(value)
+    found = numbers(field_values(value, args[0], "avg") or [])
+    if not found:
+        return None
+    return sum(found) / len(found)
+
+
 def capfirst_filter(value: str, argument: list, proc: processor) -> str:
     """capfirst - Capitalizes the first character of the value
 
@@ -204,6 +680,33 @@ def center_filter(value: str, argument: list, proc: processor) -> str:
     return value.center(argument_width, argument_fillchar)
 
 
+def count_by_filter(value: list, argument: list, proc: processor) -> dict:
+    """count_by - Counts the objects in a list by the value at a key
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Returns:
+        (dict) - number of objects by value, in order of first appearance
+
+    Example:
+        {% use products|count_by:"type" as counts %}{{ counts.book }}
+    """
+    args = resolve_arguments("count_by", argument)
+    values = field_values(value, args[0], "count_by")
+    if values is None:
+        return None
+    counts = {}
+    for item in values:
+        if item is None or isinstance(item, (dict, list)):
+            continue
+        item = grouping_key(item)
+        counts[item] = counts.get(item, 0) + 1
+    return counts
+
+
 def cut_filter(value: str, argument: list, proc: processor) -> str:
     """cut - Removes all instances of the argument from the given string
 
@@ -285,6 +788,11 @@ def dictsort_filter(value: list, argument: list, proc: processor) -> list:
     """dictsort - Takes a list of dictionaries and returns that list sorted by
     the key given in the argument
 
+    Several keys can be given separated by commas, and a key prefixed by -
+    sorts in descending order. Numbers sort before strings, and items
+    missing the key sort last. Sorting the same list the same way again
+    during the render returns the earlier result.
+
     Arguments:
         value (str, list) - value(s) to be filtered
         argument (list) - filter arguments <defualt values>
@@ -295,34 +803,22 @@ def dictsort_filter(value: list, argument: list, proc: processor) -> list:
     Example:
         {{ colours|dictsort:"colour-name" }}
         {{ websites|dictsort:"url.short":"reverse" }}
+        {{ products|dictsort:"category,-price" }}
     """
     args = resolve_arguments("dictsort", argument)
-    if isinstance(value, list) and core.index_in_list(0, value):
-        key_ = []
-        reverse_sort = args[1].lower().startswith("r")
-        proc = processor.Processor(-1)
-        if isinstance(value[0], dict):
-            key_ = args[0]
-            for val in value:
-                proc.update_dataset(val)
-            try:
-                return sorted(
-                    value,
-                    key=lambda arg: proc.get_data(
-                        return_type="any", key=key_, dataset=arg
-                    ),
-                    reverse=reverse_sort,
-                )
-            except (KeyError, IndexError, TypeError):
-                logging.error(msg.FILTER_DICTSORT_ERROR, key_)
-                return None
-        elif isinstance(value[0], list):
-            key_ = core.convert_to_int(args[0])
-            try:
-                return sorted(value, key=lambda arg: arg[key_], reverse=reverse_sort)
-            except (KeyError, IndexError, TypeError):
-                logging.error(msg.FILTER_DICTSORT_ERROR, key_)
-                return None
+    reverse_sort = args[1].lower().startswith("r")
+    if isinstance(value, lazy.LazySequence):
+        sorted_value = value
+        for path, descending in reversed(lookup.compile_sort(args[0])):
+            key = ".".join(name for name, _ in path)
+            sorted_value = sorted_value.sort(key, descending != reverse_sort)
+            if sorted_value is None:
+                break
+        if sorted_value is not None:
+            return sorted_value
+    value = materialize(value, "dictsort")
+    if isinstance(value, list):
+        return lookup.sort_items(value, str(args[0]), reverse_sort)
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "dictsort", core.types(value))
     return None
 
@@ -343,7 +839,7 @@ def dictsortreversed_filter(value: list, argument: list, proc: processor) -> lis
     if core.index_in_list(0, argument):
         key = argument[0]
     argument = [key, "reverse"]
-    return dictsort_filter(value, argument)
+    return dictsort_filter(value, argument, proc)
 
 
 def divisibleby_filter(value: str or int or float, argument: list, proc: processor) -> bool:
@@ -382,9 +878,13 @@ def escape_filter(value: str, argument: list, proc: processor) -> str:
     """
     del argument
     if isinstance(value, str):
-        remove_escapes = core.substitute(core.esc_html(), value, True)
-        apply_escapes = html.escape(remove_escapes)
-        return apply_escapes
+        # Under autoescape, safe strings are already escaped. Otherwise
+        # escapes written in the string are undone first so they aren't
+        # escaped twice, and HTML built by filters is escaped as before
+        # autoescape
+        if msafe.is_safe(value) and autoescaping(proc):
+            return value
+        return msafe.escape(core.substitute(core.esc_html(), str(value), True))
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "escape", core.types(value))
     return None
 
@@ -406,9 +906,11 @@ def escapejs_filter(value: str, argument: list, proc: processor) -> str:
     """
     del argument
     if isinstance(value, str):
-        remove_escapes = core.substitute(core.esc_js(), value, True)
-        apply_escapes = core.substitute(core.esc_js(), remove_escapes)
-        return apply_escapes
+        if "\\" in value:
+            # Escape sequences written in template strings
+            for sequence, character in JS_SEQUENCES:
+                value = value.replace(sequence, character)
+        return msafe.escapejs(value)
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "escapejs", core.types(value))
     return None
 
@@ -439,7 +941,7 @@ def filesizeformat_filter(value: str or int or float, argument: list, proc: proc
     return None
 
 
-def first_filter(value: list or str, argument: list):
+def first_filter(value: list or str, argument: list, proc: processor = None):
     """first - Returns the first item in a list or first character in a string
 
     Arguments:
@@ -451,6 +953,11 @@ def first_filter(value: list or str, argument: list):
         {{ listdata|first }}
     """
     del argument
+    if isinstance(value, lazy.LazySequence):
+        for item in value:
+            return item
+        logging.warning(msg.FILTER_VALUE_EMPTY_WARNING, "first")
+        return None
     if isinstance(value, (list, str)):
         if len(value) > 0:
             return value[0]
@@ -497,11 +1004,22 @@ def floatformat_filter(value: float or str, argument: list, proc: processor) ->
     return str(filtered_value)
 
 
-def force_escape_filter(value: str, argument: str, proc: processor) -> str:
-    # Return to this filter with autoescape tag
-    # Low priority
-    filtered_value = value
-    return filtered_value
+def force_escape_filter(value: str, argument: list, proc: processor) -> str:
+    """force_escape - Escapes a string’s HTML, even if it is marked safe
+
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            Argument ignored
+
+    Example:
+        {{ description|safe|force_escape }}
+    """
+    del argument
+    if isinstance(value, str):
+        return msafe.force_escape(value)
+    logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "force_escape", core.types(value))
+    return None
 
 
 def get_digit_filter(value: int or str, argument: list, proc: processor) -> int:
@@ -531,6 +1049,37 @@ def get_digit_filter(value: int or str, argument: list, proc: processor) -> int:
     return None
 
 
+def group_by_filter(value: list, argument: list, proc: processor) -> dict:
+    """group_by - Groups the objects in a list by the value at a key
+
+    Objects missing the key are left out.
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Returns:
+        (dict) - list of objects by value, in order of first appearance
+
+    Example:
+        {% use products|group_by:"category" as categories %}
+        {% for product in categories.books %}{{ product.name }}{% endfor %}
+    """
+    args = resolve_arguments("group_by", argument)
+    if not isinstance(value, (list, lazy.LazySequence)):
+        logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "group_by", core.types(value))
+        return None
+    path = lookup.compile_path(args[0])
+    groups = {}
+    for item in value:
+        found = lookup.get_path(item, path, None)
+        if found is None or isinstance(found, (dict, list)):
+            continue
+        groups.setdefault(grouping_key(found), []).append(item)
+    return groups
+
+
 def iriencode_filter(value: str, argument: str, proc: processor) -> str:
     # Low priority
     """iriencode -"""
@@ -559,7 +1108,12 @@ def join_filter(value: list or str, argument: list, proc: processor) -> str:
     if isinstance(value, str):
         value = value.split(splitter)
     if isinstance(value, list):
-        return joiner.join(string for string in value if isinstance(string, str))
+        strings = [string for string in value if isinstance(string, str)]
+        if autoescaping(proc):
+            return msafe.mark_safe(
+                msafe.escape(joiner).join(msafe.escape(string) for string in strings)
+            )
+        return joiner.join(strings)
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "join", core.types(value))
     return None
 
@@ -570,7 +1124,7 @@ def json_script_filter(value: str, argument: str, proc: processor) -> str:
     return filtered_value
 
 
-def last_filter(value: list, argument: list):
+def last_filter(value: list, argument: list, proc: processor = None):
     """last - Returns the last item in a list
 
     Arguments:
@@ -582,6 +1136,11 @@ def last_filter(value: list, argument: list):
         {{ datasetlist|last }}
     """
     del argument
+    if isinstance(value, lazy.LazySequence):
+        item = None
+        for item in value:
+            pass
+        return item
     if isinstance(value, (str, list)):
         return value[-1]
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "last", core.types(value))
@@ -604,7 +1163,7 @@ def length_filter(value: str or list or dict, argument: list, proc: processor) -
     """
     args = resolve_arguments("length", argument)
     add_number = core.convert_to_int(args[0])
-    if isinstance(value, (str, list, dict)):
+    if isinstance(value, (str, list, dict, lazy.LazySequence)):
         return len(value) + add_number
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "length", core.types(value))
     return None
@@ -626,12 +1185,19 @@ def length_is_filter(value: str or list or dict, argument: list, proc: processor
     """
     args = resolve_arguments("length_is", argument)
     comp = core.convert_to_int(args[0])
-    if isinstance(value, (str, list, dict)):
+    if isinstance(value, (str, list, dict, lazy.LazySequence)):
         return len(value) == comp
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "length_is", core.types(value))
     return False
 
 
+def line_breaks(value: str, line_break: str) -> str:
+    """Line breaks of value as <br>, written newline sequences included"""
+    if line_break == "\n":
+        value = value.replace("\\n", "\n")
+    return value.replace(line_break, "<br>")
+
+
 def linebreaks_filter(value: str, argument: list, proc: processor) -> str:
     """linebreaks - Replaces line breaks in plain text with appropriate HTML
 
@@ -649,17 +1215,17 @@ def linebreaks_filter(value: str, argument: list, proc: processor) -> str:
         {{ "Address: Street, Town, State"|linebreaks:": ":", " }}
     """
     args = resolve_arguments("linebreaks", argument)
-    filtered_value = ""
     para_break = args[0]
     line_break = args[1]
+    if autoescaping(proc):
+        value = msafe.escape(value)
     if para_break == "\n\n":
         value = value.replace("\\n\\n", "\n\n")
     paragraphs = value.split(para_break)
-    for paragraph in paragraphs:
-        filtered_value += "<p>"
-        filtered_value += linebreaksbr_filter(paragraph, [line_break])
-        filtered_value += "</p>"
-    return filtered_value
+    filtered_value = "</p><p>".join(
+        line_breaks(paragraph, line_break) for paragraph in paragraphs
+    )
+    return msafe.mark_safe("<p>" + filtered_value + "</p>")
 
 
 def linebreaksbr_filter(value: str, argument: list, proc: processor) -> str:
@@ -675,12 +1241,9 @@ def linebreaksbr_filter(value: str, argument: list, proc: processor) -> str:
         {{ "Address: Street, Town, State"|linebreaksbr:", " }}
     """
     args = resolve_arguments("linebreaksbr", argument)
-    filtered_value = ""
-    line_break = args[0]
-    if line_break == "\n":
-        value = value.replace("\\n", "\n")
-    filtered_value = value.replace(line_break, "<br>")
-    return filtered_value
+    if autoescaping(proc):
+        value = msafe.escape(value)
+    return msafe.mark_safe(line_breaks(value, args[0]))
 
 
 def linenumbers_filter(value: str or list, argument: list, proc: processor) -> str:
@@ -698,7 +1261,6 @@ def linenumbers_filter(value: str or list, argument: list, proc: processor) -> s
         {{ textlist|linenumbers:"1":dataset_spaces:symbol }}
     """
     args = resolve_arguments("linenumbers", argument)
-    filtered_value = ""
     lines = value
     if isinstance(value, str):
         value = value.replace("\\n", "\n")
@@ -708,12 +1270,16 @@ def linenumbers_filter(value: str or list, argument: list, proc: processor) -> s
     symbol = args[2]
     number_length = len(str(number + (len(lines) - 1)))
     tab_size = number_length + len(symbol) + minimum_spaces
+    escaping = autoescaping(proc)
+    numbered = []
     for line in lines:
         prefix = str(number) + symbol
-        spaces = " " * (tab_size - len(prefix))
-        filtered_value += prefix + spaces + line + "\n"
+        if escaping:
+            line = msafe.escape(line)
+        numbered.append(prefix.ljust(tab_size) + line + "\n")
         number += 1
-    return filtered_value
+    filtered_value = "".join(numbered)
+    return msafe.mark_safe(filtered_value) if escaping else filtered_value
 
 
 def ljust_filter(value: str, argument: list, proc: processor) -> str:
@@ -772,6 +1338,55 @@ def make_list_filter(value: str or int, argument: list, proc: processor) -> list
     return filtered_value
 
 
+def map_filter(value: list, argument: list, proc: processor) -> list:
+    """map - Returns the values at a key of the objects in a list
+
+    Objects missing the key are skipped.
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Example:
+        {{ products|map:"name"|join:", " }}
+    """
+    args = resolve_arguments("map", argument)
+    return field_values(value, args[0], "map")
+
+
+def max_filter(value: list, argument: list, proc: processor):
+    """max - Returns the largest value in a list, or at a key of the objects
+    in a list
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Example:
+        {{ products|max:"price" }}
+    """
+    args = resolve_arguments("max", argument)
+    return extreme(value, args[0], "max")
+
+
+def min_filter(value: list, argument: list, proc: processor):
+    """min - Returns the smallest value in a list, or at a key of the objects
+    in a list
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Example:
+        {{ products|min:"price" }}
+    """
+    args = resolve_arguments("min", argument)
+    return extreme(value, args[0], "min")
+
+
 def phone2numeric_filter(value: str, argument: str, proc: processor) -> str:
     # Low priority
     filtered_value = value
@@ -833,14 +1448,41 @@ def rjust_filter(value: str, argument: list, proc: processor) -> str:
     return value.rjust(argument_width, argument_fillchar)
 
 
-def safe_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+def safe_filter(value: str, argument: list, proc: processor) -> str:
+    """safe - Marks a string as safe, so autoescape doesn't escape it
 
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            Argument ignored
 
-def safeseq_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+    Example:
+        {{ description_html|safe }}
+    """
+    del argument
+    if value is None or isinstance(value, (list, dict)):
+        return value
+    return msafe.mark_safe(str(value))
+
+
+def safeseq_filter(value: list, argument: list, proc: processor) -> list:
+    """safeseq - Marks every string of a list as safe
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            Argument ignored
+
+    Example:
+        {{ links|safeseq|join:", " }}
+    """
+    del argument
+    if isinstance(value, (list, lazy.LazySequence)):
+        return [
+            msafe.mark_safe(item) if isinstance(item, str) else item for item in value
+        ]
+    logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "safeseq", core.types(value))
+    return value
 
 
 def slice_filter(value: str, argument: str, proc: processor) -> str:
@@ -858,9 +1500,49 @@ def stringformat_filter(value: str, argument: str, proc: processor) -> str:
     return filtered_value
 
 
-def striptags_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+def striptags_filter(value: str, argument: list, proc: processor) -> str:
+    """striptags - Removes all HTML tags and comments
+
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            Argument ignored
+
+    Example:
+        {{ article.body|striptags }}
+    """
+    del argument
+    if isinstance(value, str):
+        return "".join(
+            text for kind, text, _ in html_tokens(value) if kind == HTML_TEXT
+        )
+    logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "striptags", core.types(value))
+    return None
+
+
+def sum_filter(value: list, argument: list, proc: processor) -> int or float:
+    """sum - Returns the sum of the numbers in a list, or of the numbers at a
+    key of the objects in a list
+
+    Values that aren't numbers are skipped.
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Example:
+        {{ order.lines|sum:"price" }}
+    """
+    args = resolve_arguments("sum", argument)
+    if isinstance(value, columnar.ColumnarList):
+        total = value.reduce(args[0], "sum")
+        if total is not lookup.MISSING:
+            return total
+    found = field_values(value, args[0], "sum")
+    if found is None:
+        return None
+    return sum(numbers(found))
 
 
 def time_filter(value: str, argument: str, proc: processor) -> str:
@@ -888,9 +1570,32 @@ def truncatechars_filter(value: str, argument: str, proc: processor) -> str:
     return filtered_value
 
 
-def truncatechars_html_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+def truncatechars_html_filter(value: str, argument: list, proc: processor) -> str:
+    """truncatechars_html - Truncates the text of HTML after a number of
+    characters, ellipsis included, closing the tags left open
+
+    Tags don't count as characters and a character reference counts as
+    one.
+
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str, int) - number of characters to keep <"0">
+
+    Example:
+        {{ article.body|truncatechars_html:"200" }}
+    """
+    args = resolve_arguments("truncatechars_html", argument)
+    if isinstance(value, str):
+        limit = core.convert_to_int(args[0])
+        value = html_input(value, proc)
+        if limit <= 0:
+            return ""
+        return msafe.mark_safe(truncate_html(value, limit, False))
+    logging.warning(
+        msg.FILTER_VALUE_TYPE_WARNING, "truncatechars_html", core.types(value)
+    )
+    return None
 
 
 def truncatewords_filter(value: str, argument: str, proc: processor) -> str:
@@ -898,9 +1603,29 @@ def truncatewords_filter(value: str, argument: str, proc: processor) -> str:
     return filtered_value
 
 
-def truncatewords_html_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+def truncatewords_html_filter(value: str, argument: list, proc: processor) -> str:
+    """truncatewords_html - Truncates the text of HTML after a number of
+    words, closing the tags left open
+
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str, int) - number of words to keep <"0">
+
+    Example:
+        {{ article.body|truncatewords_html:"50" }}
+    """
+    args = resolve_arguments("truncatewords_html", argument)
+    if isinstance(value, str):
+        limit = core.convert_to_int(args[0])
+        value = html_input(value, proc)
+        if limit <= 0:
+            return ""
+        return msafe.mark_safe(truncate_html(value, limit, True))
+    logging.warning(
+        msg.FILTER_VALUE_TYPE_WARNING, "truncatewords_html", core.types(value)
+    )
+    return None
 
 
 def unescape_filter(value: str, argument: list, proc: processor) -> str:
@@ -916,11 +1641,40 @@ def unescape_filter(value: str, argument: list, proc: processor) -> str:
     """
     del argument
     if isinstance(value, str):
+        import html  # pylint: disable=import-outside-toplevel
+
         return html.unescape(value)
     logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "unescape", core.types(value))
     return None
 
 
+def unique_filter(value: list, argument: list, proc: processor) -> list:
+    """unique - Returns the values of a list, or at a key of the objects in
+    a list, without repeats and in order of first appearance
+
+    Arguments:
+        value (list) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str) - name of the value in the object <"">
+
+    Example:
+        {{ products|unique:"category"|join:", " }}
+    """
+    args = resolve_arguments("unique", argument)
+    values = field_values(value, args[0], "unique")
+    if values is None:
+        return None
+    seen = set()
+    unique = []
+    for item in values:
+        # Objects and lists aren't hashable, their repr stands in
+        marker = (type(item), repr(item) if isinstance(item, (dict, list)) else item)
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(item)
+    return unique
+
+
 def unordered_list_filter(value: str, argument: str, proc: processor) -> str:
     filtered_value = value
     return filtered_value
@@ -936,14 +1690,45 @@ def urlencode_filter(value: str, argument: str, proc: processor) -> str:
     return filtered_value
 
 
-def urlize_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+def urlize_filter(value: str, argument: list, proc: processor) -> str:
+    """urlize - Converts web and email addresses in text into links
 
+    Addresses already inside a link are left as they are.
 
-def urlizetrunc_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            Argument ignored
+
+    Example:
+        {{ comment.text|urlize }}
+    """
+    del argument
+    if isinstance(value, str):
+        return urlize_html(html_input(value, proc), None)
+    logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "urlize", core.types(value))
+    return None
+
+
+def urlizetrunc_filter(value: str, argument: list, proc: processor) -> str:
+    """urlizetrunc - Converts web and email addresses in text into links,
+    truncating the link text after a number of characters, ellipsis
+    included
+
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str, int) - number of characters of link text <"0">
+
+    Example:
+        {{ comment.text|urlizetrunc:"30" }}
+    """
+    args = resolve_arguments("urlizetrunc", argument)
+    if isinstance(value, str):
+        limit = core.convert_to_int(args[0])
+        return urlize_html(html_input(value, proc), limit)
+    logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "urlizetrunc", core.types(value))
+    return None
 
 
 def where_filter(value: list, argument: list, proc: processor) -> dict:
@@ -956,23 +1741,28 @@ def where_filter(value: list, argument: list, proc: processor) -> dict:
             1 (str) - name of the value in the object <"">
             2 (str, int, float, dict, list, bool) - value to check against <None>
 
+    The value is converted to the type of each object's value before they
+    are compared. The list is indexed by the key the first time it is
+    searched, and later searches during the render use the index.
+
     Example:
         {% use products|where:"id":product_code as product %}
     """
     args = resolve_arguments("where", argument)
-    matched_item = None
-    if isinstance(value, list) and args[0]:
-        nproc = processor.Processor(proc.context_level + 1)
+    if isinstance(value, lazy.LazySequence) and args[0]:
+        matched = value.where(args[0], args[1])
+        if matched is not None:
+            try:
+                return matched.item(0)
+            except IndexError:
+                return None
+        path = lookup.compile_path(args[0])
         for item in value:
-            nproc.update_dataset(item)
-            check_key = nproc.get_data("any", args[0])
-            if check_key:
-                check_value = type(check_key)(args[1])
-                check_value = proc.get_data("any", check_value)
-                if check_key == check_value:
-                    matched_item = item
-                    break
-    return matched_item
+            if lookup.matches(lookup.get_path(item, path), args[1]):
+                return item
+    elif isinstance(value, list) and args[0]:
+        return lookup.index(value, args[0]).first(args[1])
+    return None
 
 
 def whereall_filter(value: list, argument: list, proc: processor) -> dict:
@@ -993,28 +1783,105 @@ def whereall_filter(value: list, argument: list, proc: processor) -> dict:
         {% use products|whereall:"type":3|whereall:"code":465|first as one_item %}
     """
     args = resolve_arguments("whereall", argument)
-    matched_list = []
+    if isinstance(value, lazy.LazySequence) and args[0]:
+        matched = value.where(args[0], args[1])
+        if matched is not None:
+            return matched
+        path = lookup.compile_path(args[0])
+        return [
+            item for item in value if lookup.matches(lookup.get_path(item, path), args[1])
+        ]
     if isinstance(value, list) and args[0]:
-        nproc = processor.Processor(proc.context_level + 1)
-        for item in value:
-            nproc.update_dataset(item)
-            check_key = nproc.get_data("any", args[0])
-            if check_key:
-                check_value = type(check_key)(args[1])
-                check_value = proc.get_data("any", check_value)
-                if check_key == check_value:
-                    matched_list.append(item)
-    return matched_list
+        return lookup.index(value, args[0]).all(args[1])
+    return []
 
 
-def wordcount_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+def wordcount_filter(value: str, argument: list, proc: processor) -> int:
+    """wordcount - Returns the number of words in the text, HTML tags
+    excluded
 
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            Argument ignored
 
-def wordwrap_filter(value: str, argument: str, proc: processor) -> str:
-    filtered_value = value
-    return filtered_value
+    Example:
+        {{ article.body|wordcount }}
+    """
+    del argument
+    if not isinstance(value, str):
+        logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "wordcount", core.types(value))
+        return None
+    count = 0
+    # A word split by tags, as in "<b>W</b>ord", counts once
+    in_word = False
+    for kind, text, _ in html_tokens(value):
+        if kind != HTML_TEXT or not text:
+            continue
+        words = len(text.split())
+        if words and in_word and not text[0].isspace():
+            words -= 1
+        count += words
+        in_word = not text[-1].isspace()
+    return count
+
+
+def wordwrap_filter(value: str, argument: list, proc: processor) -> str:
+    """wordwrap - Wraps lines of text at a given width
+
+    Words longer than the width are kept whole, and HTML tags take up no
+    width and are never split.
+
+    Arguments:
+        value (str) - value(s) to be filtered
+        argument (list) - filter arguments <defualt values>
+            1 (str, int) - maximum characters per line <"0">
+
+    Example:
+        {{ letter.text|wordwrap:"72" }}
+    """
+    args = resolve_arguments("wordwrap", argument)
+    if not isinstance(value, str):
+        logging.warning(msg.FILTER_VALUE_TYPE_WARNING, "wordwrap", core.types(value))
+        return None
+    width = core.convert_to_int(args[0])
+    if width <= 0:
+        return value
+    pieces = []
+    column = 0
+    # Spaces and tags after the last word, dropped or kept by the next one
+    pending = []
+    pending_width = 0
+    for kind, text, _ in html_tokens(value):
+        if kind != HTML_TEXT:
+            pending.append((kind, text))
+            continue
+        for part in re.split(r"([^\S\n]+|\n)", text):
+            if not part:
+                continue
+            if part == "\n":
+                pieces.extend(piece for _, piece in pending)
+                pieces.append(part)
+                pending = []
+                pending_width = column = 0
+            elif part.isspace():
+                pending.append((HTML_TEXT, part))
+                pending_width += len(part)
+            else:
+                length = text_length(part)
+                if column and column + pending_width + length > width:
+                    pieces.extend(piece for kind, piece in pending if kind != HTML_TEXT)
+                    pieces.append("\n")
+                    column = 0
+                else:
+                    pieces.extend(piece for _, piece in pending)
+                    column += pending_width
+                pieces.append(part)
+                column += length
+                pending = []
+                pending_width = 0
+    pieces.extend(piece for _, piece in pending)
+    return "".join(pieces)
 
 
 def yesno_filter(value: str, argument: str, proc: processor) -> str:
@@ -1024,13 +1891,52 @@ def yesno_filter(value: str, argument: str, proc: processor) -> str:
 
 boolean_filters = ["divisibleby", "length_is"]
 
+# Filters whose result depends only on the value and arguments, memoized
+# for the job (memo). Filters of the registry give their own metadata.
+pure_filters = [
+    "addslashes",
+    "capfirst",
+    "capitalize",
+    "center",
+    "cut",
+    "date",
+    "escape",
+    "escapejs",
+    "filesizeformat",
+    "floatformat",
+    "force_escape",
+    "get_digit",
+    "linebreaks",
+    "linebreaksbr",
+    "linenumbers",
+    "ljust",
+    "lower",
+    "rjust",
+    "slugify",
+    "striptags",
+    "title",
+    "truncatechars",
+    "truncatechars_html",
+    "truncatewords",
+    "truncatewords_html",
+    "unescape",
+    "upper",
+    "urlencode",
+    "urlize",
+    "urlizetrunc",
+    "wordcount",
+    "wordwrap",
+]
+
 
 filter_select = {
     "add": add_filter,
     "addslashes": addslashes_filter,
+    "avg": avg_filter,
     "capfirst": capfirst_filter,
     "capitalize": capitalize_filter,
     "center": center_filter,
+    "count_by": count_by_filter,
     "cut": cut_filter,
     "date": date_filter,
     "default": default_filter,
@@ -1045,6 +1951,7 @@ filter_select = {
     "floatformat": floatformat_filter,
     "force_escape": force_escape_filter,
     "get_digit": get_digit_filter,
+    "group_by": group_by_filter,
     "iriencode": iriencode_filter,
     "join": join_filter,
     "json_script": json_script_filter,
@@ -1057,6 +1964,9 @@ filter_select = {
     "ljust": ljust_filter,
     "lower": lower_filter,
     "make_list": make_list_filter,
+    "map": map_filter,
+    "max": max_filter,
+    "min": min_filter,
     "phone2numeric": phone2numeric_filter,
     "pluralize": pluralize_filter,
     "post": post_filter,
@@ -1070,6 +1980,7 @@ filter_select = {
     "slugify": slugify_filter,
     "stringformat": stringformat_filter,
     "striptags": striptags_filter,
+    "sum": sum_filter,
     "time": time_filter,
     "timesince": timesince_filter,
     "timeuntil": timeuntil_filter,
@@ -1079,6 +1990,7 @@ filter_select = {
     "truncatewords": truncatewords_filter,
     "truncatewords_html": truncatewords_html_filter,
     "unescape": unescape_filter,
+    "unique": unique_filter,
     "unordered_list": unordered_list_filter,
     "upper": upper_filter,
     "urlencode": urlencode_filter,
@@ -1115,6 +2027,11 @@ filter_defaults = {
         [("",)],
     ),
     "addslashes": ([], [], []),
+    "avg": (
+        [(str)],
+        [""],
+        [()],
+    ),
     "capfirst": ([], [], []),
     "capitalize": ([], [], []),
     "center": (
@@ -1122,6 +2039,11 @@ filter_defaults = {
         ["0", " "],
         [(), ("",)],
     ),
+    "count_by": (
+        [(str)],
+        [""],
+        [()],
+    ),
     "cut": (
         [(str)],
         [""],
@@ -1168,6 +2090,11 @@ filter_defaults = {
         ["1"],
         [("",)],
     ),
+    "group_by": (
+        [(str)],
+        [""],
+        [()],
+    ),
     "iriencode": ([], [], []),
     "join": (
         [(str), (str)],
@@ -1208,6 +2135,21 @@ filter_defaults = {
     ),
     "lower": ([], [], []),
     "make_list": ([], [], []),
+    "map": (
+        [(str)],
+        [""],
+        [()],
+    ),
+    "max": (
+        [(str)],
+        [""],
+        [()],
+    ),
+    "min": (
+        [(str)],
+        [""],
+        [()],
+    ),
     "phone2numeric": ([], [], []),
     "pluralize": ([], [], []),
     "post": ([], [], []),
@@ -1225,20 +2167,42 @@ filter_defaults = {
     "slugify": ([], [], []),
     "stringformat": ([], [], []),
     "striptags": ([], [], []),
+    "sum": (
+        [(str)],
+        [""],
+        [()],
+    ),
     "time": ([], [], []),
     "timesince": ([], [], []),
     "timeuntil": ([], [], []),
     "title": ([], [], []),
     "truncatechars": ([], [], []),
-    "truncatechars_html": ([], [], []),
+    "truncatechars_html": (
+        [(str, int)],
+        ["0"],
+        [("",)],
+    ),
     "truncatewords": ([], [], []),
-    "truncatewords_html": ([], [], []),
+    "truncatewords_html": (
+        [(str, int)],
+        ["0"],
+        [("",)],
+    ),
     "unescape": ([], [], []),
+    "unique": (
+        [(str)],
+        [""],
+        [()],
+    ),
     "unordered_list": ([], [], []),
     "upper": ([], [], []),
     "urlencode": ([], [], []),
     "urlize": ([], [], []),
-    "urlizetrunc": ([], [], []),
+    "urlizetrunc": (
+        [(str, int)],
+        ["0"],
+        [("",)],
+    ),
     "where": (
         [(str), (str, int, float, dict, list, bool, None)],
         ["", (None,)],
@@ -1250,6 +2214,10 @@ filter_defaults = {
         [("",), ()],
     ),
     "wordcount": ([], [], []),
-    "wordwrap": ([], [], []),
+    "wordwrap": (
+        [(str, int)],
+        ["0"],
+        [("",)],
+    ),
     "yesno": ([], [], []),
 }
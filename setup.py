@@ -32,7 +32,7 @@ setuptools.setup(
         "Operating System :: OS Independent",
         "Development Status :: 3 - Alpha",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.9",
     entry_points={"console_scripts": ["djist = djist:main"]},
     install_requires=[
         "python-dateutil",
@@ -0,0 +1,81 @@
+from .context import assembler
+
+pj = assembler.dataset.projection
+sc = assembler.template.scanner
+
+
+def dataset():
+    return {
+        'title': 'Products',
+        'unused': [1, 2, 3],
+        'djist_base_location': '',
+        'products': [
+            {'id': 1, 'name': 'apple', 'price': 2, 'junk': 'x'},
+            {'id': 2, 'name': 'pear', 'price': 3, 'junk': 'y'},
+        ],
+    }
+
+
+# DependencyScanner
+
+def test_dependency_scan_1a():
+    template = '{{ title }}{% for p in products %}{{ p.name }}{% endfor %}'
+    result = sc.DependencyScanner().run(template)
+    expected = [(('title',), True), (('products',), False),
+                (('products', 'name'), True)]
+    assert result == expected
+
+
+def test_dependency_scan_2a():
+    template = '{% use products|dictsort:"price" as sorted %}{{ sorted.0.id }}'
+    result = sc.DependencyScanner().run(template)
+    expected = [(('products',), False), (('products', 'price'), True),
+                (('products', '0', 'id'), True)]
+    assert result == expected
+
+
+def test_dependency_scan_3a():
+    template = '{% usetemplate partial_name %}'
+    result = sc.DependencyScanner().run(template)
+    assert result is None
+
+
+def test_dependency_scan_4a():
+    template = ('{% regroup products by price as groups %}'
+                '{% for g in groups %}{{ g.list.0.name }}{% endfor %}')
+    result = sc.DependencyScanner().run(template)
+    assert result == [(('products',), True)]
+
+
+# project_dataset
+
+def test_project_dataset_1a():
+    template = '{{ title }}{% for p in products %}{{ p.name }}{% endfor %}'
+    paths = sc.DependencyScanner().run(template)
+    result = pj.project_dataset(dataset(), paths)
+    expected = {
+        'title': 'Products',
+        'djist_base_location': '',
+        'products': [{'name': 'apple'}, {'name': 'pear'}],
+    }
+    assert result == expected
+
+
+def test_project_dataset_2a():
+    paths = [(('products',), True), (('products', 'name'), True)]
+    result = pj.project_dataset(dataset(), paths)
+    assert result['products'] == dataset()['products']
+
+
+def test_project_dataset_3a(tmp_path):
+    # Values of a memory-mapped object read whole are decoded, so the
+    # projection can be saved
+    source = tmp_path / 'big.json'
+    source.write_text('{"site": {"title": "Shop", "menu": [1]}, "rows": [2]}')
+    mapped = assembler.dataset.mapped.load(str(source), depth=2)
+    result = pj.project_dataset(mapped, [(('site',), True)])
+    assert result == {'site': {'title': 'Shop', 'menu': [1]}}
+    cache = str(tmp_path / 'cache' / 'page.json')
+    pj.write_cache(cache, result)
+    assert pj.read_cache(cache) == result
+    assembler.dataset.mapped.close()
@@ -0,0 +1,259 @@
+import json
+import os
+import pytest
+from .context import assembler
+
+ds = assembler.dataset
+tf = assembler.template.token_filter
+
+
+def write_rows(path, count=5):
+    with open(path, 'w') as rows_file:
+        for index in range(count):
+            rows_file.write(json.dumps({'id': index, 'price': count - index}))
+            rows_file.write('\n\n' if index == 1 else '\n')
+    return str(path)
+
+
+# JsonLines
+
+def test_jsonl_1a(tmp_path):
+    rows = ds.source.load(write_rows(tmp_path / 'rows.jsonl'))
+    assert isinstance(rows, ds.lazy.LazySequence)
+    assert len(rows) == 5
+    assert [row['id'] for row in rows] == [0, 1, 2, 3, 4]
+
+
+def test_jsonl_2a(tmp_path):
+    rows = ds.source.load(write_rows(tmp_path / 'rows.jsonl'))
+    assert rows.item(2) == {'id': 2, 'price': 3}
+    assert rows.item(-1) == {'id': 4, 'price': 1}
+
+
+def test_jsonl_3a(tmp_path):
+    filename = write_rows(tmp_path / 'rows.jsonl')
+    result = ds.source.named(filename, ds.source.load(filename))
+    assert list(result.keys()) == ['rows']
+
+
+def test_jsonl_4a(tmp_path):
+    # Lines that fail to decode are neither rendered nor counted
+    source = tmp_path / 'broken.jsonl'
+    source.write_text('{"id": 1}\n{"id": \n{"id": 3}\n')
+    rows = ds.source.load(str(source))
+    assert len(rows) == len(list(rows)) == 2
+    assert rows.item(-1) == {'id': 3}
+
+
+def test_jsonl_filters_1a(tmp_path):
+    rows = ds.source.load(write_rows(tmp_path / 'rows.jsonl'))
+    assert tf.first_filter(rows, [], None) == {'id': 0, 'price': 5}
+    assert tf.last_filter(rows, [], None) == {'id': 4, 'price': 1}
+    assert tf.length_filter(rows, [], None) == 5
+
+
+# SQLite
+
+def write_catalog(tmp_path):
+    source = tmp_path / 'catalog.json'
+    source.write_text(json.dumps({'products': [
+        {'id': 1, 'name': 'apple', 'price': 3, 'tags': ['fruit']},
+        {'id': 2, 'name': 'pear', 'price': 2},
+        {'id': 3, 'name': 'plum', 'price': 2},
+    ]}))
+    target = str(tmp_path / 'catalog.sqlite')
+    ds.sqlite.import_json(str(source), target)
+    return ds.source.load(target)['products']
+
+
+def test_sqlite_1a(tmp_path):
+    products = write_catalog(tmp_path)
+    assert len(products) == 3
+    assert products.item(0) == {'id': 1, 'name': 'apple', 'price': 3, 'tags': ['fruit']}
+    assert products.item(-1)['name'] == 'plum'
+
+
+def test_sqlite_where_1a(tmp_path):
+    products = write_catalog(tmp_path)
+    result = tf.whereall_filter(products, ['price', '2'], None)
+    assert isinstance(result, ds.sqlite.SqliteTable)
+    assert [row['name'] for row in result] == ['pear', 'plum']
+    assert tf.where_filter(products, ['id', '3'], None)['name'] == 'plum'
+
+
+def test_sqlite_where_2a(tmp_path):
+    products = write_catalog(tmp_path)
+    where, parameters = products.where('id', '3').where_clause()
+    plan = products.connection.execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM products' + where, parameters
+    ).fetchall()
+    assert 'products_id_index' in str(plan)
+
+
+def test_sqlite_dictsort_1a(tmp_path):
+    products = write_catalog(tmp_path)
+    result = tf.dictsort_filter(products, ['price', 'reverse'], None)
+    assert [row['name'] for row in result] == ['apple', 'pear', 'plum']
+
+
+def test_sqlite_dictsort_2a(tmp_path):
+    # Rows missing the key are sorted last by both backends
+    rows = [{'id': 1, 'rank': 2}, {'id': 2}, {'id': 3, 'rank': 1}, {'id': 4}]
+    source = tmp_path / 'ranks.json'
+    source.write_text(json.dumps({'rows': rows}))
+    target = str(tmp_path / 'ranks.sqlite')
+    ds.sqlite.import_json(str(source), target)
+    table = ds.source.load(target)['rows']
+    for argument in (['rank'], ['rank', 'reverse']):
+        pushed = tf.dictsort_filter(table, argument, None)
+        assert isinstance(pushed, ds.sqlite.SqliteTable)
+        expected = tf.dictsort_filter(rows, argument, None)
+        assert [row['id'] for row in pushed] == [row['id'] for row in expected]
+
+
+# Compiled
+
+def test_compiled_1a(tmp_path):
+    source = tmp_path / 'data.json'
+    source.write_text(json.dumps({'title': 'compiled', 'items': [{'a': 1}]}))
+    target = ds.compiled.compile_json(str(source))
+    assert target == str(tmp_path / 'data.djc')
+    source.write_text(json.dumps({'title': 'changed'}))
+    os.utime(source, (0, 0))
+    assert ds.source.load(str(source)) == {'title': 'compiled', 'items': [{'a': 1}]}
+
+
+def test_compiled_2a(tmp_path):
+    source = tmp_path / 'data.json'
+    source.write_text(json.dumps({'title': 'compiled'}))
+    target = ds.compiled.compile_json(str(source))
+    source.write_text(json.dumps({'title': 'newer'}))
+    os.utime(target, (0, 0))
+    assert ds.source.load(str(source)) == {'title': 'newer'}
+
+
+def test_compiled_3a(tmp_path):
+    target = tmp_path / 'data.djc'
+    target.write_bytes(b'DJIST-DATASET\x00\x00\x00\x00\x00')
+    assert ds.compiled.load(str(target)) is None
+
+
+# Memory-mapped JSON
+
+def write_mapped(tmp_path):
+    source = tmp_path / 'big.json'
+    source.write_text(json.dumps({
+        'site': {'title': 'Shop', 'menu': [{'label': 'a "{[x'}]},
+        'rows': [1, 2.5, None, True],
+        'end': '}',
+    }, indent=2))
+    return str(source)
+
+
+def test_mapped_1a(tmp_path):
+    result = ds.mapped.load(write_mapped(tmp_path))
+    assert isinstance(result['site'], ds.lazy.LazyValue)
+    assert not result['site'].decoded
+    assert result['site'].resolve() == {'title': 'Shop', 'menu': [{'label': 'a "{[x'}]}
+    assert result['rows'].resolve() == [1, 2.5, None, True]
+    assert result['end'].resolve() == '}'
+
+
+def test_mapped_2a(tmp_path):
+    result = ds.mapped.load(write_mapped(tmp_path), depth=2)
+    assert isinstance(result['site'], dict)
+    assert result['site']['menu'].resolve() == [{'label': 'a "{[x'}]
+
+
+def test_mapped_3a(tmp_path):
+    source = tmp_path / 'list.json'
+    source.write_text('[1, 2]')
+    assert ds.mapped.load(str(source)) is None
+
+
+def test_mapped_4a(monkeypatch, tmp_path):
+    filename = write_mapped(tmp_path)
+    index = tmp_path / 'big.djx'
+    first = ds.mapped.load(filename)
+    # Pages reading the same file share its map
+    assert ds.mapped.load(filename)['site'].buffer is first['site'].buffer
+    assert not index.exists()
+    ds.mapped.close()
+    assert first['site'].buffer.closed and not ds.mapped.maps
+    monkeypatch.setattr(assembler.job.config, 'LAZY_JSON_INDEX_FILE', True)
+    ds.mapped.indexes.clear()
+    ds.mapped.load(filename)
+    assert index.exists()
+    ds.mapped.close()
+
+
+def test_mapped_get_data_1a(tmp_path):
+    proc = assembler.template.processor.Processor(0)
+    proc.update_dataset(ds.mapped.load(write_mapped(tmp_path)))
+    assert proc.get_data('any', 'site.menu.0.label') == 'a "{[x'
+    assert not proc.dataset['rows'].decoded
+
+
+# Columnar
+
+def columnar_products():
+    return ds.columnar.convert([
+        {'id': 1, 'name': 'apple', 'price': 3.5, 'fresh': True},
+        {'id': 2, 'name': 'pear', 'price': 2.0, 'fresh': False},
+        {'id': 3, 'name': 'plum', 'price': 2.0, 'fresh': True},
+    ])
+
+
+def test_columnar_1a():
+    products = columnar_products()
+    assert products.columns['id'].kind == 'int'
+    assert products.columns['fresh'].kind == 'bool'
+    assert len(products) == 3
+    assert dict(products.item(2)) == {'id': 3, 'name': 'plum', 'price': 2.0, 'fresh': True}
+
+
+def test_columnar_1c():
+    # Negative indexes aren't dot keys, of plain or columnar lists
+    products = columnar_products()
+    with pytest.raises(IndexError):
+        products.item(-1)
+    rows = [{'name': 'apple'}, {'name': 'pear'}]
+    for data in (rows, ds.columnar.convert(rows)):
+        context = assembler.template.context.Context(0, 'test')
+        context.set_dataset({'products': data})
+        context.set_template('[{{ products.-1.name }}][{{ products.1.name }}]')
+        assert context.process() == '[][pear]'
+
+
+def test_columnar_1b():
+    assert ds.columnar.convert([{'id': 1}, {'id': 2, 'name': 'pear'}]) is None
+    assert ds.columnar.convert([{'id': 1}, 'pear']) is None
+
+
+def test_columnar_where_1a():
+    products = columnar_products()
+    assert tf.where_filter(products, ['id', '2'], None)['name'] == 'pear'
+    assert [row['id'] for row in tf.whereall_filter(products, ['fresh', 'true'], None)] == [1, 3]
+    assert tf.length_filter(tf.whereall_filter(products, ['name', 'fig'], None), [], None) == 0
+
+
+def test_columnar_dictsort_1a():
+    products = columnar_products()
+    assert [row['id'] for row in tf.dictsort_filter(products, ['price,-id', ''], None)] == [3, 2, 1]
+
+
+def test_columnar_get_data_1a():
+    proc = assembler.template.processor.Processor(0)
+    proc.update_dataset({'products': columnar_products()})
+    proc.update_dataset({'product': proc.dataset['products'].item(1)})
+    assert proc.get_data('any', 'product.name') == 'pear'
+    assert proc.get_data('any', 'products.0.price') == 3.5
+
+
+def test_columnar_aggregation_1a():
+    products = columnar_products()
+    assert tf.sum_filter(products, ['price'], None) == 7.5
+    assert tf.avg_filter(products, ['id'], None) == 2
+    assert tf.min_filter(products, ['name'], None) == 'apple'
+    assert tf.count_by_filter(products, ['fresh'], None) == {'true': 2, 'false': 1}
+    assert tf.map_filter(tf.whereall_filter(products, ['price', '2'], None), ['id'], None) == [2, 3]
@@ -0,0 +1,44 @@
+from .context import assembler
+
+fr = assembler.template.fragment
+conf = assembler.job.config
+
+
+def test_fragment_key_1a():
+    key = fr.fragment_key('side', [{'b': 1, 'a': [1, 2]}], 'content', False)
+    assert key == fr.fragment_key('side', [{'a': [1, 2], 'b': 1}], 'content', False)
+    assert key != fr.fragment_key('side', [{'a': [1, 2], 'b': '1'}], 'content', False)
+    assert key != fr.fragment_key('side', [{'a': [1, 2], 'b': 1}], 'content', True)
+    assert key != fr.fragment_key('nav', [{'a': [1, 2], 'b': 1}], 'content', False)
+
+
+def test_memory_eviction_1a(monkeypatch):
+    monkeypatch.setattr(conf, 'FRAGMENT_CACHE_SIZE', 10 / fr.MIB)
+    monkeypatch.setattr(conf, 'FRAGMENT_CACHE_DIR', '')
+    cache = fr.FragmentCache()
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    assert cache.get('a') == 'aaaa'
+    cache.put('c', 'cccc')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'aaaa' and cache.get('c') == 'cccc'
+    cache.put('d', 'd' * 11)
+    assert cache.get('d') is None
+    assert cache.summary()[:3] == (3, 0, 2)
+
+
+def test_directory_cache_1a(monkeypatch, tmp_path):
+    monkeypatch.setattr(conf, 'FRAGMENT_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(conf, 'FRAGMENT_CACHE_DIR_SIZE', 10 / fr.MIB)
+    cache = fr.FragmentCache()
+    cache.put('a', 'aaaa')
+    cache.put('b', 'bbbb')
+    # A later run reads the fragments saved by this one
+    later = fr.FragmentCache()
+    assert later.get('a') == 'aaaa'
+    later.put('c', 'cccc')
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'a' + fr.SUFFIX,
+        'c' + fr.SUFFIX,
+    ]
+    assert later.summary()[:3] == (0, 1, 0)
@@ -64,3 +64,16 @@ def test_format_dj_py_2a():
     result = dt.format_datetime(dt_value, dt_format, format_type)
     expected = 'Thursday, 7 January 2021 9.50AM'
     assert result == expected
+
+
+# compile_format / parse_datetime
+
+def test_compile_format_1a():
+    assert dt.compile_format('D, j M Y', 'django') == '%a, %-d %b %Y'
+    assert dt.compile_format('D, j M Y', 'django') is dt.compile_format('D, j M Y', 'django')
+
+
+def test_parse_datetime_1a():
+    iso = dt.parse_datetime('2021-01-07T09:50:07+03:00')
+    assert dt.parse_datetime('7 Jan 2021 09:50:07 +0300') == iso
+    assert dt.format_datetime(iso, 'j M Y', 'django') == '7 Jan 2021'
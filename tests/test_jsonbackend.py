@@ -0,0 +1,22 @@
+from .context import assembler
+
+jb = assembler.generics.jsonbackend
+
+
+def test_select_1a():
+    backend = jb.select('json')
+    assert backend.name == 'json'
+    assert backend.loads(b'{"a": [1, 2.5, null]}') == {'a': [1, 2.5, None]}
+    assert backend.documents >= 1
+    jb.select()
+
+
+def test_select_2a():
+    backend = jb.select('not-a-json-library')
+    assert backend.name == jb.available()[0]
+
+
+def test_dumps_1a():
+    for name in jb.available():
+        backend = jb.get(name)
+        assert backend.loads(backend.dumps({'a': '/x', 'b': [1]}, indent=4)) == {'a': '/x', 'b': [1]}
@@ -0,0 +1,74 @@
+from .context import assembler
+
+pa = assembler.template.partial
+ctx = assembler.template.context
+conf = assembler.job.config
+
+
+def render(template, dataset):
+    context = ctx.Context(0, 'test', False)
+    context.set_dataset(dataset)
+    context.set_template(template)
+    return context.process()
+
+
+def test_partial_scan_1a(tmp_path):
+    (tmp_path / 'card.template').write_text(
+        '{{ p.name|upper }}{% for t in p.tags %}{{ t }}{% endfor %}')
+    (tmp_path / 'pick.template').write_text('{{ items|random }}')
+    (tmp_path / 'nested.template').write_text('{% usetemplate part %}')
+    memo = pa.PartialMemo()
+    base = str(tmp_path)
+    _, paths = memo.partial(str(tmp_path / 'card.template'), base)
+    assert paths == [(('p', 'name'), True), (('p', 'tags'), False),
+                     (('p', 'tags'), True)]
+    assert memo.partial(str(tmp_path / 'pick.template'), base)[1] is None
+    assert memo.partial(str(tmp_path / 'nested.template'), base)[1] is None
+
+
+def test_partial_memo_1a(monkeypatch, tmp_path):
+    monkeypatch.setattr(pa, 'partials', pa.PartialMemo())
+    (tmp_path / 'card.template').write_text('<{{ p.name }}>')
+    template = ('{% for p in products %}{% usetemplate "card.template" %}'
+                '{% endfor %}')
+    dataset = {
+        'djist_base_location': str(tmp_path),
+        'products': [
+            {'name': 'apple', 'price': 1},
+            {'name': 'pear', 'price': 2},
+            {'name': 'apple', 'price': 3},
+        ],
+    }
+    assert render(template, dataset) == '<apple><pear><apple>'
+    # Values the partial doesn't read are left out of the fingerprint
+    assert pa.partials.summary()[:3] == (1, 2, 0)
+    monkeypatch.setattr(conf, 'PARTIAL_MEMO_SIZE', 0)
+    monkeypatch.setattr(pa, 'partials', pa.PartialMemo())
+    assert render(template, dataset) == '<apple><pear><apple>'
+    assert pa.partials.summary()[:3] == (0, 0, 3)
+
+
+def test_partial_memo_lazy_1a(monkeypatch, tmp_path):
+    monkeypatch.setattr(pa, 'partials', pa.PartialMemo())
+    jsonl = assembler.dataset.jsonl
+    reads = []
+
+    class CountedLines(jsonl.JsonLines):
+        def __iter__(self):
+            reads.append(self.filename)
+            return super().__iter__()
+
+    (tmp_path / 'rows.jsonl').write_text('{"a": 1}\n{"a": 2}\n')
+    (tmp_path / 'list.template').write_text(
+        '{% for r in rows %}{{ r.a }}{% endfor %};')
+    dataset = {
+        'djist_base_location': str(tmp_path),
+        'rows': CountedLines(str(tmp_path / 'rows.jsonl')),
+    }
+    template = '{% usetemplate "list.template" %}' * 2
+    assert render(template, dataset) == '12;12;'
+    # The fingerprint stands for the file, only the first render reads it
+    assert len(reads) == 1
+    assert pa.partials.summary()[:3] == (1, 1, 0)
+    columns = assembler.dataset.columnar.ColumnarList({'a': [1, 2]}, 2)
+    assert pa.stand_ins({'rows': [columns]}) is pa.UNKNOWN
@@ -0,0 +1,49 @@
+from pyparsing import delimitedList
+from .context import assembler
+
+mp = assembler.template.prepper
+mt = assembler.template.token
+
+ARGUMENTS = [
+    ('all', 'title'),
+    ('all', '"lit" x|cut:" "  "a":y|date:"d m"\tz'),
+    ('all', "a:'b c'|f:1:\"2\" x"),
+    ('all', 'a | b'),
+    ('all', 'a"b c'),
+    ('all', ''),
+    ('filter', 'upper|lower'),
+    ('filter', '"x" y'),
+    ('firstof', 'a "b" c:d'),
+    ('for', 'x IN items|slice:":2"'),
+    ('for', 'x:y in a b in c'),
+    ('for', 'k, v in items'),
+    ('regroup', 'items|f:"x" BY cat As g'),
+    ('regroup', 'a by b as c d by e as f'),
+    ('use', 'x|f:1 AS y'),
+    ('usedataset', '"ds.json" as d'),
+]
+
+
+def test_plain_arguments_1a():
+    for tag, argument_string in ARGUMENTS:
+        expected = delimitedList(mp.argument_grammar()[tag], ' ')
+        expected = expected.parseString(argument_string).asList()
+        plain = mp.plain_arguments(tag, argument_string)
+        assert plain is None or plain == expected, (tag, argument_string)
+    assert mp.plain_arguments('for', 'x IN items') == ['x', 'in', 'items']
+    assert mp.plain_arguments('all', 'a | b') is None
+    assert mp.plain_arguments('usedataset', 'ds as d') is None
+
+
+def test_split_token_1a():
+    for token_string in ('x', '"a b":c', 'x|cut:" "|date:"Y":y', "'q'|f:'r'"):
+        expected = mt.token_grammar().parseString(token_string).asList()
+        assert mt.split_token(token_string) == expected
+    assert mt.split_token('"a\\"b"') is None
+
+
+def test_split_tag_1a():
+    prepper = mp.Prepper()
+    assert prepper.split_tag('{{ x|f:"}}"}}') == ('replace', 'x|f:"')
+    assert prepper.split_tag('{%\nFor\tx in y\n%}') == ('for', 'x in y')
+    assert prepper.split_tag('{%endfor%}') == ('endfor', '')
@@ -0,0 +1,82 @@
+import pytest
+from .context import assembler
+
+rg = assembler.template.registry
+tf = assembler.template.token_filter
+
+
+class EntryPoint:
+    def __init__(self, name, function):
+        self.name = name
+        self.value = 'plugin:' + name
+        self.function = function
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return self.function
+
+
+def test_builtin_filter_1a():
+    env = rg.Environment()
+    info = env.filter('escape')
+    assert info.builtin and info.pure and info.needs_processor
+    assert env.filter('divisibleby').boolean
+    assert not env.filter('default').needs_processor
+    assert env.filter('default').callable()(None, ['x'], None) == 'x'
+
+
+def test_register_filter_1a():
+    env = rg.Environment()
+
+    @env.register_filter('escape', pure=True)
+    def escape(value, argument, proc):
+        return 'fast'
+
+    assert env.filter('escape').function is escape
+    assert not env.filter('escape').builtin
+
+
+def test_register_filter_2a(monkeypatch):
+    monkeypatch.setattr(rg, 'environment', rg.Environment())
+    chain = (('initials', ()), ('escape', ()))
+    # Unknown when the chain is first compiled
+    assert len(tf.compile_chain(chain)) == 1
+
+    @rg.environment.register_filter('initials')
+    def initials(value, argument, proc):
+        return ''.join(word[0] for word in value.split())
+
+    calls = tf.compile_chain(chain)
+    assert len(calls) == 2
+    function, arguments, _ = calls[0]
+    assert function('Tom Jerry', arguments, None) == 'TJ'
+
+
+def test_entry_point_filter_1a(monkeypatch):
+    @rg.filter_metadata(pure=True, defaults=([(str, int)], ['2'], [('',)]))
+    def repeat(value, argument, proc):
+        return value * int(argument[0])
+
+    entry_point = EntryPoint('repeat', repeat)
+    listed = []
+
+    def entry_points(group):
+        listed.append(group)
+        return {'repeat': entry_point} if group == rg.ENTRY_POINT_FILTERS else {}
+
+    monkeypatch.setattr(rg, 'entry_points', entry_points)
+    env = rg.Environment()
+    assert env.filter('upper') is not None
+    assert listed == [] and entry_point.loads == 0
+    assert env.filter('nothing') is None
+    assert env.filter('repeat').pure and entry_point.loads == 1
+    assert env.filter('repeat').defaults[1] == ['2']
+    assert listed == [rg.ENTRY_POINT_FILTERS]
+
+
+def test_register_tag_1a():
+    env = rg.Environment()
+    env.register_tag('box', lambda proc, action: '[]', end_tag='endbox')
+    assert env.tag('box').end_tag == 'endbox'
+    assert env.block_tags() == {'box': 'endbox'}
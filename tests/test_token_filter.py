@@ -74,3 +74,251 @@ def test_date_filter_2a():
         print(result)
         result_list.append(result)
     assert result_list == expected_list"""
+
+
+# where / whereall
+
+def products():
+    return [
+        {'id': 1, 'name': 'apple', 'stock': {'count': 0}},
+        {'id': 2, 'name': 'pear', 'stock': {'count': 3}},
+        {'id': '2', 'name': 'plum', 'stock': {'count': 3}},
+    ]
+
+
+def test_where_1a():
+    res = tf.where_filter(products(), ['id', '2'], None)
+    assert res['name'] == 'pear'
+
+
+def test_where_2a():
+    res = tf.where_filter(products(), ['stock.count', 0], None)
+    assert res['name'] == 'apple'
+
+
+def test_whereall_1a():
+    res = tf.whereall_filter(products(), ['id', '2'], None)
+    assert [item['name'] for item in res] == ['pear', 'plum']
+
+
+def test_whereall_2a():
+    items = products()
+    first = tf.whereall_filter(items, ['stock.count', '3'], None)
+    again = tf.whereall_filter(items, ['stock.count', '3'], None)
+    assert first == again == items[1:]
+    assert len(assembler.template.lookup.indexes) >= 1
+
+
+# dictsort
+
+def test_dictsort_1a():
+    items = [{'n': 'b', 'p': 2}, {'n': 'a', 'p': 2}, {'n': 'c', 'p': 1}, {'n': 'd'}]
+    res = tf.dictsort_filter(items, ['p,n'], None)
+    assert [item['n'] for item in res] == ['c', 'a', 'b', 'd']
+
+
+def test_dictsort_2a():
+    items = [{'n': 'b', 'p': 2}, {'n': 'a', 'p': 2}, {'n': 'c', 'p': 1}, {'n': 'd'}]
+    res = tf.dictsortreversed_filter(items, ['p'], None)
+    assert [item['n'] for item in res] == ['b', 'a', 'c', 'd']
+
+
+def test_dictsort_3a():
+    items = [{'v': 'x'}, {'v': 3}, {'v': None}, {'v': 1.5}]
+    res = tf.dictsort_filter(items, ['-v'], None)
+    assert [item['v'] for item in res] == ['x', 3, 1.5, None]
+
+
+def test_dictsort_4a():
+    items = [[2, 'b'], [1, 'a']]
+    first = tf.dictsort_filter(items, ['0'], None)
+    assert first == [[1, 'a'], [2, 'b']]
+    assert tf.dictsort_filter(items, ['0'], None) is first
+
+
+def test_dictsort_5a():
+    lookup = assembler.template.lookup
+    context = assembler.template.context.Context(0, 'test')
+    context.set_dataset({'items': [{'n': 'b'}, {'n': 'a'}]})
+    context.set_template('{% for i in items|dictsort:"n" %}{{ i.n }}{% endfor %}')
+    assert context.process() == 'ab'
+    # The render doesn't keep its lists alive once it ends
+    assert not lookup.indexes and not lookup.sorted_lists
+
+
+# aggregation
+
+def test_sum_1a():
+    assert tf.sum_filter(products(), ['stock.count'], None) == 6
+    assert tf.sum_filter([1, 2.5, 'x', True], [], None) == 3.5
+
+
+def test_avg_1a():
+    assert tf.avg_filter(products(), ['stock.count'], None) == 2
+    assert tf.avg_filter([], ['price'], None) is None
+
+
+def test_min_max_1a():
+    assert tf.min_filter(products(), ['id'], None) == 1
+    assert tf.max_filter(products(), ['id'], None) == '2'
+    assert tf.max_filter(products(), ['missing'], None) is None
+
+
+def test_count_by_1a():
+    assert tf.count_by_filter(products(), ['stock.count'], None) == {'0': 1, '3': 2}
+
+
+def test_group_by_1a():
+    res = tf.group_by_filter(products(), ['stock.count'], None)
+    assert [item['name'] for item in res['3']] == ['pear', 'plum']
+
+
+def test_map_unique_1a():
+    assert tf.map_filter(products(), ['name'], None) == ['apple', 'pear', 'plum']
+    assert tf.unique_filter(products(), ['stock.count'], None) == [0, 3]
+    assert tf.unique_filter([{'a': 1}, {'a': 1}, 2], [], None) == [{'a': 1}, 2]
+
+
+# regroup
+
+def test_regroup_1a():
+    res = assembler.template.lookup.regroup(products(), 'stock.count')
+    assert [group['grouper'] for group in res] == [0, 3]
+    assert [item['name'] for item in res[1]['list']] == ['pear', 'plum']
+
+
+# compiled filter chains
+
+def test_compile_chain_1a():
+    chain = (('center', (('9', 'literal'),)), ('unknown', ()), ('join', (('sep', 'name'),)))
+    calls = tf.compile_chain(chain)
+    assert [call[0].__wrapped__ for call in calls[:1]] == [tf.center_filter]
+    assert calls[1][0] is tf.join_filter
+    assert calls[0][1].resolved == ['9', ' ']
+    assert tf.resolve_arguments('center', calls[0][1]) is calls[0][1].resolved
+    assert calls[1][2] == ((0, 'sep'),)
+    assert tf.compile_chain(chain) is calls
+
+
+def test_filter_memo_1a():
+    memo = assembler.template.memo.FilterMemo()
+    calls = []
+
+    def upper(value, argument, proc):
+        calls.append(value)
+        return str(value).upper()
+
+    assert memo.call('upper', upper, 'a', [], None) == 'A'
+    assert memo.call('upper', upper, 'a', [], None) == 'A'
+    assert memo.call('upper', upper, ['a'], [], None) == "['A']"
+    assert calls == ['a', ['a']]
+    assert memo.summary() == [('upper', 1, 1, 1)]
+
+
+# escaping and safe strings
+
+def test_escape_1a():
+    sf = assembler.template.safe
+    res = tf.escape_filter('<a href="x">Tom & Jerry\'s</a>', [], None)
+    assert res == '&lt;a href=&quot;x&quot;&gt;Tom &amp; Jerry&#x27;s&lt;/a&gt;'
+    assert sf.is_safe(res)
+    proc = assembler.template.processor.Processor(1, autoescape=True)
+    assert tf.escape_filter(res, [], proc) is res
+    assert tf.escape_filter(res, [], None) == res
+    assert tf.force_escape_filter(sf.mark_safe('<b>'), [], None) == '&lt;b&gt;'
+
+
+def test_escape_2a():
+    # Escapes already written aren't escaped again
+    res = tf.escape_filter('A &amp; B <x>', [], None)
+    assert res == 'A &amp; B &lt;x&gt;'
+    assert tf.force_escape_filter('A &amp; B', [], None) == 'A &amp;amp; B'
+
+
+def test_escape_3a():
+    # HTML built by a filter is only left as it is under autoescape
+    for autoescape, expected in ((False, 'a&lt;b&lt;br&gt;c'), (True, 'a&lt;b<br>c')):
+        context = assembler.template.context.Context(0, 'test', autoescape)
+        context.set_dataset({'s': 'ax<b\nc'})
+        context.set_template('{{ s|cut:"x"|linebreaksbr|escape }}')
+        assert context.process() == expected
+
+
+def test_escapejs_1a():
+    res = tf.escapejs_filter('it\'s "q"\n<x>\\n', [], None)
+    assert res == 'it\\u0027s \\u0022q\\u0022\\u000A\\u003Cx\\u003E\\u000A'
+
+
+def test_safe_1a():
+    sf = assembler.template.safe
+    assert sf.is_safe(tf.safe_filter('<b>', [], None))
+    res = tf.safeseq_filter(['<i>', 1], [], None)
+    assert sf.is_safe(res[0]) and res[1] == 1
+
+
+def test_autoescape_1a():
+    proc = assembler.template.processor.Processor(1, autoescape=True)
+    sf = assembler.template.safe
+    res = tf.join_filter([sf.mark_safe('<i>'), 'a&b'], [', '], proc)
+    assert res == '<i>, a&amp;b'
+    assert tf.linebreaksbr_filter('<1>\n2', [], proc) == '&lt;1&gt;<br>2'
+    assert tf.linebreaks_filter('a\n\nb', [], None) == '<p>a</p><p>b</p>'
+
+
+# HTML text filters
+
+def test_html_tokens_1a():
+    res = list(tf.html_tokens('a < b<br/><p class="x>y">c</p><!-- d -->'))
+    assert [token[0] for token in res] == ['text', 'text', 'text', 'other', 'start', 'text', 'end', 'other']
+    assert res[4] == ('start', '<p class="x>y">', 'p')
+
+
+def test_striptags_1a():
+    assert tf.striptags_filter('<p>Hi <b>there</b></p><!-- x -->', [], None) == 'Hi there'
+    assert tf.wordcount_filter('<p>Hi <b>th</b>ere</p> you', [], None) == 3
+
+
+def test_truncate_html_1a():
+    value = '<p>Hello <b>wor&amp;ld</b> and more</p>'
+    assert tf.truncatechars_html_filter(value, ['9'], None) == '<p>Hello <b>wo…</b></p>'
+    assert tf.truncatechars_html_filter(value, ['13'], None) == '<p>Hello <b>wor&amp;ld…</b></p>'
+    assert tf.truncatechars_html_filter(value, ['21'], None) == value
+    assert tf.truncatewords_html_filter(value, ['2'], None) == '<p>Hello <b>wor&amp;ld …</b></p>'
+    assert tf.truncatewords_html_filter('<ul><li>a b<li>c</ul>', ['2'], None) == '<ul><li>a b …</li></ul>'
+
+
+def test_urlize_1a():
+    res = tf.urlize_filter('See www.x.com, <a href="http://y">http://y</a> or me@ex.com.', [], None)
+    assert res == ('See <a href="http://www.x.com" rel="nofollow">www.x.com</a>, '
+                   '<a href="http://y">http://y</a> or '
+                   '<a href="mailto:me@ex.com" rel="nofollow">me@ex.com</a>.')
+    res = tf.urlizetrunc_filter('http://example.com/page', ['8'], None)
+    assert res == '<a href="http://example.com/page" rel="nofollow">http://…</a>'
+
+
+def test_wordwrap_1a():
+    res = tf.wordwrap_filter('Joel is a <b>slug</b>\nabcdefgh x', ['5'], None)
+    assert res == 'Joel\nis a<b>\nslug</b>\nabcdefgh\nx'
+
+
+# fused filter chains
+
+def test_fused_chain_1a():
+    chain = (('cut', (('\r', 'literal'),)), ('escape', ()), ('linebreaksbr', ()))
+    calls = tf.compile_chain(chain)
+    assert len(calls) == 1
+    function, arguments, _ = calls[0]
+    proc = assembler.template.processor.Processor(1, autoescape=True)
+    for value in ['<a>\r\nb & c\n', 'written \\n newline <', 'A &amp; B']:
+        separate = tf.cut_filter(value, ['\r'], proc)
+        separate = tf.escape_filter(separate, [], proc)
+        separate = tf.linebreaksbr_filter(separate, [], proc)
+        assert function(value, arguments, proc) == separate
+    assert function('<a>\r\nb', arguments, proc) == '&lt;a&gt;<br>b'
+
+
+def test_ordered_replacements_1a():
+    sf = assembler.template.safe
+    table = str.maketrans({'<': '&lt;', '&': '&amp;', '\n': '<br>'})
+    assert [pair[0] for pair in sf.ordered_replacements(table)] == ['&', '<', '\n']
+    assert sf.ordered_replacements(str.maketrans({'a': 'b', 'b': 'a'})) is None